@@ -1,14 +1,19 @@
 import os
 import json
 import boto3
+import contextlib
+import concurrent.futures
 import tempfile
 import logging
+import uuid
 from datetime import datetime
 from fpdf import FPDF  # fpdf2 still uses the same import name
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langgraph.graph import StateGraph, END
-from typing import TypedDict, List, Dict
+from typing import TypedDict, Any, List, Dict, Optional
 import re
+from reportkit import (blobstore, bundle, checkpoint, cveindex, deadline, ingest, instrumentation, knowledge_cache,
+                       logmine, model, prompts, scoring)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,9 +22,48 @@ logger = logging.getLogger(__name__)
 # Initialize AWS clients
 s3 = boto3.client('s3')
 
+# Stage/LLM/S3 metrics, emitted as CloudWatch EMF records on stdout by default
+tracer = instrumentation.configure(default_sink="emf", service="security-report-lambda")
+
+# Finding explanations reused across scans; /tmp survives between warm invocations
+knowledge = knowledge_cache.configure(default_path="/tmp/knowledge-cache.sqlite3")
+
+# Offline CVE metadata (memory-mapped, shipped in reportkit/data/) used to rank findings before prompting
+cve_index = cveindex.configure()
+CVE_TOP_K = cveindex.top_k()
+
+def read_source(ref: Dict) -> bytes:
+    """Load a report that a blob handle still leaves in S3"""
+    with tracer.span("s3.get_object", kind="s3", key=ref['key']) as span:
+        raw = s3.get_object(Bucket=ref['bucket'], Key=ref['key'])['Body'].read()
+        span.add(bytes=len(raw))
+    return raw
+
+# REPORT_PAYLOADS=ref keeps only handles in State; content lives in a bounded cache spilling to /tmp
+blobs = blobstore.configure(fetch=read_source, default_spill_dir="/tmp")
+
 # Get environment variables - set these in Lambda configuration
 GOOGLE_API_KEY = os.environ.get('GOOGLE_API_KEY')
 OUTPUT_BUCKET = os.environ.get('OUTPUT_BUCKET')
+# "batch" runs the whole graph per scan; "streaming" analyzes each report as it lands
+PIPELINE_MODE = os.environ.get('PIPELINE_MODE', 'batch').lower()
+
+# Written last by the scanner, so its presence means every report is uploaded
+MANIFEST_NAME = 'summary.json'
+
+# Progress of the batch pipeline run in this invocation, for resume after a crash or timeout
+current_run = None
+
+# Time budget of this invocation: decides which sections get compact summaries instead of LLM calls
+current_plan = None
+
+# Priority of tools without severity words in their report, on the 0-10 risk scale
+UNSCORED_PRIORITY = 5.0
+# Reports are prioritized from their first bytes only; S3 reports are sampled with a ranged GET
+PRIORITY_SAMPLE_BYTES = 64 * 1024
+SEVERITY_WORDS = re.compile(r"\b(critical|high|medium|low)\b", re.IGNORECASE)
+# Size of the compacted text report in a compact summary
+COMPACT_EXCERPT_CHARS = 3000
 
 # Initialize Gemini AI
 gemini = ChatGoogleGenerativeAI(
@@ -32,162 +76,343 @@ gemini = ChatGoogleGenerativeAI(
 class State(TypedDict):
     input_bucket: str
     input_key_prefix: str
-    report_files: Dict[str, str]  # Map of tool_name -> report_content
-    analysis: Dict[str, str]      # Map of tool_name -> analysis
+    report_files: Dict[str, Any]  # Map of tool_name -> report_content (or blob handle)
+    analysis: Dict[str, Any]      # Map of tool_name -> analysis (or blob handle)
     summary: str
     output_key: str
+    degraded: Dict[str, str]      # Map of section -> why it was shortened to meet the deadline
 
 # LangGraph Node Functions
 
+def read_report(bucket: str, key: str) -> str:
+    """Download one tool report and prepare it for analysis"""
+    with tracer.span("s3.get_object", kind="s3", key=key) as span:
+        response = s3.get_object(Bucket=bucket, Key=key)
+        raw = response['Body'].read()
+        span.add(bytes=len(raw))
+    return prepare_report(key, raw)
+
+def prepare_report(key: str, raw: bytes) -> str:
+    """Decode a report file, pretty-printing JSON reports"""
+    tool_name = key.split('/')[-2]
+    
+    # Handle JSON format if needed
+    if key.endswith('.json'):
+        try:
+            # Parse the bytes directly so no decoded copy stays alive next to the pretty-printed one
+            json_content = json.loads(raw)
+            logger.info(f"Processed JSON report for tool: {tool_name}")
+            return f"JSON REPORT FORMAT:\n{json.dumps(json_content, indent=2)}"
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            logger.warning(f"Error parsing JSON for {tool_name}: {str(e)}")
+            # Still use the raw content if JSON parsing fails
+            return f"UNPARSEABLE JSON REPORT:\n{raw.decode('utf-8')}"
+    
+    return raw.decode('utf-8')
+
+def store_payload(text: str) -> Any:
+    """Put a payload in the blob store in reference mode; inline otherwise"""
+    return blobs.put(text) if blobs is not None else text
+
+def load_payload(value: Any) -> str:
+    """Resolve a State value that may be a blob handle"""
+    if not blobstore.is_ref(value):
+        return value
+    raw = blobs.get(value)
+    # Report handles hold the raw object, prepared only when a node needs it
+    return prepare_report(value['key'], raw) if value.get('kind') == 'report' else raw.decode('utf-8')
+
+def is_report_key(key: str) -> bool:
+    """Report files live in tool folders as report.txt or report.json"""
+    return key.endswith('/report.txt') or key.endswith('/report.json')
+
+def is_plain_report_key(key: str) -> bool:
+    """A report file for a tool without an ingest reader (those are read by ingest_reports)"""
+    return is_report_key(key) and not ingest.has_reader(key.split('/')[-2])
+
+def format_ingested(result: ingest.Ingested) -> str:
+    """Compacted multi-file output, in the same shape as a JSON report"""
+    return f"JSON REPORT FORMAT:\n{json.dumps(result.data, indent=2)}"
+
+def ingest_reports(source: ingest.Source) -> Dict[str, ingest.Ingested]:
+    """Compacted results for tools with multi-file outputs (sqlmap trees, XSStrike and jwt_tool logs)"""
+    with tracer.span("ingest", kind="s3") as span:
+        results = ingest.ingest_all(source)
+        span.add(bytes=source.bytes_read)
+        span.set(tools=sorted(results))
+    for tool_name, result in results.items():
+        logger.info(f"Ingested {tool_name} from {len(result.files)} files ({result.bytes_read} bytes read"
+                    f"{', truncated' if result.truncated else ''})")
+    return results
+
+def list_objects(bucket: str, prefix: str) -> List[Dict]:
+    """List every object under a prefix, following pagination"""
+    objects = []
+    kwargs = {'Bucket': bucket, 'Prefix': prefix}
+    while True:
+        response = s3.list_objects_v2(**kwargs)
+        objects.extend(response.get('Contents', []))
+        if not response.get('IsTruncated'):
+            return objects
+        kwargs['ContinuationToken'] = response['NextContinuationToken']
+
+def list_keys(bucket: str, prefix: str) -> List[str]:
+    """List every object key under a prefix, following pagination"""
+    return [item['Key'] for item in list_objects(bucket, prefix)]
+
+@tracer.traced("fetch_reports", kind="node")
 def fetch_reports(state: State) -> State:
     """Fetch all report files from S3"""
     logger.info(f"Fetching reports from {state['input_bucket']}/{state['input_key_prefix']}")
     
     report_files = {}
+    objects = list_objects(state['input_bucket'], state['input_key_prefix'])
+    keys = [item['Key'] for item in objects]
+    
+    # A scan bundle holds every report; read just the report members with ranged GETs
+    bundle_key = f"{state['input_key_prefix']}/{bundle.BUNDLE_NAME}"
+    if bundle_key in keys:
+        with tracer.span("s3.read_bundle", kind="s3", key=bundle_key) as span:
+            reader = bundle.BundleReader.from_s3(s3, state['input_bucket'], bundle_key)
+            members = reader.read_many([name for name in reader.names() if is_plain_report_key('/' + name)])
+            ingested = ingest_reports(ingest.BundleSource(reader))
+            span.add(bytes=reader.bytes_read)
+            span.set(requests=reader.requests)
+        for name in list(members):
+            raw = members.pop(name)
+            tool_name = name.split('/')[-2] if '/' in name else name
+            if blobs is not None:
+                report_files[tool_name] = blobs.put(raw, kind='report', key='/' + name)
+            else:
+                report_files[tool_name] = prepare_report('/' + name, raw)
+            logger.info(f"Found bundled report for tool: {tool_name}")
+        for tool_name, result in ingested.items():
+            report_files[tool_name] = store_payload(format_ingested(result))
+        state['report_files'] = report_files
+        return state
     
     # List all objects under the input prefix
-    response = s3.list_objects_v2(
-        Bucket=state['input_bucket'],
-        Prefix=state['input_key_prefix']
-    )
+    for item in objects:
+        key = item['Key']
+        # Look for report files in tool folders (both .txt and .json)
+        if is_plain_report_key(key):
+            # Extract tool name from path
+            tool_name = key.split('/')[-2]
+            if blobs is not None:
+                # Leave the report in S3 until analyze_reports needs it
+                report_files[tool_name] = blobs.reference(item.get('Size', 0), kind='report',
+                                                          bucket=state['input_bucket'], key=key)
+            else:
+                report_files[tool_name] = read_report(state['input_bucket'], key)
+            logger.info(f"Found report for tool: {tool_name}")
     
-    if 'Contents' in response:
-        for item in response['Contents']:
-            key = item['Key']
-            # Look for report files in tool folders (both .txt and .json)
-            if key.endswith('/report.txt') or key.endswith('/report.json'):
-                # Extract tool name from path
-                tool_name = key.split('/')[-2]
-                
-                # Download file content
-                response = s3.get_object(Bucket=state['input_bucket'], Key=key)
-                content = response['Body'].read().decode('utf-8')
-                
-                # Handle JSON format if needed
-                if key.endswith('.json'):
-                    try:
-                        # Parse JSON and convert to a pretty-printed string for analysis
-                        json_content = json.loads(content)
-                        content = f"JSON REPORT FORMAT:\n{json.dumps(json_content, indent=2)}"
-                        logger.info(f"Processed JSON report for tool: {tool_name}")
-                    except json.JSONDecodeError as e:
-                        logger.warning(f"Error parsing JSON for {tool_name}: {str(e)}")
-                        # Still use the raw content if JSON parsing fails
-                        content = f"UNPARSEABLE JSON REPORT:\n{content}"
-                
-                report_files[tool_name] = content
-                logger.info(f"Found report for tool: {tool_name}")
+    # sqlmap output trees, XSStrike and jwt_tool logs: read lazily and compacted
+    source = ingest.S3Source(s3, state['input_bucket'], state['input_key_prefix'], objects)
+    for tool_name, result in ingest_reports(source).items():
+        report_files[tool_name] = store_payload(format_ingested(result))
     
     state['report_files'] = report_files
     return state
 
+def select_analysis_prompt(tool_name: str, is_json: bool) -> str:
+    """Map a tool report to its analysis prompt template name"""
+    if tool_name == "nmap":
+        return "lambda.analyze.nmap"
+    if tool_name in ("testssl", "trivy") and is_json:
+        return f"lambda.analyze.{tool_name}"
+    if tool_name == "ssrfmap":
+        return "lambda.analyze.ssrfmap"
+    # Generic prompt for other tools
+    return "lambda.analyze.generic"
+
+def report_data(content: str):
+    """Parsed JSON for JSON reports, the text otherwise"""
+    if content.startswith("JSON REPORT FORMAT:\n"):
+        return json.loads(content[len("JSON REPORT FORMAT:\n"):])
+    return content
+
+def risk_section(findings: List[model.Finding]) -> str:
+    """Risk assessment computed from the report's structured findings (reportkit.scoring)"""
+    if not findings:
+        return "Risk Assessment: not scored (no structured findings in this report)"
+    return scoring.format_assessment(scoring.assess(findings))
+
+def analyze_report(tool_name: str, content: str) -> str:
+    """Analyze one tool report with Gemini AI"""
+    logger.info(f"Analyzing report for {tool_name}")
+    
+    # Determine if this is a JSON or text report
+    is_json = content.startswith("JSON REPORT FORMAT:")
+    
+    # Findings explained on earlier scans are only referenced, not re-explained
+    data = report_data(content)
+    findings = knowledge_cache.extract_findings(data, default_component=tool_name)
+    known = knowledge.get_many(findings) if knowledge is not None else {}
+    
+    # Only the top-ranked findings go to the model; the rest are appended as a table
+    ranked = cveindex.rank_report(data, tool_name, cve_index)
+    data, top, rest = cveindex.condense(data, ranked, CVE_TOP_K)
+    if rest and is_json:
+        content = "JSON REPORT FORMAT:\n" + json.dumps(data, indent=2)
+    
+    # Pick the prompt template for the tool type
+    prompt_template = prompts.get_prompt(select_analysis_prompt(tool_name, is_json))
+    if not is_json:
+        # Repeated lines collapse into templates, so the whole text report fits the prompt
+        content = logmine.compact_text(content, prompt_template.max_input_chars)
+    prompt = prompt_template.render(tool_name=tool_name, report=content,
+                                    known_findings=knowledge_cache.format_known_findings(known.values()),
+                                    ranked_findings=cveindex.format_ranked(top, len(top) + len(rest)))
+    
+    try:
+        with tracer.span("llm.analyze", kind="llm", tool=tool_name,
+                         prompt=prompt_template.id, prompt_hash=prompt_template.prefix_hash) as span:
+            response = invoke_llm(prompt, prompt_template, "llm.summary", "create_pdf")
+            span.record_llm_response(response)
+            analysis, learned = knowledge_cache.split_knowledge_block(response.content)
+            if knowledge is not None:
+                knowledge.put_many(learned)
+            span.add(knowledge_hits=len(known), knowledge_misses=len(findings) - len(known),
+                     knowledge_learned=len(learned), ranked_findings=len(top), unranked_findings=len(rest))
+        logger.info(f"Successfully analyzed {tool_name} report ({len(known)} known findings reused)")
+        return (analysis + "\n\n" + risk_section(ranked) + cveindex.format_table(rest, start=len(top) + 1)
+                + knowledge_cache.format_reference(known.values()))
+    except Exception as e:
+        if current_plan is not None and deadline.timed_out(e):
+            raise deadline.OutOfTime(f"{tool_name} analysis timed out") from e
+        logger.error(f"Error analyzing {tool_name} report: {str(e)}")
+        return f"ERROR ANALYZING REPORT: {str(e)}\n\nPlease check the raw data for this tool."
+
+def compact_analysis(tool_name: str, content: str) -> str:
+    """Template summary of one report, used instead of the LLM when time runs short"""
+    data = report_data(content)
+    ranked = cveindex.rank_report(data, tool_name, cve_index)
+    lines = ["Compact summary: the LLM analysis was skipped to deliver the report in time.", ""]
+    if ranked:
+        counts = {}
+        for finding in ranked:
+            counts[finding.severity] = counts.get(finding.severity, 0) + 1
+        severities = sorted(counts, key=lambda severity: -scoring.SEVERITY_SCORES.get(severity, -1.0))
+        lines.append("Key Findings: " + ", ".join(f"{counts[severity]} {severity}" for severity in severities))
+    else:
+        lines.append("Report excerpt:")
+        lines.append(logmine.compact_text(content, COMPACT_EXCERPT_CHARS))
+    return "\n".join(lines) + "\n\n" + risk_section(ranked) + cveindex.format_table(ranked)
+
+def report_sample(value: Any) -> str:
+    """First bytes of a report, without loading or parsing the whole report"""
+    if not blobstore.is_ref(value):
+        return value[:PRIORITY_SAMPLE_BYTES]
+    if value.get('blob') is None:
+        with tracer.span("s3.get_object", kind="s3", key=value['key']) as span:
+            raw = s3.get_object(Bucket=value['bucket'], Key=value['key'],
+                                Range=f"bytes=0-{PRIORITY_SAMPLE_BYTES - 1}")['Body'].read()
+            span.add(bytes=len(raw))
+    else:
+        raw = blobs.get(value)[:PRIORITY_SAMPLE_BYTES]
+    return raw.decode('utf-8', 'replace')
+
+def tool_priority(tool_name: str, sample: str) -> float:
+    """Expected value of a full analysis: the worst severity mentioned in the report's first bytes"""
+    severities = {match.capitalize() for match in SEVERITY_WORDS.findall(sample)}
+    if not severities:
+        return UNSCORED_PRIORITY
+    worst = max(scoring.SEVERITY_SCORES[severity] for severity in severities)
+    return worst * scoring.TOOL_EXPOSURE.get(tool_name, 1.0)
+
+def invoke_llm(prompt: str, prompt_template: prompts.PromptTemplate, *then: str):
+    """Call Gemini, giving up in time to leave room for the ``then`` stages.
+    
+    langchain-google-genai 0.0.9 ignores per-call timeouts, so the call runs in
+    a worker thread and raises ``TimeoutError`` when its time is up. The thread
+    is abandoned, not joined; the invocation ends without waiting for it.
+    """
+    options = prompts.cache_options(prompt_template, "google")
+    timeout = current_plan.timeout_s(then) if current_plan is not None else None
+    if timeout is None:
+        return gemini.invoke(prompt, **options)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    try:
+        return executor.submit(gemini.invoke, prompt, **options).result(timeout=timeout)
+    except concurrent.futures.TimeoutError as e:
+        raise TimeoutError(f"LLM call exceeded {timeout:.0f} s") from e
+    finally:
+        executor.shutdown(wait=False)
+
+def planned(stage: str):
+    """Time a stage into the planner's cost history"""
+    return current_plan.timed(stage) if current_plan is not None else contextlib.nullcontext()
+
+def fits(stage: str, *then: str) -> bool:
+    """Whether the plan leaves time for ``stage`` and the stages after it"""
+    return current_plan is None or current_plan.fits(stage, then)
+
+def degrade(state: State, section: str, reason: str):
+    logger.warning(f"Degrading {section} to meet the deadline: {reason}")
+    state['degraded'] = dict(state.get('degraded') or {}, **{section: reason})
+
+def analyze_in_time(state: State, tool_name: str, content: str) -> str:
+    """LLM analysis of a report if it still fits before summary and PDF, else a compact summary"""
+    if not fits("llm.analyze", "llm.summary", "create_pdf"):
+        degrade(state, f"{tool_name} analysis", "compact summary without LLM analysis")
+        return compact_analysis(tool_name, content)
+    try:
+        with planned("llm.analyze"):
+            return analyze_report(tool_name, content)
+    except deadline.OutOfTime as e:
+        degrade(state, f"{tool_name} analysis", "compact summary: the LLM call ran out of time")
+        logger.warning(str(e))
+        return compact_analysis(tool_name, content)
+
+def timed_pdf(state: State) -> State:
+    with planned("create_pdf"):
+        return create_pdf(state)
+
+@tracer.traced("analyze_reports", kind="node")
 def analyze_reports(state: State) -> State:
     """Analyze each report with Gemini AI"""
     logger.info(f"Analyzing {len(state['report_files'])} reports")
     
-    analysis = {}
-    
-    for tool_name, content in state['report_files'].items():
-        logger.info(f"Analyzing report for {tool_name}")
-        
-        # Determine if this is a JSON or text report
-        is_json = content.startswith("JSON REPORT FORMAT:")
-        
-        # Customize prompt based on the tool type
-        if tool_name == "nmap":
-            prompt = f"""
-            You are a cybersecurity expert analyzing an Nmap scan report.
-            Please analyze the following Nmap output and extract key findings about discovered hosts, 
-            open ports, services, and potential vulnerabilities.
-            
-            REPORT:
-            {content[:8000]}  # Increased limit for Nmap reports which can be verbose
-            
-            Provide a detailed analysis in the following format:
-            1. Key Findings: (list major discoveries like number of hosts, critical open ports)
-            2. Open Ports and Services: (list with service versions if available)
-            3. Potential Vulnerabilities: (based on open services and versions)
-            4. Security Recommendations: (actionable steps to address findings)
-            5. Risk Assessment: (overall risk evaluation)
-            """
-        elif tool_name == "testssl" and is_json:
-            prompt = f"""
-            You are a cybersecurity expert analyzing a testssl.sh SSL/TLS scan report.
-            Please analyze the following JSON output and extract key findings about SSL/TLS configuration,
-            certificate issues, supported protocols, and vulnerabilities like Heartbleed, POODLE, etc.
-            
-            REPORT:
-            {content[:8000]}
-            
-            Provide a detailed analysis in the following format:
-            1. Key Findings: (certificate issues, protocol weaknesses)
-            2. SSL/TLS Protocol Issues: (list insecure protocols enabled)
-            3. Cipher Vulnerabilities: (weak ciphers, insecure configurations)
-            4. Certificate Analysis: (validity, trust chain issues)
-            5. Security Recommendations: (specific configuration changes needed)
-            6. Risk Assessment: (overall SSL/TLS security posture)
-            """
-        elif tool_name == "trivy" and is_json:
-            prompt = f"""
-            You are a cybersecurity expert analyzing a Trivy vulnerability scanner report.
-            Please analyze the following JSON output and extract key findings about container/system vulnerabilities,
-            focusing on severity levels, vulnerable packages, and available fixes.
-            
-            REPORT:
-            {content[:8000]}
-            
-            Provide a detailed analysis in the following format:
-            1. Key Findings: (critical and high severity vulnerabilities)
-            2. Vulnerability Breakdown: (count by severity level)
-            3. Critical Vulnerabilities: (list most severe with CVE IDs)
-            4. Affected Components: (key packages/libraries requiring updates)
-            5. Remediation Actions: (specific update recommendations)
-            6. Risk Assessment: (overall security posture based on findings)
-            """
-        elif tool_name == "ssfrmap":
-            prompt = f"""
-            You are a cybersecurity expert analyzing an SSRF vulnerability scan report.
-            Please analyze the following output and extract key findings about Server-Side Request Forgery
-            vulnerabilities, potentially exploitable endpoints, and security implications.
-            
-            REPORT:
-            {content[:6000]}
-            
-            Provide a detailed analysis in the following format:
-            1. Key Findings: (list discovered SSRF vulnerabilities)
-            2. Vulnerable Endpoints: (list with vulnerability details)
-            3. Potential Impact: (what could be exploited via these SSRF issues)
-            4. Recommendations: (how to fix or mitigate these vulnerabilities)
-            5. Risk Assessment: (overall risk of SSRF in the application)
-            """
-        else:
-            # Generic prompt for other tools
-            prompt = f"""
-            You are a cybersecurity expert analyzing a security scan report from {tool_name}.
-            Please analyze the following output and extract key findings, vulnerabilities, 
-            and recommendations. Focus on severity levels, actionable insights, and potential risks.
-            
-            REPORT:
-            {content[:6000]}  # Limiting characters to ensure it fits in context window
-            
-            Provide a detailed analysis in the following format:
-            1. Key Findings: (list major discoveries)
-            2. Vulnerabilities Identified: (list with severity)
-            3. Recommendations: (actionable steps)
-            4. Risk Assessment: (overall risk evaluation)
-            """
-        
-        try:
-            response = gemini.invoke(prompt)
-            analysis[tool_name] = response.content
-            logger.info(f"Successfully analyzed {tool_name} report")
-        except Exception as e:
-            logger.error(f"Error analyzing {tool_name} report: {str(e)}")
-            analysis[tool_name] = f"ERROR ANALYZING REPORT: {str(e)}\n\nPlease check the raw data for this tool."
-    
+    # Analyses restored from a checkpoint aren't paid for again
+    analysis = dict(state.get('analysis') or {})
     state['analysis'] = analysis
+    for tool_name in analysis:
+        logger.info(f"Reusing checkpointed analysis for {tool_name}")
+    pending = [tool_name for tool_name in state['report_files'] if tool_name not in analysis]
+    
+    # Highest-risk tools first, so a tight deadline only shortens the least valuable analyses
+    if current_plan is not None:
+        pending = current_plan.order({tool_name: tool_priority(tool_name, report_sample(state['report_files'][tool_name]))
+                                      for tool_name in pending})
+    
+    for tool_name in pending:
+        if current_run is not None:
+            current_run.ensure_time(state, f"analyze:{tool_name}")
+        # In reference mode only one report is resident at a time
+        text = analyze_in_time(state, tool_name, load_payload(state['report_files'][tool_name]))
+        analysis[tool_name] = store_payload(text)
+        if current_run is not None:
+            # Each analysis is written once; the state record only lists it
+            current_run.save_part(f"analysis/{tool_name}", text)
+            current_run.save(state)
+    
     return state
 
+def compact_summary(state: State, note: str) -> str:
+    """Summary assembled from the start of each tool analysis, without the LLM"""
+    tool_summaries = []
+    for tool, analysis in state['analysis'].items():
+        # Get first few lines of each analysis, plus its computed risk
+        lines = load_payload(analysis).split('\n')
+        short_summary = '\n'.join(lines[:5]) + '...'
+        risk = next((line for line in lines if line.startswith("Risk Assessment (computed")), None)
+        if risk and risk not in lines[:5]:
+            short_summary += f"\n{risk}"
+        tool_summaries.append(f"## {tool} Summary\n{short_summary}")
+    
+    return "# Security Analysis Summary\n\n" + note + "\n\n" + "\n\n".join(tool_summaries)
+
+@tracer.traced("generate_summary", kind="node")
 def generate_summary(state: State) -> State:
     """Generate an overall summary of all findings"""
     logger.info("Generating comprehensive summary")
@@ -203,45 +428,34 @@ def generate_summary(state: State) -> State:
     tool_list = ", ".join(tool_names)
     
     combined_analysis = "\n\n".join([
-        f"=== {tool_name} ANALYSIS ===\n{analysis}" 
+        f"=== {tool_name} ANALYSIS ===\n{load_payload(analysis)}" 
         for tool_name, analysis in state['analysis'].items()
     ])
     
-    prompt = f"""
-    You are a cybersecurity expert creating an executive summary of multiple security scan reports.
-    The following analyses were generated from these tools: {tool_list}.
-    
-    Review the following analyses and create a comprehensive summary.
-    
-    {combined_analysis}
+    prompt_template = prompts.get_prompt("lambda.summary")
+    prompt = prompt_template.render(tool_list=tool_list, combined_analysis=combined_analysis)
     
-    Please provide:
-    1. Executive Summary: Brief overview of the security posture
-    2. Critical Findings: The most important discoveries across all tools
-    3. Risk Analysis: Overall risk level and potential impact
-    4. Consolidated Recommendations: Prioritized list of actions
-    5. Tool-specific Insights: Brief summary of what each tool revealed
-    
-    Format this as a professional security report suitable for executives and technical teams.
-    """
+    # The PDF must still fit after the summary
+    if not fits("llm.summary", "create_pdf"):
+        degrade(state, "Executive summary", "assembled from the tool analyses without LLM summary")
+        state['summary'] = compact_summary(
+            state, "Comprehensive summary skipped to deliver the report in time. Please review individual tool analyses.")
+        return state
     
     try:
-        response = gemini.invoke(prompt)
+        with planned("llm.summary"), tracer.span("llm.summary", kind="llm", prompt=prompt_template.id,
+                                                 prompt_hash=prompt_template.prefix_hash) as span:
+            response = invoke_llm(prompt, prompt_template, "create_pdf")
+            span.record_llm_response(response)
         state['summary'] = response.content
         logger.info("Successfully generated summary")
     except Exception as e:
+        if current_plan is not None and deadline.timed_out(e):
+            degrade(state, "Executive summary", "assembled from the tool analyses: the LLM call ran out of time")
         logger.error(f"Error generating summary: {str(e)}")
         # Create basic summary in case of error
-        tool_summaries = []
-        for tool, analysis in state['analysis'].items():
-            # Get first few lines of each analysis
-            lines = analysis.split('\n')
-            short_summary = '\n'.join(lines[:5]) + '...'
-            tool_summaries.append(f"## {tool} Summary\n{short_summary}")
-        
-        state['summary'] = "# Security Analysis Summary\n\n" + \
-                          "Error generating comprehensive summary. Please review individual tool analyses.\n\n" + \
-                          "\n\n".join(tool_summaries)
+        state['summary'] = compact_summary(
+            state, "Error generating comprehensive summary. Please review individual tool analyses.")
     
     return state
 
@@ -288,6 +502,7 @@ def safe_multi_cell(pdf, w, h, txt, border=0, align='J', fill=False):
                     continue
             pdf.ln(h)
 
+@tracer.traced("create_pdf", kind="node")
 def create_pdf(state: State) -> State:
     """Create a PDF report"""
     logger.info("Creating PDF report")
@@ -321,8 +536,14 @@ def create_pdf(state: State) -> State:
     # Add summary content
     pdf.set_font("Arial", "", 11)
     
+    # Sections shortened to meet the deadline are listed right after the summary
+    summary = state['summary']
+    degraded = deadline.format_degraded(state.get('degraded') or {})
+    if degraded:
+        summary += "\n\n" + degraded
+    
     # Break the summary into lines and add to PDF
-    summary_lines = state['summary'].split('\n')
+    summary_lines = summary.split('\n')
     for line in summary_lines:
         if line.strip():
             # Check if line is a header
@@ -353,7 +574,7 @@ def create_pdf(state: State) -> State:
         pdf.ln(3)
         
         pdf.set_font("Arial", "", 11)
-        analysis_lines = analysis.split('\n')
+        analysis_lines = load_payload(analysis).split('\n')
         for line in analysis_lines:
             if line.strip():
                 if line.startswith('#') or line.startswith('==='):
@@ -374,7 +595,9 @@ def create_pdf(state: State) -> State:
     with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
         temp_path = tmp.name
         try:
-            pdf.output(temp_path)
+            with tracer.span("render.pdf", kind="render") as span:
+                pdf.output(temp_path)
+                span.add(bytes=os.path.getsize(temp_path))
         except Exception as e:
             logger.error(f"Error generating PDF: {str(e)}")
             # Create a simple error report instead
@@ -393,12 +616,14 @@ def create_pdf(state: State) -> State:
     
     # Upload PDF to output bucket
     try:
-        s3.upload_file(
-            temp_path,
-            OUTPUT_BUCKET,
-            state['output_key'],
-            ExtraArgs={'ContentType': 'application/pdf'}
-        )
+        with tracer.span("s3.upload_file", kind="s3", key=state['output_key']) as span:
+            span.add(bytes=os.path.getsize(temp_path))
+            s3.upload_file(
+                temp_path,
+                OUTPUT_BUCKET,
+                state['output_key'],
+                ExtraArgs={'ContentType': 'application/pdf'}
+            )
         logger.info(f"PDF report uploaded to {OUTPUT_BUCKET}/{state['output_key']}")
     finally:
         # Clean up temp file
@@ -407,16 +632,48 @@ def create_pdf(state: State) -> State:
     
     return state
 
+# Node -> step whose completion lets a resumed run skip it. Fetched reports aren't
+# checkpointed (they stay in the scan prefix), so fetching is redone until analysis is done.
+RESUME_AFTER = {
+    "fetch_reports": "analyze_reports",
+    "analyze_reports": "analyze_reports",
+    "generate_summary": "generate_summary",
+    "create_pdf": "create_pdf",
+}
+
+def checkpointed(name: str, node):
+    """Skip a node completed by an earlier invocation; checkpoint after it runs"""
+    def run_node(state: State) -> State:
+        if current_run is None:
+            return node(state)
+        if current_run.done(RESUME_AFTER[name]):
+            logger.info(f"Skipping {name}: completed before resume")
+            return state
+        current_run.ensure_time(state, name)
+        state = node(state)
+        current_run.save(state, name)
+        return state
+    return run_node
+
+def checkpoint_snapshot(state: State) -> Dict:
+    """What a checkpoint record holds: everything but reports and analyses (saved once each as parts)"""
+    return {key: value for key, value in state.items() if key not in ('report_files', 'analysis')}
+
+def restore_analyses(run: checkpoint.Run) -> Dict[str, Any]:
+    """Analyses a resumed run already paid for, from the checkpoint's parts"""
+    return {name.split('/', 1)[1]: store_payload(run.load_part(name))
+            for name in run.parts if name.startswith("analysis/")}
+
 # Define the LangGraph
 def build_graph():
     """Build the LangGraph workflow"""
     graph = StateGraph(State)
     
     # Add nodes
-    graph.add_node("fetch_reports", fetch_reports)
-    graph.add_node("analyze_reports", analyze_reports)
-    graph.add_node("generate_summary", generate_summary)
-    graph.add_node("create_pdf", create_pdf)
+    graph.add_node("fetch_reports", checkpointed("fetch_reports", fetch_reports))
+    graph.add_node("analyze_reports", checkpointed("analyze_reports", analyze_reports))
+    graph.add_node("generate_summary", checkpointed("generate_summary", generate_summary))
+    graph.add_node("create_pdf", checkpointed("create_pdf", timed_pdf))
     
     # Connect nodes in sequence
     graph.add_edge("fetch_reports", "analyze_reports")
@@ -429,13 +686,285 @@ def build_graph():
     
     return graph
 
+def build_finalize_graph():
+    """Build the tail of the workflow for scans whose reports were analyzed on arrival"""
+    graph = StateGraph(State)
+    
+    graph.add_node("generate_summary", generate_summary)
+    graph.add_node("create_pdf", timed_pdf)
+    
+    graph.add_edge("generate_summary", "create_pdf")
+    graph.add_edge("create_pdf", END)
+    
+    graph.set_entry_point("generate_summary")
+    
+    return graph
+
+def run_pipeline(input_bucket: str, timestamp_folder: str, context=None, resume_run: Optional[str] = None) -> Dict:
+    """Run the full workflow for one scan folder
+
+    ``resume_run`` continues a suspended run from its checkpoint; without it the
+    run starts fresh, whatever checkpoint other runs left for the folder.
+    """
+    global current_run, current_plan
+    logger.info(f"Processing reports in {input_bucket}/{timestamp_folder}")
+    
+    # Initialize state
+    initial_state = {
+        "input_bucket": input_bucket,
+        "input_key_prefix": timestamp_folder,
+        "report_files": {},
+        "analysis": {},
+        "summary": "",
+        "output_key": "",
+        "degraded": {}
+    }
+    
+    # By default a tight deadline shortens sections; suspending and re-invoking is opt-in
+    remaining_ms = getattr(context, 'get_remaining_time_in_millis', None)
+    current_plan = deadline.configure(remaining_ms)
+    run_id = resume_run or getattr(context, 'aws_request_id', None) or uuid.uuid4().hex
+    current_run = checkpoint.Run(checkpoint.configure(s3), input_bucket, timestamp_folder, run_id,
+                                 snapshot=checkpoint_snapshot,
+                                 remaining_ms=remaining_ms if deadline.policy() == "suspend" else None,
+                                 reserve_ms=checkpoint.reserve_ms())
+    if resume_run:
+        initial_state = current_run.resume(initial_state)
+        if current_run.resumed:
+            initial_state['analysis'] = restore_analyses(current_run)
+            logger.info(f"Resuming after {', '.join(current_run.completed) or 'no completed steps'}")
+        else:
+            logger.warning(f"No checkpoint of run {resume_run} in {timestamp_folder}; starting over")
+    
+    # Build and run graph
+    graph = build_graph()
+    workflow = graph.compile()
+    with tracer.span("pipeline", kind="invocation", prefix=timestamp_folder) as span:
+        span.set(resumed=current_run.resumed)
+        try:
+            result = workflow.invoke(initial_state)
+        except checkpoint.Suspend as e:
+            logger.warning(f"Out of time before {e.step}; re-invoking to continue")
+            span.set(suspended_at=e.step)
+            reinvoke(context, input_bucket, timestamp_folder, run_id)
+            return {"timestamp_folder": timestamp_folder, "suspended_at": e.step}
+        finally:
+            release_blobs(span)
+            span.add(checkpoints=current_run.saves)
+            run, current_run = current_run, None
+            finish_plan()
+        span.set(degraded=sorted(result.get("degraded") or {}))
+        run.finish()
+    return {
+        "timestamp_folder": timestamp_folder,
+        "output_key": result["output_key"],
+        "degraded": sorted(result.get("degraded") or {}),
+        "peak_memory_mb": round(instrumentation.max_rss_mb(), 1)
+    }
+
+def finish_plan():
+    """Persist the invocation's stage costs for the next planner"""
+    global current_plan
+    plan, current_plan = current_plan, None
+    if plan is not None:
+        try:
+            plan.finish()
+        except OSError as e:
+            logger.warning(f"Could not save stage cost history: {str(e)}")
+
+def reinvoke(context, input_bucket: str, timestamp_folder: str, run_id: str):
+    """Queue an asynchronous invocation of this function that resumes the run"""
+    boto3.client('lambda').invoke(
+        FunctionName=context.invoked_function_arn,
+        InvocationType='Event',
+        Payload=json.dumps({"resume": {"bucket": input_bucket, "prefix": timestamp_folder,
+                                       "run_id": run_id}}).encode('utf-8')
+    )
+
+def release_blobs(span):
+    """Record blob cache peak and spill volume, then drop the invocation's blobs"""
+    if blobs is None:
+        return
+    stats = blobs.stats()
+    span.add(blob_peak_memory_bytes=stats['peak_memory_bytes'], blob_spill_bytes=stats['spill_bytes'])
+    span.set(blob_spills=stats['spills'], blob_fetches=stats['fetches'])
+    logger.info(f"Blob store: peak {stats['peak_memory_bytes']} bytes in memory, "
+                f"{stats['spill_bytes']} bytes spilled to disk")
+    blobs.clear()
+
+# Streaming pipeline: analyses are persisted per tool under <prefix>/analysis/
+
+def analysis_key(prefix: str, tool_name: str) -> str:
+    return f"{prefix}/analysis/{tool_name}.json"
+
+def s3_error_code(error: Exception) -> str:
+    return getattr(error, 'response', {}).get('Error', {}).get('Code', '')
+
+def object_exists(bucket: str, key: str) -> bool:
+    try:
+        s3.head_object(Bucket=bucket, Key=key)
+        return True
+    except Exception as e:
+        if s3_error_code(e) in ('404', 'NoSuchKey', 'NotFound'):
+            return False
+        raise
+
+def analyze_streamed_report(bucket: str, key: str) -> str:
+    """Analyze a single report as soon as it lands and persist the result"""
+    key_parts = key.split('/')
+    tool_name = key_parts[-2]
+    prefix = '/'.join(key_parts[:-2])
+    output_key = analysis_key(prefix, tool_name)
+    
+    # S3 delivers events at least once; don't pay for a second analysis
+    if object_exists(bucket, output_key):
+        logger.info(f"Analysis for {tool_name} already stored, skipping")
+        return tool_name
+    
+    with tracer.span("stream.analyze", kind="stage", tool=tool_name, prefix=prefix):
+        analysis = analyze_report(tool_name, read_report(bucket, key))
+        s3.put_object(
+            Bucket=bucket,
+            Key=output_key,
+            Body=json.dumps(model.ToolResult(
+                tool=tool_name,
+                status="error" if analysis.startswith("ERROR ANALYZING REPORT") else "ok",
+                report_key=key,
+                analysis=analysis,
+                analyzed_at=datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+            ).to_dict()).encode('utf-8'),
+            ContentType='application/json'
+        )
+    logger.info(f"Stored analysis for {tool_name} at {bucket}/{output_key}")
+    return tool_name
+
+def finalize_if_complete(bucket: str, prefix: str, context=None) -> str:
+    """Run summary and PDF once the manifest is in and every report is analyzed.
+    
+    Returns the PDF key, or an empty string if the scan isn't complete yet or
+    another invocation is already finalizing it.
+    """
+    objects = list_objects(bucket, prefix + '/')
+    keys = [item['Key'] for item in objects]
+    # Bundled scans are processed whole when the bundle event arrives
+    if f"{prefix}/{MANIFEST_NAME}" not in keys or f"{prefix}/{bundle.BUNDLE_NAME}" in keys:
+        return ""
+    
+    # Tools with ingest readers are analyzed here, once their whole output is in
+    expected = {key.split('/')[-2] for key in keys if is_plain_report_key(key)}
+    analyzed = {key.split('/')[-1][:-len('.json')] for key in keys
+                if key.startswith(f"{prefix}/analysis/") and key.endswith('.json')}
+    missing = expected - analyzed
+    if missing:
+        logger.info(f"Waiting for analyses of {', '.join(sorted(missing))}")
+        return ""
+    
+    # Conditional put: exactly one invocation wins the right to finalize
+    lock_key = f"{prefix}/analysis/_finalize.lock"
+    try:
+        s3.put_object(Bucket=bucket, Key=lock_key, Body=b"", IfNoneMatch="*")
+    except Exception as e:
+        if s3_error_code(e) in ('PreconditionFailed', 'ConditionalRequestConflict'):
+            logger.info(f"Scan {prefix} is already being finalized")
+            return ""
+        raise
+    
+    global current_plan
+    current_plan = deadline.configure(getattr(context, 'get_remaining_time_in_millis', None))
+    try:
+        state = {
+            "input_bucket": bucket,
+            "input_key_prefix": prefix,
+            "report_files": {},
+            "analysis": {},
+            "summary": "",
+            "output_key": "",
+            "degraded": {}
+        }
+        for tool_name in sorted(expected):
+            response = s3.get_object(Bucket=bucket, Key=analysis_key(prefix, tool_name))
+            result = model.ToolResult.from_dict(json.loads(response['Body'].read()))
+            state['analysis'][tool_name] = store_payload(result.analysis or "")
+        
+        workflow = build_finalize_graph().compile()
+        with tracer.span("pipeline", kind="invocation", prefix=prefix, mode="streaming") as span:
+            try:
+                for tool_name, ingested in ingest_reports(ingest.S3Source(s3, bucket, prefix, objects)).items():
+                    state['analysis'][tool_name] = store_payload(
+                        analyze_in_time(state, tool_name, format_ingested(ingested)))
+                result = workflow.invoke(state)
+            finally:
+                release_blobs(span)
+        return result["output_key"]
+    except Exception:
+        # Release the lock so a retried event can finalize
+        s3.delete_object(Bucket=bucket, Key=lock_key)
+        raise
+    finally:
+        finish_plan()
+
+def handle_streaming_records(records: List[Dict], context=None) -> List[Dict]:
+    """Analyze arriving reports and finalize scans whose manifest is complete"""
+    results = []
+    for record in records:
+        if record.get('eventSource') != 'aws:s3':
+            continue
+        bucket = record['s3']['bucket']['name']
+        key_parts = record['s3']['object']['key'].split('/')
+        
+        if key_parts[-1] in ['report.txt', 'report.json'] and not ingest.has_reader(key_parts[-2]):
+            prefix = '/'.join(key_parts[:-2])
+            result = {"timestamp_folder": prefix,
+                      "tool": analyze_streamed_report(bucket, '/'.join(key_parts))}
+        elif key_parts[-1] == MANIFEST_NAME:
+            prefix = '/'.join(key_parts[:-1])
+            result = {"timestamp_folder": prefix}
+        elif key_parts[-1] == bundle.BUNDLE_NAME:
+            # A bundle already holds the whole scan: nothing to overlap with
+            results.append(run_pipeline(bucket, '/'.join(key_parts[:-1]), context))
+            continue
+        else:
+            continue
+        
+        output_key = finalize_if_complete(bucket, prefix, context)
+        if output_key:
+            result["output_key"] = output_key
+        results.append(result)
+    return results
+
 # Lambda handler function
 def lambda_handler(event, context):
+    tracer.new_trace(getattr(context, 'aws_request_id', None))
     logger.info("Lambda function invoked")
     logger.info(f"Event: {json.dumps(event)}")
     
     try:
+        # Continuation queued by an invocation that ran low on time
+        if 'resume' in event:
+            resume = event['resume']
+            result = run_pipeline(resume['bucket'], resume['prefix'], context,
+                                  resume_run=resume.get('run_id') or 'unknown')
+            return {
+                "statusCode": 200,
+                "body": json.dumps({
+                    "message": "Resumed security report generation",
+                    "output_bucket": OUTPUT_BUCKET,
+                    "results": [result]
+                })
+            }
+        
         # Process S3 event - assuming S3 trigger
+        if 'Records' in event and len(event['Records']) > 0 and PIPELINE_MODE == 'streaming':
+            results = handle_streaming_records(event['Records'], context)
+            return {
+                "statusCode": 200,
+                "body": json.dumps({
+                    "message": f"Processed {len(results)} scan events in streaming mode",
+                    "output_bucket": OUTPUT_BUCKET,
+                    "results": results
+                })
+            }
+        
         if 'Records' in event and len(event['Records']) > 0:
             # Extract unique timestamp folders from all records
             timestamp_folders = set()
@@ -448,34 +977,15 @@ def lambda_handler(event, context):
                     
                     # Get folder path 
                     key_parts = object_key.split('/')
-                    if key_parts[-1] in ['report.txt', 'report.json']:
-                        # Go one level up to get the timestamp folder
-                        timestamp_folder = '/'.join(key_parts[:-2])
-                        timestamp_folders.add((input_bucket, timestamp_folder))
+                    # The manifest is uploaded last, after the reports or the bundle,
+                    # so the scan runs once when it's complete; report keys are ignored
+                    if key_parts[-1] == MANIFEST_NAME:
+                        timestamp_folders.add((input_bucket, '/'.join(key_parts[:-1])))
             
             # Process each unique timestamp folder (typically will be just one)
             results = []
             for input_bucket, timestamp_folder in timestamp_folders:
-                logger.info(f"Processing reports in {input_bucket}/{timestamp_folder}")
-                
-                # Initialize state
-                initial_state = {
-                    "input_bucket": input_bucket,
-                    "input_key_prefix": timestamp_folder,
-                    "report_files": {},
-                    "analysis": {},
-                    "summary": "",
-                    "output_key": ""
-                }
-                
-                # Build and run graph
-                graph = build_graph()
-                workflow = graph.compile()
-                result = workflow.invoke(initial_state)
-                results.append({
-                    "timestamp_folder": timestamp_folder,
-                    "output_key": result["output_key"]
-                })
+                results.append(run_pipeline(input_bucket, timestamp_folder, context))
             
             return {
                 "statusCode": 200,
@@ -1,18 +1,17 @@
 import os
 import json
 import argparse
-from typing import Dict, List, Any
+from typing import Annotated, Dict, List, Any, Tuple, TypedDict
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.pydantic_v1 import BaseModel, Field
-from langchain.agents import Tool
-from langchain.graphs import LangGraph
-from langchain.agents.agent_toolkits import create_react_agent
-from langchain.tools.render import render_text_description
-from langchain.tools import tool
+from reportkit import bundle, cveindex, ingest, instrumentation, knowledge_cache, logmine, model, prompts, scoring
 
-# Define output schemas for structured analysis
+# Set REPORT_METRICS_SINK=jsonl to record per-stage timings and token usage
+tracer = instrumentation.configure(service="security-analysis")
+
+# Output schemas for the LLM's format instructions; responses are decoded into reportkit.model
 class Vulnerability(BaseModel):
     id: str = Field(description="Unique identifier for the vulnerability")
     name: str = Field(description="Name of the vulnerability")
@@ -20,10 +19,11 @@ class Vulnerability(BaseModel):
     description: str = Field(description="Description of the vulnerability")
     affected_component: str = Field(description="Component affected by the vulnerability")
     remediation: str = Field(description="Recommended remediation steps")
+    tool: str = Field(description="Scanner that reported it (zap, sqlmap, nikto, nuclei, ...)")
 
 class SecurityReport(BaseModel):
     summary: str = Field(description="Executive summary of the security assessment")
-    risk_level: str = Field(description="Overall risk level (Critical, High, Medium, Low)")
+    # risk_level is computed by reportkit.scoring, not asked of the model
     vulnerabilities: List[Vulnerability] = Field(description="List of identified vulnerabilities")
     good_practices: List[str] = Field(description="Security good practices implemented")
     recommendations: List[str] = Field(description="Recommended security improvements")
@@ -43,11 +43,20 @@ class ReportGenerator:
             api_key=self.api_key
         )
         
-        # Set up output parser for structured output
+        # Only used for its format instructions; model.decode_llm_report validates the output
         self.output_parser = JsonOutputParser(pydantic_object=SecurityReport)
         
+        # Finding explanations shared across targets (KNOWLEDGE_CACHE_PATH=off disables)
+        self.knowledge = knowledge_cache.configure(
+            default_path=os.path.join(os.path.expanduser("~"), ".cache", "breachx", "knowledge.sqlite3")
+        )
+        
+        # Offline CVE metadata used to rank findings before prompting (CVE_INDEX_PATH=off disables)
+        self.cve_index = cveindex.configure()
+        
+    @tracer.traced("load_scan_results")
     def load_scan_results(self, scan_dir: str) -> Dict[str, Any]:
-        """Load all scan results from the specified directory."""
+        """Load all scan results from the specified directory or scan bundle."""
         results = {}
         
         # Map of expected files to their keys in the results dictionary
@@ -60,9 +69,13 @@ class ReportGenerator:
             "dependency-check-report.json": "dependencies"
         }
         
+        if os.path.isfile(scan_dir):
+            return self._load_bundle(scan_dir, file_mappings)
+        
         for filename, key in file_mappings.items():
             filepath = os.path.join(scan_dir, filename)
             if os.path.exists(filepath):
+                instrumentation.current_span().add(bytes=os.path.getsize(filepath))
                 try:
                     if filename.endswith(".json"):
                         with open(filepath, 'r') as f:
@@ -76,121 +89,353 @@ class ReportGenerator:
             else:
                 print(f"Warning: {filepath} not found")
                 results[key] = {"status": "not_found"}
+        
+        source = ingest.LocalSource(scan_dir)
+        self._ingest_outputs(source, results)
+        instrumentation.current_span().add(bytes=source.bytes_read)
                 
         return results
 
-    def generate_report(self, scan_results: Dict[str, Any], target_url: str) -> SecurityReport:
+    def _load_bundle(self, bundle_path: str, file_mappings: Dict[str, str]) -> Dict[str, Any]:
+        """Extract only the expected result files from a scan bundle."""
+        reader = bundle.BundleReader.from_file(bundle_path)
+        members = {os.path.basename(name): name for name in reader.names()}
+        wanted = [members[filename] for filename in file_mappings if filename in members]
+        data = reader.read_many(wanted)
+        
+        results = {}
+        for filename, key in file_mappings.items():
+            if filename not in members:
+                print(f"Warning: {filename} not found in {bundle_path}")
+                results[key] = {"status": "not_found"}
+                continue
+            raw = data[members[filename]]
+            try:
+                results[key] = json.loads(raw) if filename.endswith(".json") else raw.decode('utf-8')
+            except Exception as e:
+                print(f"Error loading {filename}: {e}")
+                results[key] = {"error": f"Failed to load: {str(e)}"}
+        
+        self._ingest_outputs(ingest.BundleSource(reader), results)
+        instrumentation.current_span().add(bytes=reader.bytes_read)
+        return results
+
+    def _ingest_outputs(self, source: ingest.Source, results: Dict[str, Any]):
+        """Add compacted results for tools the scanner writes as multi-file outputs.
+        
+        sqlmap's --output-dir tree stands in for a missing sqlmap-results.json;
+        XSStrike and jwt_tool results are added under their own keys.
+        """
+        for tool, result in ingest.ingest_all(source).items():
+            if results.get(tool, {"status": "not_found"}) == {"status": "not_found"}:
+                results[tool] = result.data
+
+    @tracer.traced("generate_report")
+    def generate_report(self, scan_results: Dict[str, Any], target_url: str) -> model.Report:
         """Generate a security report using the AI analysis engine."""
-        # Create a prompt template for the analysis
-        prompt = ChatPromptTemplate.from_template("""
-            You are an expert security analyst tasked with analyzing security scan results and providing actionable insights.
-            
-            Target URL: {target_url}
-            
-            Based on the following scan results, generate a comprehensive security report:
-            
-            ZAP Scan Results:
-            {zap_results}
-            
-            SQLMap Results:
-            {sqlmap_results}
-            
-            Nikto Scan Results:
-            {nikto_results}
-            
-            Nuclei Scan Results:
-            {nuclei_results}
-            
-            SSRFMap Results:
-            {ssrfmap_results}
-            
-            Dependency Check Results:
-            {dependency_results}
-            
-            Provide a structured analysis focusing on:
-            1. Executive summary
-            2. Overall risk assessment
-            3. Identified vulnerabilities with severity ratings
-            4. Security good practices already implemented
-            5. Recommendations for improvement
-            6. Detailed analysis of security issues
-            
-            Format your response as a JSON object with the following structure:
-            {format_instructions}
-        """)
+        # Static instructions (including the parser's format instructions) form the cacheable
+        # prefix; the scan results go last
+        prompt_template = prompts.get_prompt("analysis.report").with_static(
+            format_instructions=self.output_parser.get_format_instructions()
+        )
         
-        # Prepare the format instructions for the output parser
-        format_instructions = self.output_parser.get_format_instructions()
+        # Only the top-ranked findings of each tool go to the model; the rest are added to the report as-is
+        limit = cveindex.top_k()
+        condensed, ranked, unranked = {}, [], []
+        for tool, data in scan_results.items():
+            condensed[tool], top, rest = cveindex.condense(data, cveindex.rank_report(data, tool, self.cve_index),
+                                                           limit)
+            ranked.extend(top)
+            unranked.extend(rest)
         
         # Convert scan results to strings for the prompt
-        zap_results = json.dumps(scan_results.get("zap", {}), indent=2)
-        sqlmap_results = json.dumps(scan_results.get("sqlmap", {}), indent=2)
-        nikto_results = json.dumps(scan_results.get("nikto", {}), indent=2)
-        nuclei_results = json.dumps(scan_results.get("nuclei", {}), indent=2)
-        ssrfmap_results = scan_results.get("ssrfmap", "No SSRF results found")
-        dependency_results = json.dumps(scan_results.get("dependencies", {}), indent=2)
+        zap_results = json.dumps(condensed.get("zap", {}), indent=2)
+        sqlmap_results = json.dumps(condensed.get("sqlmap", {}), indent=2)
+        nikto_results = json.dumps(condensed.get("nikto", {}), indent=2)
+        nuclei_results = json.dumps(condensed.get("nuclei", {}), indent=2)
+        ssrfmap_results = condensed.get("ssrfmap", "No SSRF results found")
+        if not isinstance(ssrfmap_results, str):
+            # load_scan_results returns a status dict when the text report is missing
+            ssrfmap_results = json.dumps(ssrfmap_results, indent=2)
+        else:
+            # Repeated lines collapse into templates, so the whole text report fits the prompt
+            ssrfmap_results = logmine.compact_text(ssrfmap_results, prompt_template.max_input_chars)
+        dependency_results = json.dumps(condensed.get("dependencies", {}), indent=2)
+        other_results = {tool: data for tool, data in condensed.items() if tool not in PROMPT_RESULT_KEYS}
+        other_results = json.dumps(other_results, indent=2) if other_results else "No other tool results."
         
-        # Prepare the prompt with scan results
-        chain = prompt | self.llm | self.output_parser
+        # Findings explained on earlier scans are filled in from the knowledge cache
+        findings = knowledge_cache.extract_findings(scan_results)
+        known = self.knowledge.get_many(findings) if self.knowledge is not None else {}
+        
+        # Prepare the prompt with scan results (each limited to avoid context length issues)
+        prompt = prompt_template.render(
+            known_findings=knowledge_cache.format_known_findings(known.values()),
+            ranked_findings=cveindex.format_ranked(cveindex.rank(ranked), len(ranked) + len(unranked)),
+            target_url=target_url,
+            zap_results=prompt_template.truncate(zap_results),
+            sqlmap_results=prompt_template.truncate(sqlmap_results),
+            nikto_results=prompt_template.truncate(nikto_results),
+            nuclei_results=prompt_template.truncate(nuclei_results),
+            ssrfmap_results=prompt_template.truncate(ssrfmap_results),
+            dependency_results=prompt_template.truncate(dependency_results),
+            other_results=prompt_template.truncate(other_results)
+        )
         
         # Generate the report
-        report = chain.invoke({
-            "target_url": target_url,
-            "zap_results": zap_results[:5000],  # Limit size to avoid context length issues
-            "sqlmap_results": sqlmap_results[:5000],
-            "nikto_results": nikto_results[:5000],
-            "nuclei_results": nuclei_results[:5000],
-            "ssrfmap_results": ssrfmap_results[:5000],
-            "dependency_results": dependency_results[:5000],
-            "format_instructions": format_instructions
-        })
+        with tracer.span("llm.generate_report", kind="llm",
+                         prompt=prompt_template.id, prompt_hash=prompt_template.prefix_hash) as span:
+            response = self.llm.invoke(prompt, **prompts.cache_options(prompt_template, "openai"))
+            span.record_llm_response(response)
+        
+        report = model.decode_llm_report(response.content)
+        report.target_url = target_url
+        self._apply_knowledge(report, known, findings)
+        
+        # Rank the model's findings the same way and append the ones it never saw
+        cveindex.enrich(report.vulnerabilities, self.cve_index)
+        for finding in unranked:
+            if finding.fixed_in and not finding.remediation:
+                finding.remediation = f"Upgrade to {finding.fixed_in}."
+        report.vulnerabilities = cveindex.rank(report.vulnerabilities) + cveindex.rank(unranked)
+        
+        # Risk level and category scores come from the structured findings, not the model
+        assessment = scoring.assess(report.vulnerabilities)
+        report.risk_level = assessment.risk_level
+        report.risk = assessment.to_dict()
         
         return report
 
-# LangGraph implementation for more sophisticated analysis
-def build_security_analysis_graph(api_key=None):
-    """Build a LangGraph for security analysis."""
+    def _apply_knowledge(self, report: model.Report, known: Dict[str, knowledge_cache.Knowledge],
+                         findings: Dict[str, Tuple[str, str]]):
+        """Fill in cached explanations for known findings and learn the new ones.
+        
+        Both sides are keyed on the scanner finding the vulnerability reports, so
+        learned entries are found again by the next scan's lookup.
+        """
+        learned, unexplained = [], []
+        for vulnerability in report.vulnerabilities:
+            key = knowledge_cache.match_finding(vulnerability.to_dict(), findings)
+            if "KNOWN" in (vulnerability.description, vulnerability.remediation):
+                entry = known.get(key) if key else None
+                if entry is None and key and self.knowledge is not None:
+                    entry = self.knowledge.get(key)
+                if entry:
+                    vulnerability.description = entry.description
+                    vulnerability.remediation = entry.remediation
+                else:
+                    unexplained.append((vulnerability, key))
+            elif vulnerability.description and vulnerability.remediation and key:
+                rule_id, component = findings.get(key) or key.split("|", 1)
+                learned.append(knowledge_cache.Knowledge(rule_id, component, vulnerability.description,
+                                                         vulnerability.remediation))
+        if unexplained:
+            explained = self._explain([vulnerability for vulnerability, _ in unexplained])
+            for vulnerability, key in unexplained:
+                if key and id(vulnerability) in explained:
+                    rule_id, component = findings.get(key) or key.split("|", 1)
+                    learned.append(knowledge_cache.Knowledge(rule_id, component, vulnerability.description,
+                                                             vulnerability.remediation))
+        if self.knowledge is not None:
+            self.knowledge.put_many(learned)
+        instrumentation.current_span().add(knowledge_hits=len(known), knowledge_learned=len(learned),
+                                           knowledge_reasked=len(unexplained))
+
+    def _explain(self, vulnerabilities: List[model.Finding]) -> set:
+        """Ask again for vulnerabilities the model marked KNOWN that the cache can't explain.
+        
+        Returns the ids (``id()``) of the vulnerabilities that got an explanation.
+        """
+        listing = "\n".join(f"- {v.id or v.name}: {v.name} ({v.affected_component or 'any'})" for v in vulnerabilities)
+        try:
+            with tracer.span("llm.explain", kind="llm") as span:
+                response = _ask(self.llm, "analysis.explain", vulnerabilities=listing)
+                span.record_llm_response(response)
+            _, entries = knowledge_cache.split_knowledge_block(response.content)
+        except Exception as e:
+            print(f"Warning: could not explain {len(vulnerabilities)} findings: {e}")
+            entries = []
+        by_rule = {entry.rule_id: entry for entry in entries}
+        explained = set()
+        for vulnerability in vulnerabilities:
+            entry = by_rule.get(knowledge_cache.normalize_rule(vulnerability.id or vulnerability.name))
+            if entry:
+                vulnerability.description, vulnerability.remediation = entry.description, entry.remediation
+                explained.add(id(vulnerability))
+            else:
+                # Never ship the KNOWN placeholder
+                vulnerability.description = vulnerability.name
+                vulnerability.remediation = "See the detailed analysis."
+        return explained
+
+# Scan result keys with their own section in the analysis.report prompt; anything else goes under "other"
+PROMPT_RESULT_KEYS = ("zap", "sqlmap", "nikto", "nuclei", "ssrfmap", "dependencies")
+
+# Tools covered by the detailed analysis; prompts live in reportkit.prompts as analysis.tool.<name>
+ANALYSIS_TOOLS = ("zap", "sqlmap", "nikto", "nuclei")
+
+ANALYSIS_MODES = ("graph", "agent")
+
+def tool_results(scan_results: Dict[str, Any], cve_index=None) -> Dict[str, str]:
+    """Per-tool inputs for the detailed analysis DAG.
+
+    Reports with more findings than CVE_TOP_K are condensed to their ranked top findings.
+    """
+    limit = cveindex.top_k()
+    inputs = {}
+    for tool_name in ANALYSIS_TOOLS:
+        data = scan_results.get(tool_name, {})
+        data, top, rest = cveindex.condense(data, cveindex.rank_report(data, tool_name, cve_index), limit)
+        ranked = cveindex.format_ranked(top, len(top) + len(rest)) if rest else ""
+        inputs[tool_name] = ranked + json.dumps(data, indent=2)
+    return inputs
+
+def _build_llm(api_key=None):
+    """Create the ChatOpenAI client used by the detailed analysis."""
     api_key = api_key or os.environ.get("OPENAI_API_KEY")
     
     if not api_key:
         raise ValueError("OpenAI API key not provided. Set OPENAI_API_KEY environment variable.")
     
-    llm = ChatOpenAI(
+    return ChatOpenAI(
         model="gpt-4",
         temperature=0,
         api_key=api_key
     )
+
+def _ask(llm, template_name: str, **variables):
+    """Invoke the LLM with a registry prompt and cache-friendly request options."""
+    prompt_template = prompts.get_prompt(template_name)
+    span = instrumentation.current_span()
+    if span is not None:
+        span.set(prompt=prompt_template.id, prompt_hash=prompt_template.prefix_hash)
+    return llm.invoke(prompt_template.render(**variables), **prompts.cache_options(prompt_template, "openai"))
+
+def _merge_dicts(left: Dict[str, str], right: Dict[str, str]) -> Dict[str, str]:
+    """Reducer for state keys written by parallel nodes."""
+    return {**left, **right}
+
+def _combine_analyses(tool_analyses: Dict[str, str]) -> str:
+    """Join per-tool analyses in a fixed tool order."""
+    return "\n\n".join(
+        f"=== {tool_name} ANALYSIS ===\n{tool_analyses[tool_name]}"
+        for tool_name in ANALYSIS_TOOLS if tool_name in tool_analyses
+    )
+
+class AnalysisState(TypedDict):
+    target_url: str
+    scan_results: Dict[str, str]                                  # Map of tool_name -> raw results text
+    findings: List[model.Finding]                                 # Structured findings, scored for the risk
+    tool_analyses: Annotated[Dict[str, str], _merge_dicts]        # Map of tool_name -> analysis
+    risk_assessment: str
+    recommendations: str
+    detailed_analysis: Dict[str, Any]
+
+def build_security_analysis_dag(api_key=None):
+    """Build a deterministic LangGraph for the detailed security analysis.
+    
+    The per-tool analyses run in parallel, then the recommendations run on their
+    combined output while the risk assessment is scored from the structured
+    findings (reportkit.scoring, no LLM call), and a final node merges the
+    results: two levels of parallel LLM calls instead of an agent loop.
+    """
+    from langgraph.graph import StateGraph, START, END
+    
+    llm = _build_llm(api_key)
+    
+    def invoke(template_name, span_name, **variables):
+        with tracer.span(span_name, kind="llm") as span:
+            response = _ask(llm, template_name, **variables)
+            span.record_llm_response(response)
+        return response.content
+    
+    def analyze_tool(tool_name):
+        def node(state: AnalysisState):
+            results = state["scan_results"].get(tool_name, "")
+            return {"tool_analyses": {
+                tool_name: invoke(f"analysis.tool.{tool_name}", f"llm.analyze.{tool_name}", results=results)
+            }}
+        return node
+    
+    def assess_overall_risk(state: AnalysisState):
+        with tracer.span("score.overall_risk"):
+            return {"risk_assessment": scoring.format_assessment(scoring.assess(state.get("findings") or []))}
+    
+    def generate_recommendations(state: AnalysisState):
+        return {"recommendations": invoke("analysis.recommendations", "llm.generate_recommendations",
+                                          analysis=_combine_analyses(state["tool_analyses"]))}
+    
+    def merge_analysis(state: AnalysisState):
+        return {"detailed_analysis": {
+            "target_url": state.get("target_url", ""),
+            "tool_analyses": state["tool_analyses"],
+            "risk_assessment": state["risk_assessment"],
+            "recommendations": state["recommendations"],
+        }}
+    
+    graph = StateGraph(AnalysisState)
+    
+    # Level 1: per-tool analyses fan out from the start
+    analysis_nodes = []
+    for tool_name in ANALYSIS_TOOLS:
+        node_name = f"analyze_{tool_name}_results"
+        graph.add_node(node_name, analyze_tool(tool_name))
+        graph.add_edge(START, node_name)
+        analysis_nodes.append(node_name)
+    
+    # Level 2: both wait for every tool analysis, then run concurrently
+    graph.add_node("assess_overall_risk", assess_overall_risk)
+    graph.add_node("generate_recommendations", generate_recommendations)
+    graph.add_edge(analysis_nodes, "assess_overall_risk")
+    graph.add_edge(analysis_nodes, "generate_recommendations")
+    
+    # Level 3: merge
+    graph.add_node("merge_analysis", merge_analysis)
+    graph.add_edge(["assess_overall_risk", "generate_recommendations"], "merge_analysis")
+    graph.add_edge("merge_analysis", END)
+    
+    return graph.compile()
+
+# LangGraph implementation for more sophisticated analysis
+def build_security_analysis_graph(api_key=None):
+    """Build a LangGraph for security analysis."""
+    from langchain.graphs import LangGraph
+    from langchain.agents.agent_toolkits import create_react_agent
+    from langchain.tools.render import render_text_description
+    from langchain.tools import tool
+    
+    llm = _build_llm(api_key)
     
     # Define tools for the graph
     @tool
     def analyze_zap_results(zap_results: str) -> str:
         """Analyze ZAP scan results and extract key vulnerabilities."""
-        return llm.invoke(f"Analyze these ZAP scan results and extract the most critical vulnerabilities:\n{zap_results[:3000]}")
+        return _ask(llm, "analysis.tool.zap", results=zap_results)
     
     @tool
     def analyze_sqlmap_results(sqlmap_results: str) -> str:
         """Analyze SQLMap results and determine SQL injection vulnerabilities."""
-        return llm.invoke(f"Analyze these SQLMap results and determine if there are SQL injection vulnerabilities:\n{sqlmap_results[:3000]}")
+        return _ask(llm, "analysis.tool.sqlmap", results=sqlmap_results)
     
     @tool
     def analyze_nikto_results(nikto_results: str) -> str:
         """Analyze Nikto results and extract key findings."""
-        return llm.invoke(f"Analyze these Nikto scan results and extract the most important findings:\n{nikto_results[:3000]}")
+        return _ask(llm, "analysis.tool.nikto", results=nikto_results)
     
     @tool
     def analyze_nuclei_results(nuclei_results: str) -> str:
         """Analyze Nuclei results and identify important vulnerabilities."""
-        return llm.invoke(f"Analyze these Nuclei scan results and identify the most important vulnerabilities:\n{nuclei_results[:3000]}")
+        return _ask(llm, "analysis.tool.nuclei", results=nuclei_results)
     
     @tool
     def generate_recommendations(analysis_results: str) -> str:
         """Generate security recommendations based on analysis results."""
-        return llm.invoke(f"Based on the following security analysis, generate specific recommendations for improvement:\n{analysis_results}")
+        return _ask(llm, "analysis.recommendations", analysis=analysis_results)
     
     @tool
     def assess_overall_risk(analysis_results: str) -> str:
         """Assess the overall security risk based on analysis results."""
-        return llm.invoke(f"Based on the following security analysis, assess the overall security risk level (Critical, High, Medium, Low) and provide justification:\n{analysis_results}")
+        return _ask(llm, "analysis.risk", analysis=analysis_results)
     
     # Create a list of tools
     tools = [
@@ -233,10 +478,13 @@ def build_security_analysis_graph(api_key=None):
 
 def main():
     parser = argparse.ArgumentParser(description="AI Security Analysis Engine")
-    parser.add_argument("--scan-dir", required=True, help="Directory containing security scan results")
+    parser.add_argument("--scan-dir", required=True, help="Directory or scan bundle containing security scan results")
     parser.add_argument("--target-url", required=True, help="Target URL that was scanned")
     parser.add_argument("--api-key", help="OpenAI API key")
-    parser.add_argument("--output", default="security-report.json", help="Output file for the security report")
+    parser.add_argument("--output", default="security-report.json",
+                        help="Output file for the security report (.ndjson for the compact interchange format)")
+    parser.add_argument("--analysis-mode", choices=ANALYSIS_MODES, default="graph",
+                        help="Detailed analysis as a parallel deterministic graph or a ReAct agent")
     
     args = parser.parse_args()
     
@@ -250,18 +498,37 @@ def main():
     report = report_generator.generate_report(scan_results, args.target_url)
     
     # Save the report to a file
-    with open(args.output, 'w') as f:
-        json.dump(report.dict(), f, indent=2)
+    model.save_report(report, args.output)
     
     print(f"Security report generated and saved to {args.output}")
     
     # Generate a more detailed analysis using LangGraph
-    print("Generating detailed analysis using LangGraph...")
-    graph = build_security_analysis_graph(api_key=args.api_key)
+    print(f"Generating detailed analysis using LangGraph ({args.analysis_mode} mode)...")
+    if args.analysis_mode == "graph":
+        graph = build_security_analysis_dag(api_key=args.api_key)
+        final_state = graph.invoke({
+            "target_url": args.target_url,
+            "scan_results": tool_results(scan_results, report_generator.cve_index),
+            "findings": report.vulnerabilities,
+            "tool_analyses": {},
+        })
+        graph_output = final_state["detailed_analysis"]
+    else:
+        graph_output = run_agent_analysis(scan_results, args.target_url, api_key=args.api_key)
+    
+    # Save the graph output to a file
+    with open("detailed-analysis.json", 'w') as f:
+        json.dump(graph_output, f, indent=2)
+    
+    print("Detailed analysis generated and saved to detailed-analysis.json")
+
+def run_agent_analysis(scan_results: Dict[str, Any], target_url: str, api_key=None):
+    """Run the detailed analysis through the ReAct agent graph."""
+    graph = build_security_analysis_graph(api_key=api_key)
     
     # Run the graph with the scan results
     graph_input = f"""
-    Target URL: {args.target_url}
+    Target URL: {target_url}
     
     Analyze the following security scan results:
     
@@ -271,13 +538,7 @@ def main():
     Nuclei Results: {json.dumps(scan_results.get('nuclei', {}), indent=2)[:1000]}
     """
     
-    graph_output = graph.invoke({"input": graph_input})
-    
-    # Save the graph output to a file
-    with open("detailed-analysis.json", 'w') as f:
-        json.dump(graph_output, f, indent=2)
-    
-    print("Detailed analysis generated and saved to detailed-analysis.json")
+    return graph.invoke({"input": graph_input})
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""Compare single-file and sharded HTML reports as the finding count grows.
+
+For each size, reports generation time, the size of the page the browser opens
+first (the whole file in single mode, the shell in sharded mode), and the total
+output size. In sharded mode the shell, and so the time to first paint, should
+stay flat while the shards grow with the findings.
+
+Usage:
+    python benchmarks/bench_html_modes.py --vulns 1000 10000 100000 --repeat 3
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pdf_backends import build_report
+from generator import ReportGenerator, HTML_MODES
+
+def tree_bytes(path):
+    """Size of a file, or of every file under a directory."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark single-file vs sharded HTML reports")
+    parser.add_argument("--vulns", type=int, nargs="+", default=[1000, 10000, 100000], help="Finding counts to render")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per mode and size")
+    parser.add_argument("--modes", nargs="+", choices=HTML_MODES, default=list(HTML_MODES))
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'vulns':>9}{'mean ms':>12}{'min ms':>12}{'first page KB':>16}{'total KB':>12}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for vuln_count in args.vulns:
+            report_path = os.path.join(workdir, f"report-{vuln_count}.json")
+            with open(report_path, 'w') as f:
+                json.dump(build_report(vuln_count), f)
+
+            for mode in args.modes:
+                output_dir = os.path.join(workdir, f"{mode}-{vuln_count}")
+                timings = []
+                for _ in range(args.repeat):
+                    generator = ReportGenerator(report_path, output_dir=output_dir)
+                    start = time.perf_counter()
+                    html_path = generator.generate_html_report(mode=mode)
+                    timings.append((time.perf_counter() - start) * 1000)
+                total = tree_bytes(os.path.dirname(html_path) if mode == "sharded" else html_path)
+                print(f"{mode:<10}{vuln_count:>9}{statistics.mean(timings):>12.1f}{min(timings):>12.1f}"
+                      f"{os.path.getsize(html_path) / 1024:>16.1f}{total / 1024:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Simulate the analysis job queue under nightly load and report queue wait per class.
+
+A nightly batch of scans lands at t=0, then interactive scans (including some
+with critical findings and a burst of rescans from one user) arrive over time.
+A fixed pool of workers serves them. The same arrivals are replayed through
+reportkit.jobqueue and through a plain FIFO to compare p95 time-to-start.
+Time is simulated, so the run takes seconds.
+
+Usage:
+    python benchmarks/bench_jobqueue.py --nightly 500 --interactive 100 --workers 4 --job-seconds 30
+"""
+import os
+import sys
+import heapq
+import random
+import argparse
+from collections import deque
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportkit import jobqueue
+
+def build_arrivals(nightly: int, interactive: int, burst: int, horizon: float, seed: int):
+    """(arrival time, user, repository, priority class, target) tuples, sorted by time."""
+    rng = random.Random(seed)
+    arrivals = [(0.0, f"nightly-{i % 50}", f"repo-n{i}", "nightly", f"https://n{i}.example") for i in range(nightly)]
+    for i in range(interactive):
+        priority = "critical" if rng.random() < 0.1 else "interactive"
+        arrivals.append((rng.uniform(0, horizon), f"user-{i % 20}", f"repo-u{i}", priority, f"https://u{i}.example"))
+    # One user re-triggering the same few targets over and over (deduplicated while pending)
+    for i in range(burst):
+        arrivals.append((rng.uniform(0, horizon / 10), "rescanner", f"repo-r{i % 5}", "interactive",
+                         f"https://r{i % 5}.example"))
+    return sorted(arrivals)
+
+def simulate(arrivals, workers: int, job_seconds: float, use_queue: bool, **limits):
+    """Discrete-event simulation; returns {priority class: [wait seconds]}."""
+    clock = [0.0]
+    queue = jobqueue.JobQueue(**limits) if use_queue else None
+    fifo = deque()
+    meta = {}
+    finishing = []  # heap of (finish time, job id)
+    free = workers
+    waits = {}
+    pending_arrivals = deque(arrivals)
+
+    with mock.patch.object(jobqueue.time, "time", lambda: clock[0]):
+        while pending_arrivals or finishing or (queue.pending() if queue else fifo):
+            next_arrival = pending_arrivals[0][0] if pending_arrivals else float("inf")
+            next_finish = finishing[0][0] if finishing else float("inf")
+            if next_arrival <= next_finish:
+                clock[0], user, repo, priority, target = pending_arrivals.popleft()
+                if queue:
+                    queued = queue.enqueue("analyze", {}, user_id=user, repository_id=repo,
+                                           target_url=target, priority_class=priority)
+                    if not queued["deduplicated"]:
+                        meta[queued["id"]] = (priority, clock[0])
+                else:
+                    job_id = len(meta)
+                    meta[job_id] = (priority, clock[0])
+                    fifo.append(job_id)
+            else:
+                clock[0], job_id = heapq.heappop(finishing)
+                if queue:
+                    queue.complete(job_id)
+                free += 1
+
+            # Start as many jobs as the pool and fair-share limits allow
+            while free:
+                if queue:
+                    claimed = queue.claim()
+                    job_id = claimed["id"] if claimed else None
+                else:
+                    job_id = fifo.popleft() if fifo else None
+                if job_id is None:
+                    break
+                priority, enqueued = meta[job_id]
+                waits.setdefault(priority, []).append(clock[0] - enqueued)
+                heapq.heappush(finishing, (clock[0] + job_seconds, job_id))
+                free -= 1
+    return waits
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate queue wait under nightly load")
+    parser.add_argument("--nightly", type=int, default=500)
+    parser.add_argument("--interactive", type=int, default=100)
+    parser.add_argument("--burst", type=int, default=200, help="Rescans triggered by one user")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--job-seconds", type=float, default=30.0)
+    parser.add_argument("--horizon", type=float, default=3600.0, help="Seconds over which interactive jobs arrive")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    arrivals = build_arrivals(args.nightly, args.interactive, args.burst, args.horizon, args.seed)
+    print(f"{len(arrivals)} arrivals, {args.workers} workers, {args.job_seconds:.0f}s per job\n")
+    print(f"{'scheduler':<12} {'class':<12} {'jobs':>6} {'p50 s':>10} {'p95 s':>10}")
+    for name, use_queue in (("fifo", False), ("jobqueue", True)):
+        waits = simulate(arrivals, args.workers, args.job_seconds, use_queue,
+                         max_running_per_user=2, max_running_per_repo=1)
+        for priority in jobqueue.PRIORITY_CLASSES:
+            values = waits.get(priority, [])
+            if values:
+                print(f"{name:<12} {priority:<12} {len(values):>6} {percentile(values, 0.5):>10.0f} "
+                      f"{percentile(values, 0.95):>10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Compare the typed report model with the dict + indented JSON path.
+
+For a synthetic report, measures encode and decode throughput (findings/s),
+the encoded size, and the retained memory of the decoded report. It compares
+the current dict + ``json.dumps(indent=2)`` path with reportkit.model (validated
+decode plus NDJSON interchange).
+
+Usage:
+    python benchmarks/bench_model.py --findings 100000 --repeat 3
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pdf_backends import build_report
+from reportkit import model
+
+def best_of(repeat, fn):
+    """Fastest wall time of ``repeat`` runs and the last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def retained_mb(fn):
+    """Memory still held by the object ``fn`` builds."""
+    tracemalloc.start()
+    result = fn()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current / 1024 ** 2
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark report model serialization")
+    parser.add_argument("--findings", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = build_report(args.findings)
+    report = model.Report.from_dict(data)
+    json_text = json.dumps(data, indent=2)
+    ndjson_text = model.dumps_ndjson(report)
+    n = args.findings
+
+    rows = [
+        ("dict+json", "encode", *best_of(args.repeat, lambda: json.dumps(data, indent=2))),
+        ("dict+json", "decode", *best_of(args.repeat, lambda: json.loads(json_text))),
+        # Legacy JSON into the typed model: what load_report does for .json files
+        ("json>model", "decode", *best_of(args.repeat, lambda: model.Report.from_dict(json.loads(json_text)))),
+        ("model", "validate", *best_of(args.repeat, lambda: model.decode_llm_report(json_text))),
+        ("model+ndjson", "encode", *best_of(args.repeat, lambda: model.dumps_ndjson(report))),
+        ("model+ndjson", "decode", *best_of(args.repeat, lambda: model.loads_ndjson(ndjson_text))),
+    ]
+
+    print(f"{n} findings\n")
+    print(f"{'path':<14} {'op':<9} {'ms':>9} {'findings/s':>12}")
+    for path, op, seconds, _ in rows:
+        print(f"{path:<14} {op:<9} {seconds * 1000:>9.1f} {n / seconds:>12,.0f}")
+
+    print(f"\n{'path':<14} {'encoded MB':>11} {'retained MB':>12}")
+    print(f"{'dict+json':<14} {len(json_text.encode()) / 1024 ** 2:>11.1f} "
+          f"{retained_mb(lambda: json.loads(json_text)):>12.1f}")
+    print(f"{'model+ndjson':<14} {len(ndjson_text.encode()) / 1024 ** 2:>11.1f} "
+          f"{retained_mb(lambda: model.loads_ndjson(ndjson_text)):>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Compare the generator.py PDF backends on render time and page count.
+
+Usage:
+    python benchmarks/bench_pdf_backends.py --vulns 10 100 1000 --repeat 3
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generator import ReportGenerator, PDF_BACKENDS
+
+SEVERITIES = ["Critical", "High", "Medium", "Low", "Info"]
+NAMES = ["SQL Injection", "Broken auth session", "Sensitive data exposure", "Reflected XSS", "Missing access control"]
+
+def build_report(vuln_count):
+    """Build a synthetic report in the analysis.py JSON shape."""
+    return {
+        "summary": "Synthetic security assessment used for PDF backend benchmarks. " * 4,
+        "risk_level": "High",
+        "vulnerabilities": [
+            {
+                "id": f"VULN-{i:05d}",
+                "name": f"{NAMES[i % len(NAMES)]} #{i}",
+                "severity": SEVERITIES[i % len(SEVERITIES)],
+                "description": "The application reflects untrusted input without validation. " * 3,
+                "affected_component": f"/api/v1/resource/{i}",
+                "remediation": "Validate and encode all user supplied input before use. " * 2,
+            }
+            for i in range(vuln_count)
+        ],
+        "good_practices": ["HTTPS enforced", "HSTS enabled", "Secure cookies"],
+        "recommendations": ["Patch outdated dependencies", "Add a WAF", "Rotate credentials"],
+        "detailed_analysis": "<p>Detailed analysis paragraph.</p>" * 20,
+    }
+
+def count_pdf_pages(pdf_path):
+    """Count pages by scanning the PDF page objects."""
+    with open(pdf_path, 'rb') as f:
+        return len(re.findall(rb'/Type\s*/Page(?!s)', f.read()))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generator.py PDF backends")
+    parser.add_argument("--vulns", type=int, nargs="+", default=[10, 100, 1000], help="Vulnerability counts to render")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per backend and size")
+    parser.add_argument("--backends", nargs="+", choices=PDF_BACKENDS, default=list(PDF_BACKENDS))
+    args = parser.parse_args()
+
+    print(f"{'backend':<12}{'vulns':>8}{'pages':>8}{'mean ms':>12}{'min ms':>12}")
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        for vuln_count in args.vulns:
+            report_path = os.path.join(workdir, f"report-{vuln_count}.json")
+            with open(report_path, 'w') as f:
+                json.dump(build_report(vuln_count), f)
+
+            for backend in args.backends:
+                timings = []
+                pages = 0
+                for _ in range(args.repeat):
+                    generator = ReportGenerator(report_path)
+                    start = time.perf_counter()
+                    try:
+                        pdf_path = generator.generate_pdf_report(backend=backend)
+                    except ImportError as e:
+                        print(f"{backend:<12}{vuln_count:>8}  skipped ({e})")
+                        break
+                    timings.append((time.perf_counter() - start) * 1000)
+                    pages = count_pdf_pages(pdf_path)
+                if timings:
+                    print(f"{backend:<12}{vuln_count:>8}{pages:>8}{statistics.mean(timings):>12.1f}{min(timings):>12.1f}")
+
+if __name__ == "__main__":
+    main()
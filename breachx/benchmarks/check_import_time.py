@@ -0,0 +1,83 @@
+"""Import-time regression check for generator.py.
+
+Runs Markdown-only and HTML-only generations in fresh interpreters and fails
+if they import heavy rendering modules or exceed the time budget.
+
+Usage:
+    python benchmarks/check_import_time.py --budget-ms 250
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+BREACHX_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules each format must not import
+FORBIDDEN_MODULES = {
+    "markdown": ["matplotlib", "numpy", "fpdf", "jinja2", "weasyprint", "markdown"],
+    "html": ["matplotlib", "numpy", "fpdf", "weasyprint", "markdown"],
+}
+
+PROBE = """
+import sys, json, time
+start = time.perf_counter()
+sys.path.insert(0, {breachx_dir!r})
+sys.argv = ["generator.py", "--report-json", {report!r}, "--format", {fmt!r}]
+import generator
+generator.main()
+elapsed_ms = (time.perf_counter() - start) * 1000
+loaded = [m for m in {forbidden!r} if m in sys.modules]
+print("PROBE_RESULT " + json.dumps({{"elapsed_ms": elapsed_ms, "loaded": loaded}}))
+"""
+
+SAMPLE_REPORT = {
+    "summary": "Import time probe",
+    "risk_level": "Low",
+    "vulnerabilities": [{"id": "V-1", "name": "Missing header", "severity": "Low",
+                         "description": "d", "affected_component": "/", "remediation": "r"}],
+    "good_practices": [],
+    "recommendations": [],
+    "detailed_analysis": "",
+}
+
+def run_probe(fmt, report_path, workdir):
+    """Run one generation in a fresh interpreter and return its probe result."""
+    code = PROBE.format(breachx_dir=BREACHX_DIR, report=report_path, fmt=fmt,
+                        forbidden=FORBIDDEN_MODULES[fmt])
+    output = subprocess.run([sys.executable, "-c", code], cwd=workdir, capture_output=True,
+                            text=True, check=True).stdout
+    line = next(l for l in output.splitlines() if l.startswith("PROBE_RESULT "))
+    return json.loads(line[len("PROBE_RESULT "):])
+
+def main():
+    parser = argparse.ArgumentParser(description="Check generator.py import time per format")
+    parser.add_argument("--budget-ms", type=float, default=250, help="Maximum time per run (excluding interpreter start)")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per format; the fastest one is checked")
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as workdir:
+        report_path = os.path.join(workdir, "report.json")
+        with open(report_path, 'w') as f:
+            json.dump(SAMPLE_REPORT, f)
+
+        for fmt in FORBIDDEN_MODULES:
+            results = [run_probe(fmt, report_path, workdir) for _ in range(args.runs)]
+            best = min(r["elapsed_ms"] for r in results)
+            loaded = sorted({m for r in results for m in r["loaded"]})
+            print(f"{fmt:<10} {best:8.1f} ms  heavy modules loaded: {', '.join(loaded) or 'none'}")
+            if loaded:
+                failures.append(f"{fmt} run imported {', '.join(loaded)}")
+            if best > args.budget_ms:
+                failures.append(f"{fmt} run took {best:.1f} ms (budget {args.budget_ms} ms)")
+
+    if failures:
+        print("FAILED: " + "; ".join(failures))
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""Test doubles for benchmarking the report pipeline offline.
+
+``FakeLLM`` stands in for ChatGoogleGenerativeAI/ChatOpenAI and ``LocalS3`` for
+the boto3 S3 client, so the pipeline can be driven without network access.
+"""
+import os
+import json
+import time
+import random
+import shutil
+import threading
+from typing import Dict, List, Optional
+
+CANNED_ANALYSIS = """1. Key Findings: Several services expose outdated versions.
+2. Vulnerabilities Identified: CVE-2021-23017 (High), weak TLS ciphers (Medium)
+3. Recommendations: Upgrade nginx, disable TLS 1.0/1.1, add security headers.
+4. Risk Assessment: High
+"""
+
+# Machine-readable explanations the analysis prompts ask for (reportkit.knowledge_cache)
+CANNED_KNOWLEDGE = """KNOWLEDGE:
+{"id": "CVE-2021-23017", "component": "nginx", "description": "Off-by-one in the nginx resolver allows memory corruption via crafted DNS responses.", "remediation": "Upgrade nginx to 1.21.0 / 1.20.1 or later."}
+{"id": "weak-tls-ciphers", "component": "tls", "description": "The server accepts cipher suites with known weaknesses.", "remediation": "Restrict the cipher list to AEAD suites and disable TLS 1.0/1.1."}
+"""
+
+CANNED_SUMMARY = """# Executive Summary
+The target exposes outdated services and weak TLS configuration.
+
+# Critical Findings
+- CVE-2021-23017 in nginx 1.18.0
+
+# Risk Analysis
+Overall risk: High
+
+# Consolidated Recommendations
+1. Upgrade nginx
+2. Harden TLS configuration
+"""
+
+CANNED_REPORT = {
+    "summary": "The target exposes outdated services and weak TLS configuration.",
+    "risk_level": "High",
+    "vulnerabilities": [
+        {
+            "id": "VULN-001",
+            "name": "Outdated nginx (CVE-2021-23017)",
+            "severity": "High",
+            "description": "nginx 1.18.0 is affected by a resolver off-by-one.",
+            "affected_component": "nginx 1.18.0",
+            "remediation": "Upgrade nginx to 1.20.1 or later.",
+        }
+    ],
+    "good_practices": ["HTTPS enforced"],
+    "recommendations": ["Upgrade nginx", "Disable TLS 1.0/1.1"],
+    "detailed_analysis": "Synthetic analysis produced by the benchmark fake LLM.",
+}
+
+class FakeMessage:
+    """Minimal AIMessage look-alike with content and token usage."""
+
+    def __init__(self, content: str, input_tokens: int, output_tokens: int):
+        self.content = content
+        self.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        self.response_metadata = {}
+
+    def __str__(self):
+        return self.content
+
+def make_message(content: str, input_tokens: int, output_tokens: int):
+    """Build a real AIMessage when langchain_core is installed, so output parsers accept it."""
+    try:
+        from langchain_core.messages import AIMessage
+    except ImportError:
+        return FakeMessage(content, input_tokens, output_tokens)
+    return AIMessage(content=content, usage_metadata={
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens,
+    })
+
+class FakeLLM:
+    """Chat model stand-in returning canned responses after an injected latency.
+
+    ``latency`` is the mean delay per call in seconds and ``jitter`` its relative
+    spread. ``failure_rate`` makes a fraction of calls raise, to exercise error paths.
+    The object is also callable so it can be piped into LangChain chains.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0,
+                 seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self.prompt_chars = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _respond(self, prompt):
+        if isinstance(prompt, str):
+            text = prompt
+        elif hasattr(prompt, "to_string"):
+            # LangChain PromptValue coming through a chain
+            text = prompt.to_string()
+        elif isinstance(prompt, list):
+            text = "\n".join(getattr(m, "content", str(m)) for m in prompt)
+        else:
+            text = str(prompt)
+        with self._lock:
+            self.calls += 1
+            self.prompt_chars += len(text)
+            delay = self.latency * (1 + self._random.uniform(-self.jitter, self.jitter))
+            fail = self._random.random() < self.failure_rate
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            raise RuntimeError("FakeLLM injected failure")
+
+        # Structured-output prompts embed the pydantic JSON schema
+        if '"properties"' in text:
+            content = json.dumps(CANNED_REPORT)
+        elif "executive summary" in text.lower():
+            content = CANNED_SUMMARY
+        else:
+            content = CANNED_ANALYSIS
+            if "KNOWLEDGE:" in text:
+                content += "\n" + CANNED_KNOWLEDGE
+        # Roughly four characters per token
+        return make_message(content, len(text) // 4, len(content) // 4)
+
+    def invoke(self, prompt, *args, **kwargs):
+        return self._respond(prompt)
+
+    def bind(self, **kwargs) -> "FakeLLM":
+        return self
+
+    def __call__(self, prompt) -> str:
+        return self._respond(prompt).content
+
+class _Body:
+    """Streaming body wrapper matching botocore's StreamingBody.read()."""
+
+    def __init__(self, path: str, start: int = 0, length: Optional[int] = None):
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self._remaining = length
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        if self._remaining is not None:
+            amt = self._remaining if amt is None else min(amt, self._remaining)
+        data = self._file.read() if amt is None else self._file.read(amt)
+        if self._remaining is not None:
+            self._remaining -= len(data)
+        if not data:
+            self._file.close()
+        return data
+
+    def iter_chunks(self, chunk_size: int = 1024 * 1024):
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    def close(self):
+        self._file.close()
+
+class LocalS3:
+    """Directory-backed stand-in for the subset of the boto3 S3 client we use.
+
+    Objects live at ``<root>/<bucket>/<key>``. Request counts and transferred
+    bytes are tracked for benchmark reporting.
+    """
+
+    def __init__(self, root: str, latency: float = 0.0):
+        self.root = root
+        self.latency = latency
+        self.requests: Dict[str, int] = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root, bucket, *key.split('/'))
+
+    def _count(self, operation: str, bytes_in: int = 0, bytes_out: int = 0):
+        with self._lock:
+            self.requests[operation] = self.requests.get(operation, 0) + 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _missing(self, bucket: str, key: str):
+        error = KeyError(f"NoSuchKey: s3://{bucket}/{key}")
+        error.response = {"Error": {"Code": "NoSuchKey"}}
+        return error
+
+    def list_objects_v2(self, Bucket: str, Prefix: str = "", ContinuationToken: Optional[str] = None,
+                        MaxKeys: int = 1000, **kwargs) -> Dict:
+        bucket_dir = os.path.join(self.root, Bucket)
+        keys: List[str] = []
+        # Follow links so fixtures can be staged into a bucket without copying
+        for dirpath, _, filenames in os.walk(bucket_dir, followlinks=True):
+            for filename in filenames:
+                key = os.path.relpath(os.path.join(dirpath, filename), bucket_dir).replace(os.sep, '/')
+                if key.startswith(Prefix):
+                    keys.append(key)
+        keys.sort()
+        start = int(ContinuationToken or 0)
+        page = keys[start:start + MaxKeys]
+        self._count("ListObjectsV2")
+
+        response = {"KeyCount": len(page), "IsTruncated": start + MaxKeys < len(keys)}
+        if page:
+            response["Contents"] = [
+                {"Key": key, "Size": os.path.getsize(self._path(Bucket, key))} for key in page
+            ]
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = str(start + MaxKeys)
+        return response
+
+    def get_object(self, Bucket: str, Key: str, Range: Optional[str] = None, **kwargs) -> Dict:
+        path = self._path(Bucket, Key)
+        if not os.path.exists(path):
+            raise self._missing(Bucket, Key)
+        size = os.path.getsize(path)
+        start, length = 0, size
+        if Range:
+            first, _, last = Range.replace("bytes=", "").partition("-")
+            start = int(first)
+            length = (int(last) if last else size - 1) - start + 1
+            length = max(0, min(length, size - start))
+        self._count("GetObject", bytes_out=length)
+        return {"Body": _Body(path, start, length), "ContentLength": length}
+
+    def head_object(self, Bucket: str, Key: str, **kwargs) -> Dict:
+        path = self._path(Bucket, Key)
+        if not os.path.exists(path):
+            raise self._missing(Bucket, Key)
+        self._count("HeadObject")
+        return {"ContentLength": os.path.getsize(path)}
+
+    def put_object(self, Bucket: str, Key: str, Body=b"", **kwargs) -> Dict:
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = Body.encode('utf-8') if isinstance(Body, str) else (Body if isinstance(Body, bytes) else Body.read())
+        # Atomic like S3 when several processes share the directory: conditional puts
+        # create the file exclusively, others replace it in one rename
+        if kwargs.get("IfNoneMatch") == "*":
+            try:
+                with open(path, 'xb') as f:
+                    f.write(data)
+            except FileExistsError:
+                error = KeyError(f"PreconditionFailed: s3://{Bucket}/{Key}")
+                error.response = {"Error": {"Code": "PreconditionFailed"}}
+                raise error from None
+        else:
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        self._count("PutObject", bytes_in=len(data))
+        return {}
+
+    def upload_file(self, Filename: str, Bucket: str, Key: str, ExtraArgs=None, **kwargs):
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(Filename, path)
+        self._count("PutObject", bytes_in=os.path.getsize(path))
+
+    def download_file(self, Bucket: str, Key: str, Filename: str, **kwargs):
+        path = self._path(Bucket, Key)
+        if not os.path.exists(path):
+            raise self._missing(Bucket, Key)
+        shutil.copyfile(path, Filename)
+        self._count("GetObject", bytes_out=os.path.getsize(path))
+
+    def delete_object(self, Bucket: str, Key: str, **kwargs) -> Dict:
+        path = self._path(Bucket, Key)
+        if os.path.exists(path):
+            os.remove(path)
+        self._count("DeleteObject")
+        return {}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"requests": dict(self.requests), "bytes_in": self.bytes_in, "bytes_out": self.bytes_out}
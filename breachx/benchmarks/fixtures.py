@@ -0,0 +1,245 @@
+"""Synthetic scanner report generator for benchmarks.
+
+Produces realistic-looking nmap, trivy, testssl, nikto, sqlmap and ssrfmap
+outputs of a requested size (1 KB to hundreds of MB). Files are written
+incrementally so large fixtures never have to fit in memory, and generation
+is seeded so every run produces identical bytes.
+
+Two layouts are supported:
+
+* ``s3``: the scanner image layout uploaded under ``reports/<timestamp>/``
+  (``<tool>/report.txt|json`` plus ``summary.json``), consumed by the Lambda.
+* ``analysis``: the flat file names expected by ``analysis.ReportGenerator``.
+
+Usage:
+    python benchmarks/fixtures.py --out /tmp/fixtures --size 10MB --layout s3
+"""
+import os
+import json
+import random
+import argparse
+from typing import Callable, Dict, Iterator
+
+SIZE_UNITS = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+PACKAGES = ["openssl", "nginx", "libcurl", "zlib", "glibc", "requests", "urllib3", "jinja2", "lodash", "express"]
+SEVERITIES = ["CRITICAL", "HIGH", "MEDIUM", "LOW", "UNKNOWN"]
+SERVICES = [("22/tcp", "ssh", "OpenSSH 8.2p1 Ubuntu 4ubuntu0.5"), ("80/tcp", "http", "nginx 1.18.0"),
+            ("443/tcp", "ssl/http", "nginx 1.18.0"), ("3306/tcp", "mysql", "MySQL 5.7.33"),
+            ("6379/tcp", "redis", "Redis key-value store 5.0.7")]
+TESTSSL_CHECKS = [("SSLv3", "offered", "HIGH", "CVE-2014-3566"), ("TLS1", "offered (deprecated)", "LOW", ""),
+                  ("cipher_order", "server", "OK", ""), ("heartbleed", "not vulnerable", "OK", "CVE-2014-0160"),
+                  ("BREACH", "potentially VULNERABLE, gzip HTTP compression detected", "MEDIUM", "CVE-2013-3587"),
+                  ("cert_expirationStatus", "expires < 30 days", "MEDIUM", "")]
+NIKTO_MESSAGES = ["The anti-clickjacking X-Frame-Options header is not present.",
+                  "The X-Content-Type-Options header is not set.",
+                  "Server may leak inodes via ETags, header found with file {path}",
+                  "{path}: Directory indexing found.",
+                  "{path}: This might be interesting."]
+
+def parse_size(value: str) -> int:
+    """Parse sizes such as '1KB', '10MB' or '500MB' into bytes."""
+    value = value.strip().upper()
+    for unit in sorted(SIZE_UNITS, key=len, reverse=True):
+        if value.endswith(unit):
+            return int(float(value[:-len(unit)]) * SIZE_UNITS[unit])
+    return int(value)
+
+def format_size(size: int) -> str:
+    """Format a byte count with the largest whole unit."""
+    for unit in ("GB", "MB", "KB"):
+        if size >= SIZE_UNITS[unit] and size % SIZE_UNITS[unit] == 0:
+            return f"{size // SIZE_UNITS[unit]}{unit}"
+    return f"{size}B"
+
+def _cve(rng: random.Random) -> str:
+    return f"CVE-{rng.randint(2014, 2024)}-{rng.randint(1000, 49999)}"
+
+def _write_chunks(path: str, target: int, chunks: Iterator[str], prefix: str = "", suffix: str = "",
+                  separator: str = ""):
+    """Write prefix, then chunks joined by separator until target bytes, then suffix."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    written = 0
+    with open(path, 'w', buffering=1024 * 1024) as f:
+        written += f.write(prefix)
+        first = True
+        budget = max(0, target - len(prefix) - len(suffix))
+        for chunk in chunks:
+            if not first:
+                written += f.write(separator)
+            written += f.write(chunk)
+            first = False
+            if written >= budget:
+                break
+        f.write(suffix)
+
+# Per-tool generators ---------------------------------------------------------
+
+def nmap_chunks(rng: random.Random) -> Iterator[str]:
+    host = 0
+    while True:
+        host += 1
+        lines = [f"Nmap scan report for host-{host}.example.internal (10.0.{host // 250 % 250}.{host % 250})",
+                 "Host is up (0.00042s latency).", "PORT     STATE SERVICE  VERSION"]
+        for port, service, version in rng.sample(SERVICES, rng.randint(1, len(SERVICES))):
+            lines.append(f"{port:<8} open  {service:<8} {version}")
+            lines.append("| vulners: ")
+            lines.append(f"|   cpe:/a:{service}:{service}:1.0: ")
+            for _ in range(rng.randint(1, 4)):
+                cve = _cve(rng)
+                lines.append(f"|     {cve}\t{rng.uniform(2, 10):.1f}\thttps://vulners.com/cve/{cve}")
+        lines.append("")
+        yield "\n".join(lines) + "\n"
+
+def trivy_chunks(rng: random.Random) -> Iterator[str]:
+    while True:
+        pkg = rng.choice(PACKAGES)
+        cve = _cve(rng)
+        score = round(rng.uniform(1, 10), 1)
+        yield json.dumps({
+            "VulnerabilityID": cve,
+            "PkgName": pkg,
+            "InstalledVersion": f"1.{rng.randint(0, 20)}.{rng.randint(0, 9)}",
+            "FixedVersion": f"1.{rng.randint(21, 30)}.0",
+            "Severity": rng.choice(SEVERITIES),
+            "Title": f"{pkg}: memory corruption in parser",
+            "Description": f"A flaw was found in {pkg} that allows a remote attacker to cause a denial of service. " * 2,
+            "CweIDs": [f"CWE-{rng.choice([79, 89, 119, 200, 287, 400, 787])}"],
+            "CVSS": {"nvd": {"V3Vector": "CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H", "V3Score": score}},
+        })
+
+def testssl_chunks(rng: random.Random) -> Iterator[str]:
+    while True:
+        check, finding, severity, cve = rng.choice(TESTSSL_CHECKS)
+        yield json.dumps({"id": check, "ip": "example.com/93.184.216.34", "port": "443",
+                          "severity": severity, "cve": cve, "cwe": "CWE-310", "finding": finding})
+
+def nikto_chunks(rng: random.Random) -> Iterator[str]:
+    item = 0
+    while True:
+        item += 1
+        path = f"/{rng.choice(['admin', 'backup', 'static', 'api', 'uploads'])}/{item}/"
+        yield json.dumps({"id": str(999000 + item % 1000), "references": "", "method": "GET",
+                          "url": path, "msg": rng.choice(NIKTO_MESSAGES).format(path=path)})
+
+def ssrfmap_chunks(rng: random.Random) -> Iterator[str]:
+    yield "[INFO] Log file '/tools/ssrfmap/SSRFmap.log'\n"
+    while True:
+        target = rng.choice(["/etc/passwd", "/etc/hosts", "/proc/self/environ", "file:///etc/shadow"])
+        yield (f"[INFO] Module 'readfiles' launched !\n"
+               f"[INFO] Reading file : {target}\n"
+               f"[ERROR] Unable to read {target} via parameter url (HTTP {rng.choice([400, 403, 500])})\n")
+
+def sqlmap_log_chunks(rng: random.Random) -> Iterator[str]:
+    while True:
+        param = rng.choice(["id", "user", "q", "page", "sort"])
+        yield ("sqlmap identified the following injection point(s) with a total of "
+               f"{rng.randint(20, 400)} HTTP(s) requests:\n---\n"
+               f"Parameter: {param} (GET)\n"
+               "    Type: boolean-based blind\n"
+               "    Title: AND boolean-based blind - WHERE or HAVING clause\n"
+               f"    Payload: {param}=1 AND {rng.randint(1000, 9999)}={rng.randint(1000, 9999)}\n"
+               "---\nweb server operating system: Linux Ubuntu\n"
+               "web application technology: Nginx 1.18.0\n"
+               "back-end DBMS: MySQL >= 5.0.12\n")
+
+def sqlmap_dump_chunks(rng: random.Random) -> Iterator[str]:
+    row = 0
+    while True:
+        row += 1
+        yield f"{row},user{row}@example.com,{rng.getrandbits(128):032x}\n"
+
+# Layout writers --------------------------------------------------------------
+
+def _json_list(path: str, size: int, chunks: Iterator[str], prefix: str = "[", suffix: str = "]"):
+    _write_chunks(path, size, chunks, prefix=prefix, suffix=suffix, separator=",\n")
+
+def write_s3_layout(root: str, size: int, seed: int = 0) -> Dict[str, str]:
+    """Write one scan in the scanner upload layout; returns tool -> path."""
+    rng = random.Random(seed)
+    paths = {
+        "nmap": os.path.join(root, "nmap", "report.txt"),
+        "trivy": os.path.join(root, "trivy", "report.json"),
+        "testssl": os.path.join(root, "testssl", "report.json"),
+        "nikto": os.path.join(root, "nikto", "report.json"),
+        "ssrfmap": os.path.join(root, "ssrfmap", "report.txt"),
+        "sqlmap": os.path.join(root, "sqlmap", "example.com", "log"),
+    }
+    _write_chunks(paths["nmap"], size, nmap_chunks(rng),
+                  prefix="# Nmap 7.80 scan initiated as: nmap -sV --script vuln -oN /reports/nmap/report.txt\n")
+    _json_list(paths["trivy"], size, trivy_chunks(rng),
+               prefix='{"SchemaVersion": 2, "ArtifactName": "/", "ArtifactType": "filesystem", "Results": '
+                      '[{"Target": "/", "Class": "os-pkgs", "Type": "ubuntu", "Vulnerabilities": [',
+               suffix="]}]}")
+    _json_list(paths["testssl"], size, testssl_chunks(rng))
+    _json_list(paths["nikto"], size, nikto_chunks(rng),
+               prefix='[{"host": "example.com", "ip": "93.184.216.34", "port": "443", "banner": "nginx", '
+                      '"vulnerabilities": [',
+               suffix="]}]")
+    _write_chunks(paths["ssrfmap"], size, ssrfmap_chunks(rng))
+
+    # sqlmap writes a whole --output-dir tree rather than a single report file
+    sqlmap_dir = os.path.dirname(paths["sqlmap"])
+    _write_chunks(paths["sqlmap"], size, sqlmap_log_chunks(rng))
+    with open(os.path.join(sqlmap_dir, "target.txt"), 'w') as f:
+        f.write("https://example.com/?id=1 (GET)\n")
+    _write_chunks(os.path.join(sqlmap_dir, "dump", "shop", "users.csv"), max(1024, size // 4),
+                  sqlmap_dump_chunks(rng), prefix="id,email,password_hash\n")
+
+    with open(os.path.join(root, "summary.json"), 'w') as f:
+        json.dump({
+            "target_url": "https://example.com/",
+            "date": "2025-01-01T00:00:00Z",
+            "reports": {tool: os.path.relpath(path, root) for tool, path in paths.items()},
+        }, f, indent=2)
+    return paths
+
+def write_analysis_layout(root: str, size: int, seed: int = 0) -> Dict[str, str]:
+    """Write one scan with the file names analysis.ReportGenerator.load_scan_results expects."""
+    rng = random.Random(seed)
+    paths = {
+        "sqlmap": os.path.join(root, "sqlmap-results.json"),
+        "nikto": os.path.join(root, "nikto-results.json"),
+        "nuclei": os.path.join(root, "nuclei-results.json"),
+        "ssrfmap": os.path.join(root, "ssrfmap-results.txt"),
+        "dependencies": os.path.join(root, "dependency-check-report.json"),
+        "zap": os.path.join(root, "zap-report.json"),
+    }
+    log_lines = (json.dumps(chunk) for chunk in sqlmap_log_chunks(rng))
+    _json_list(paths["sqlmap"], size, log_lines, prefix='{"log": [', suffix="]}")
+    _json_list(paths["nikto"], size, nikto_chunks(rng), prefix='{"vulnerabilities": [', suffix="]}")
+    _json_list(paths["nuclei"], size, testssl_chunks(rng))
+    _write_chunks(paths["ssrfmap"], size, ssrfmap_chunks(rng))
+    _json_list(paths["dependencies"], size, trivy_chunks(rng), prefix='{"dependencies": [', suffix="]}")
+    _json_list(paths["zap"], size, nikto_chunks(rng), prefix='{"site": [{"alerts": [', suffix="]}]}")
+    return paths
+
+LAYOUTS: Dict[str, Callable[[str, int, int], Dict[str, str]]] = {
+    "s3": write_s3_layout,
+    "analysis": write_analysis_layout,
+}
+
+def ensure_fixture(cache_dir: str, layout: str, size: int, seed: int = 0) -> str:
+    """Return a fixture directory for layout/size, generating it once per cache_dir."""
+    root = os.path.join(cache_dir, f"{layout}-{format_size(size)}-seed{seed}")
+    marker = os.path.join(root, ".complete")
+    if not os.path.exists(marker):
+        LAYOUTS[layout](root, size, seed)
+        with open(marker, 'w') as f:
+            f.write("ok\n")
+    return root
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic scanner reports")
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--size", default="1MB", help="Approximate size per report, e.g. 1KB, 10MB, 500MB")
+    parser.add_argument("--layout", choices=sorted(LAYOUTS), default="s3")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    paths = LAYOUTS[args.layout](args.out, parse_size(args.size), args.seed)
+    for tool, path in paths.items():
+        print(f"{tool:<14}{os.path.getsize(path):>14,d}  {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""Load test that replays S3 event storms against the Lambda's ``lambda_handler``.
+
+Stages synthetic scan folders in a ``LocalS3`` bucket and fires S3 ``Records``
+events at ``lambda_handler`` at a set rate. Records can be batched several per
+event, and events can be delivered more than once, as S3 does. Each simulated
+Lambda container is a separate worker process. The handler keeps invocation
+state in module globals, so containers can't be threads. Each container
+handles one event at a time with a warm module and a latency-injecting
+``FakeLLM``.
+
+The summary reports:
+
+* throughput, and end-to-end and handler latency percentiles. End-to-end time
+  includes the wait for a free container.
+* status codes and the failure rate per stage, from the handler's own spans
+  (REPORT_METRICS_SINK=jsonl).
+* duplicate work: repeated analyses of one scan's tool and repeated pipeline
+  runs and PDFs for one scan.
+* the memory high-water mark of each container.
+
+Usage:
+    python benchmarks/loadtest.py --scans 50 --concurrency 10 --llm-latency 2
+    python benchmarks/loadtest.py --scans 50 --mode streaming --batch 5 --duplicates 0.2 --rate 20
+    python benchmarks/loadtest.py --scans 200 --size 1MB --json loadtest.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import resource
+import argparse
+import tempfile
+import multiprocessing
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from fakes import FakeLLM, LocalS3
+from fixtures import ensure_fixture, parse_size
+from run_benchmarks import DEFAULT_FIXTURE_CACHE, INPUT_BUCKET, import_lambda, percentile
+
+PIPELINE_MODES = ("batch", "streaming")
+# First scan folder; later scans count up from it like scanner timestamps
+FIRST_TIMESTAMP = 1700000000
+
+# Scan folders --------------------------------------------------------------------
+
+def stage_scans(s3_root: str, fixture_dir: str, count: int) -> List[str]:
+    """Create ``count`` scan folders that link to the fixture's files; return their prefixes."""
+    prefixes = []
+    for index in range(count):
+        prefix = f"reports/{FIRST_TIMESTAMP + index}"
+        scan_dir = os.path.join(s3_root, INPUT_BUCKET, *prefix.split('/'))
+        os.makedirs(scan_dir)
+        # Entries are linked one by one, so what the Lambda writes into the folder stays per scan
+        for name in os.listdir(fixture_dir):
+            if not name.startswith('.'):
+                os.symlink(os.path.join(fixture_dir, name), os.path.join(scan_dir, name))
+        prefixes.append(prefix)
+    return prefixes
+
+def scan_records(fixture_dir: str, prefixes: List[str]) -> List[Dict[str, Any]]:
+    """One ObjectCreated record per uploaded object of every scan."""
+    objects = []
+    for dirpath, _, filenames in os.walk(fixture_dir):
+        for filename in filenames:
+            if not filename.startswith('.'):
+                path = os.path.join(dirpath, filename)
+                objects.append((os.path.relpath(path, fixture_dir).replace(os.sep, '/'), os.path.getsize(path)))
+    return [{
+        "eventSource": "aws:s3",
+        "eventName": "ObjectCreated:Put",
+        "s3": {"bucket": {"name": INPUT_BUCKET}, "object": {"key": f"{prefix}/{key}", "size": size}},
+    } for prefix in prefixes for key, size in sorted(objects)]
+
+def build_events(records: List[Dict], batch: int, duplicates: float, seed: int) -> List[Tuple[int, Dict]]:
+    """Shuffle records into events of ``batch`` records; redeliver a fraction of events later.
+
+    Returns ``(event_id, event)`` pairs in delivery order; a redelivery keeps its event id.
+    """
+    rng = random.Random(seed)
+    records = list(records)
+    rng.shuffle(records)
+    events = [(event_id, {"Records": records[start:start + batch]})
+              for event_id, start in enumerate(range(0, len(records), batch))]
+    deliveries = list(events)
+    for position, (event_id, event) in enumerate(events):
+        if rng.random() < duplicates:
+            deliveries.insert(rng.randint(position + 1, len(deliveries)), (event_id, event))
+    return deliveries
+
+# Containers ------------------------------------------------------------------------
+
+_lambda = None
+_llm = None
+_timeout_s = 0.0
+
+class FakeContext:
+    """The parts of the Lambda context object the handler uses."""
+
+    def __init__(self, request_id: str, timeout_s: float):
+        self.aws_request_id = request_id
+        self.invoked_function_arn = "arn:aws:lambda:us-east-1:000000000000:function:security-report-loadtest"
+        self._deadline = time.monotonic() + timeout_s
+
+    def get_remaining_time_in_millis(self) -> int:
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+def start_container(workdir: str, s3_root: str, mode: str, timeout_s: float, llm_options: Dict):
+    """Pool initializer: import the Lambda once per process, like a warm container."""
+    global _lambda, _llm, _timeout_s
+    container_dir = os.path.join(workdir, "containers", str(os.getpid()))
+    os.makedirs(container_dir)
+    os.environ["PIPELINE_MODE"] = mode
+    os.environ["REPORT_METRICS_SINK"] = "jsonl"
+    os.environ["REPORT_METRICS_PATH"] = os.path.join(workdir, "spans", f"{os.getpid()}.jsonl")
+    os.environ["DEADLINE_HISTORY_PATH"] = os.path.join(container_dir, "stage-costs.json")
+    os.environ["REPORT_BLOB_SPILL_DIR"] = container_dir
+    os.environ["KNOWLEDGE_CACHE_PATH"] = os.path.join(container_dir, "knowledge.sqlite3")
+    _llm = FakeLLM(seed=os.getpid(), **llm_options)
+    _lambda = import_lambda(LocalS3(s3_root), _llm, container_dir)
+    _timeout_s = timeout_s
+    # Per-event INFO logs of every container would drown the summary
+    logging.getLogger().setLevel(logging.WARNING)
+
+def invoke(delivery: int, event_id: int, event: Dict) -> Dict[str, Any]:
+    """Run one event through lambda_handler and measure it."""
+    llm_calls = _llm.calls
+    start = time.time()
+    try:
+        response = _lambda.lambda_handler(event, FakeContext(f"event-{event_id}-{delivery}", _timeout_s))
+        status = response.get("statusCode", 0)
+    except Exception as e:
+        # The handler catches everything it can; this is a crash of the container
+        status = f"crash: {type(e).__name__}"
+    return {
+        "delivery": delivery,
+        "event_id": event_id,
+        "request_id": f"event-{event_id}-{delivery}",
+        "status": status,
+        "start": start,
+        "end": time.time(),
+        "llm_calls": _llm.calls - llm_calls,
+        "container": os.getpid(),
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+# Analysis ----------------------------------------------------------------------------
+
+def read_spans(spans_dir: str) -> List[Dict]:
+    spans = []
+    for name in sorted(os.listdir(spans_dir)):
+        with open(os.path.join(spans_dir, name)) as f:
+            spans.extend(json.loads(line) for line in f if line.strip())
+    return spans
+
+def span_prefixes(spans: List[Dict]) -> Dict[str, str]:
+    """Scan prefix of every span, from its nearest ancestor with a ``prefix`` attribute."""
+    by_id = {span["span_id"]: span for span in spans}
+    resolved: Dict[str, str] = {}
+
+    def prefix_of(span: Dict) -> str:
+        span_id = span["span_id"]
+        if span_id not in resolved:
+            parent = by_id.get(span["parent_id"])
+            resolved[span_id] = span["attributes"].get("prefix") or (prefix_of(parent) if parent else "")
+        return resolved[span_id]
+
+    for span in spans:
+        prefix_of(span)
+    return resolved
+
+def stage_stats(spans: List[Dict]) -> Dict[str, Dict[str, Any]]:
+    """Calls, errors and latency per span name."""
+    grouped = defaultdict(list)
+    for span in spans:
+        grouped[span["name"]].append(span)
+    stats = {}
+    for name, group in sorted(grouped.items()):
+        wall = [span["metrics"].get("wall_ms", 0.0) for span in group]
+        errors = sum(1 for span in group if "error" in span["attributes"])
+        stats[name] = {"calls": len(group), "errors": errors, "failure_rate": errors / len(group),
+                       "p50_ms": percentile(wall, 50), "p95_ms": percentile(wall, 95), "max_ms": max(wall)}
+    return stats
+
+def duplicate_work(spans: List[Dict], scans: List[str]) -> Dict[str, Any]:
+    """Work done more than once for the same scan: analyses, pipeline runs and PDFs."""
+    prefixes = span_prefixes(spans)
+    analyses = Counter((prefixes[span["span_id"]], span["attributes"].get("tool")) for span in spans
+                       if span["name"] == "llm.analyze")
+    pipelines = Counter(prefixes[span["span_id"]] for span in spans if span["name"] == "pipeline")
+    pdfs = Counter(prefixes[span["span_id"]] for span in spans
+                   if span["name"] == "create_pdf" and "error" not in span["attributes"])
+    return {
+        "analyses": sum(analyses.values()),
+        "duplicate_analyses": sum(count - 1 for count in analyses.values()),
+        "pipeline_runs": sum(pipelines.values()),
+        "duplicate_pipeline_runs": sum(count - 1 for count in pipelines.values()),
+        "pdfs": sum(pdfs.values()),
+        "duplicate_pdfs": sum(count - 1 for count in pdfs.values()),
+        "scans_without_pdf": sorted(set(scans) - set(pdfs)),
+    }
+
+def summarize(results: List[Dict], spans: List[Dict], scans: List[str], wall_s: float) -> Dict[str, Any]:
+    end_to_end = [(result["end"] - result["sent"]) * 1000 for result in results]
+    handler = [(result["end"] - result["start"]) * 1000 for result in results]
+    statuses = Counter(str(result["status"]) for result in results)
+    containers: Dict[int, float] = {}
+    for result in results:
+        containers[result["container"]] = max(containers.get(result["container"], 0.0), result["max_rss_mb"])
+    latency = {name: {"p50_ms": percentile(values, 50), "p95_ms": percentile(values, 95),
+                      "p99_ms": percentile(values, 99), "max_ms": max(values)}
+               for name, values in (("end_to_end", end_to_end), ("handler", handler))}
+    failures = sum(count for status, count in statuses.items() if status != "200")
+    work = duplicate_work(spans, scans)
+    return {
+        "events": len(results),
+        "redeliveries": len(results) - len({result["event_id"] for result in results}),
+        "scans": len(scans),
+        "wall_s": wall_s,
+        "events_per_s": len(results) / wall_s,
+        "scans_per_s": (len(scans) - len(work["scans_without_pdf"])) / wall_s,
+        "latency": latency,
+        "statuses": dict(statuses),
+        "failure_rate": failures / len(results),
+        "llm_calls": sum(result["llm_calls"] for result in results),
+        "stages": stage_stats(spans),
+        "duplicate_work": work,
+        "container_max_rss_mb": {"containers": len(containers), "p50": percentile(list(containers.values()), 50),
+                                 "max": max(containers.values())},
+    }
+
+def print_summary(summary: Dict[str, Any]):
+    print(f"events {summary['events']} ({summary['redeliveries']} redelivered), scans {summary['scans']}, "
+          f"wall {summary['wall_s']:.1f} s")
+    print(f"throughput {summary['events_per_s']:.2f} events/s, {summary['scans_per_s']:.2f} scans/s "
+          f"with a PDF, {summary['llm_calls']} LLM calls")
+    print(f"\n{'latency':<12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, values in summary["latency"].items():
+        print(f"{name:<12}{values['p50_ms']:>10.0f}{values['p95_ms']:>10.0f}{values['p99_ms']:>10.0f}"
+              f"{values['max_ms']:>10.0f}")
+    statuses = ", ".join(f"{status}: {count}" for status, count in sorted(summary["statuses"].items()))
+    print(f"\nstatus codes {statuses} (failure rate {summary['failure_rate']:.1%})")
+
+    print(f"\n{'stage':<22}{'calls':>8}{'errors':>8}{'fail %':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for name, stats in summary["stages"].items():
+        print(f"{name:<22}{stats['calls']:>8}{stats['errors']:>8}{stats['failure_rate']:>8.1%}"
+              f"{stats['p50_ms']:>10.0f}{stats['p95_ms']:>10.0f}{stats['max_ms']:>10.0f}")
+
+    work = summary["duplicate_work"]
+    print(f"\nduplicate work: {work['duplicate_analyses']} of {work['analyses']} analyses, "
+          f"{work['duplicate_pipeline_runs']} of {work['pipeline_runs']} pipeline runs, "
+          f"{work['duplicate_pdfs']} of {work['pdfs']} PDFs")
+    if work["scans_without_pdf"]:
+        print(f"scans without a PDF: {len(work['scans_without_pdf'])} ({', '.join(work['scans_without_pdf'][:5])}...)")
+    memory = summary["container_max_rss_mb"]
+    print(f"container max RSS: p50 {memory['p50']:.0f} MB, max {memory['max']:.0f} MB "
+          f"over {memory['containers']} containers")
+
+# Driver ------------------------------------------------------------------------------
+
+def run(args) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix="breachx-loadtest-")
+    try:
+        s3_root = os.path.join(workdir, "s3")
+        os.makedirs(os.path.join(workdir, "spans"))
+        fixture_dir = ensure_fixture(args.fixture_cache, "s3", parse_size(args.size), args.seed)
+        scans = stage_scans(s3_root, fixture_dir, args.scans)
+        deliveries = build_events(scan_records(fixture_dir, scans), args.batch, args.duplicates, args.seed)
+        llm_options = {"latency": args.llm_latency, "jitter": args.llm_jitter, "failure_rate": args.llm_failure_rate}
+
+        # Fresh interpreters, so every container pays its own imports and memory
+        pool = multiprocessing.get_context("spawn").Pool(
+            args.concurrency, initializer=start_container,
+            initargs=(workdir, s3_root, args.mode, args.timeout, llm_options))
+        with pool:
+            # Let the containers finish their cold starts before the clock starts
+            pool.map(time.sleep, [0.2] * args.concurrency)
+            start = time.time()
+            pending = []
+            for delivery, (event_id, event) in enumerate(deliveries):
+                if args.rate:
+                    time.sleep(max(0.0, start + delivery / args.rate - time.time()))
+                pending.append((time.time(), pool.apply_async(invoke, (delivery, event_id, event))))
+            results = []
+            for sent, async_result in pending:
+                results.append(dict(async_result.get(), sent=sent))
+            wall_s = time.time() - start
+        return summarize(results, read_spans(os.path.join(workdir, "spans")), scans, wall_s)
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+        else:
+            print(f"kept {workdir}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay S3 event storms against lambda_handler")
+    parser.add_argument("--scans", type=int, default=50, help="Scan folders finishing at once")
+    parser.add_argument("--size", default="64KB", help="Per-report fixture size, e.g. 64KB or 1MB")
+    parser.add_argument("--mode", choices=PIPELINE_MODES, default="batch", help="PIPELINE_MODE of the Lambda")
+    parser.add_argument("--concurrency", type=int, default=8, help="Simulated Lambda containers")
+    parser.add_argument("--rate", type=float, default=0.0, help="Events per second; 0 sends them all at once")
+    parser.add_argument("--batch", type=int, default=1, help="S3 records per event")
+    parser.add_argument("--duplicates", type=float, default=0.0, help="Fraction of events delivered twice")
+    parser.add_argument("--timeout", type=float, default=900.0, help="Lambda timeout per invocation in seconds")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Fake LLM latency per call in seconds")
+    parser.add_argument("--llm-jitter", type=float, default=0.3, help="Relative spread of the LLM latency")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0, help="Fraction of LLM calls that fail")
+    parser.add_argument("--fixture-cache", default=DEFAULT_FIXTURE_CACHE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the summary to this file")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch directory (S3 objects, spans)")
+    args = parser.parse_args()
+    if args.scans < 1 or args.concurrency < 1 or args.batch < 1:
+        parser.error("--scans, --concurrency and --batch must be positive")
+
+    summary = run(args)
+    print_summary(summary)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""Benchmark harness for the report pipeline.
+
+Runs each stage of the Lambda graph, analysis.py and every generator.py output
+format against synthetic scanner fixtures, with a fake LLM and a local S3
+stand-in. Every case runs in its own interpreter so peak RSS is per case.
+
+Usage:
+    python benchmarks/run_benchmarks.py --sizes 1KB 1MB --llm-latency 0.05
+    python benchmarks/run_benchmarks.py --cases lambda.fetch_reports --sizes 100MB 500MB
+    python benchmarks/run_benchmarks.py --save-baseline benchmarks/baselines/local.json
+    python benchmarks/run_benchmarks.py --compare benchmarks/baselines/local.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import resource
+import argparse
+import tempfile
+import subprocess
+from typing import Callable, Dict, List, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BREACHX_DIR = os.path.dirname(BENCH_DIR)
+AGENT_REPORT_DIR = os.path.join(BREACHX_DIR, "agent-report")
+sys.path.insert(0, BREACHX_DIR)
+
+from fakes import FakeLLM, LocalS3
+from fixtures import ensure_fixture, parse_size, format_size
+
+INPUT_BUCKET = "benchmark-input"
+OUTPUT_BUCKET = "benchmark-output"
+SCAN_PREFIX = "reports/1700000000"
+TARGET_URL = "https://example.com/"
+
+DEFAULT_FIXTURE_CACHE = os.path.join(tempfile.gettempdir(), "breachx-bench-fixtures")
+
+class BenchEnv:
+    """Per-case environment: scratch directory, fixture cache and fake LLM latency."""
+
+    def __init__(self, workdir: str, fixture_cache: str, size: int, llm_latency: float, seed: int):
+        self.workdir = workdir
+        self.fixture_cache = fixture_cache
+        self.size = size
+        self.llm_latency = llm_latency
+        self.seed = seed
+        self.llm = FakeLLM(latency=llm_latency, jitter=0.2, seed=seed)
+        self.s3 = None
+
+    def fixture(self, layout: str) -> str:
+        return ensure_fixture(self.fixture_cache, layout, self.size, self.seed)
+
+    def extra_stats(self) -> Dict:
+        stats = {"llm_calls": self.llm.calls, "llm_prompt_chars": self.llm.prompt_chars}
+        if self.s3 is not None:
+            stats["s3"] = self.s3.stats()
+        return stats
+
+# A case takes the environment and returns an operation; the operation returns bytes processed
+CaseFn = Callable[[BenchEnv], Callable[[], int]]
+CASES: Dict[str, CaseFn] = {}
+
+def case(name: str):
+    def register(fn: CaseFn) -> CaseFn:
+        CASES[name] = fn
+        return fn
+    return register
+
+# Lambda pipeline -------------------------------------------------------------
+
+def import_lambda(s3: LocalS3, llm: FakeLLM, workdir: str, payloads: str = "inline"):
+    """Import lambda_function with S3 and Gemini replaced by the given fakes.
+
+    Per-container state (blob spills, knowledge cache) goes under ``workdir``.
+    """
+    os.environ["REPORT_PAYLOADS"] = payloads
+    os.environ.setdefault("REPORT_BLOB_SPILL_DIR", workdir)
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    os.environ["OUTPUT_BUCKET"] = OUTPUT_BUCKET
+    os.environ.setdefault("KNOWLEDGE_CACHE_PATH", os.path.join(workdir, "knowledge.sqlite3"))
+    sys.path.insert(0, AGENT_REPORT_DIR)
+    import lambda_function
+
+    lambda_function.s3 = s3
+    lambda_function.gemini = llm
+    lambda_function.OUTPUT_BUCKET = OUTPUT_BUCKET
+    return lambda_function
+
+def _load_lambda(env: BenchEnv, payloads: str = "inline"):
+    """Import lambda_function with local fakes and the fixture scan staged in the input bucket."""
+    env.s3 = LocalS3(os.path.join(env.workdir, "s3"))
+    scan_dir = os.path.join(env.s3.root, INPUT_BUCKET, *SCAN_PREFIX.split('/'))
+    os.makedirs(os.path.dirname(scan_dir), exist_ok=True)
+    os.symlink(env.fixture("s3"), scan_dir)
+    return import_lambda(env.s3, env.llm, env.workdir, payloads)
+
+def _initial_state() -> Dict:
+    return {
+        "input_bucket": INPUT_BUCKET,
+        "input_key_prefix": SCAN_PREFIX,
+        "report_files": {},
+        "analysis": {},
+        "summary": "",
+        "output_key": "",
+        "degraded": {},
+    }
+
+def _text_bytes(values) -> int:
+    return sum(len(v) for v in values if isinstance(v, str))
+
+@case("lambda.fetch_reports")
+def bench_fetch_reports(env: BenchEnv):
+    lf = _load_lambda(env)
+
+    def op():
+        state = lf.fetch_reports(_initial_state())
+        return _text_bytes(state["report_files"].values())
+    return op
+
+@case("lambda.analyze_reports")
+def bench_analyze_reports(env: BenchEnv):
+    lf = _load_lambda(env)
+    fetched = lf.fetch_reports(_initial_state())
+
+    def op():
+        state = lf.analyze_reports(dict(fetched, analysis={}))
+        return _text_bytes(state["analysis"].values())
+    return op
+
+@case("lambda.generate_summary")
+def bench_generate_summary(env: BenchEnv):
+    lf = _load_lambda(env)
+    analyzed = lf.analyze_reports(lf.fetch_reports(_initial_state()))
+
+    def op():
+        return len(lf.generate_summary(dict(analyzed, summary=""))["summary"])
+    return op
+
+@case("lambda.create_pdf")
+def bench_create_pdf(env: BenchEnv):
+    lf = _load_lambda(env)
+    summarized = lf.generate_summary(lf.analyze_reports(lf.fetch_reports(_initial_state())))
+
+    def op():
+        state = lf.create_pdf(dict(summarized))
+        return env.s3.head_object(Bucket=OUTPUT_BUCKET, Key=state["output_key"])["ContentLength"]
+    return op
+
+@case("lambda.graph")
+def bench_graph(env: BenchEnv):
+    lf = _load_lambda(env)
+    workflow = lf.build_graph().compile()
+
+    def op():
+        result = workflow.invoke(_initial_state())
+        return env.s3.head_object(Bucket=OUTPUT_BUCKET, Key=result["output_key"])["ContentLength"]
+    return op
+
+@case("lambda.graph.ref")
+def bench_graph_ref(env: BenchEnv):
+    """Same graph with payloads passed by blob handle; compare peak RSS with lambda.graph."""
+    lf = _load_lambda(env, payloads="ref")
+
+    def op():
+        result = lf.run_pipeline(INPUT_BUCKET, SCAN_PREFIX)
+        return env.s3.head_object(Bucket=OUTPUT_BUCKET, Key=result["output_key"])["ContentLength"]
+    return op
+
+# analysis.py -----------------------------------------------------------------
+
+def _load_analysis(env: BenchEnv):
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark-placeholder")
+    os.environ.setdefault("KNOWLEDGE_CACHE_PATH", os.path.join(env.workdir, "knowledge.sqlite3"))
+    import analysis
+
+    generator = analysis.ReportGenerator()
+    generator.llm = env.llm
+    return generator
+
+@case("analysis.load_scan_results")
+def bench_load_scan_results(env: BenchEnv):
+    generator = _load_analysis(env)
+    scan_dir = env.fixture("analysis")
+    total = sum(os.path.getsize(os.path.join(scan_dir, f)) for f in os.listdir(scan_dir) if not f.startswith('.'))
+
+    def op():
+        generator.load_scan_results(scan_dir)
+        return total
+    return op
+
+@case("analysis.generate_report")
+def bench_generate_report(env: BenchEnv):
+    generator = _load_analysis(env)
+    results = generator.load_scan_results(env.fixture("analysis"))
+
+    def op():
+        report = generator.generate_report(results, TARGET_URL)
+        return len(json.dumps(report.to_dict()))
+    return op
+
+# generator.py ----------------------------------------------------------------
+
+def _generator_case(fmt: str, **kwargs):
+    def bench(env: BenchEnv):
+        from bench_pdf_backends import build_report
+        import generator
+
+        # Roughly one vulnerability per KB of scanner output
+        report_path = os.path.join(env.workdir, "report.json")
+        with open(report_path, 'w') as f:
+            json.dump(build_report(max(1, env.size // 1024)), f)
+        os.chdir(env.workdir)
+        method = {"html": "generate_html_report", "markdown": "generate_markdown_report",
+                  "pdf": "generate_pdf_report"}[fmt]
+
+        def op():
+            report_generator = generator.ReportGenerator(report_path)
+            return os.path.getsize(getattr(report_generator, method)(**kwargs))
+        return op
+    return bench
+
+CASES["generator.html"] = _generator_case("html")
+CASES["generator.html-sharded"] = _generator_case("html", mode="sharded")
+CASES["generator.markdown"] = _generator_case("markdown")
+CASES["generator.pdf-fpdf"] = _generator_case("pdf", backend="fpdf")
+CASES["generator.pdf-weasyprint"] = _generator_case("pdf", backend="weasyprint")
+
+# reportkit -------------------------------------------------------------------
+
+@case("scoring.assess")
+def bench_scoring(env: BenchEnv):
+    from bench_pdf_backends import build_report
+    from reportkit import model, scoring
+
+    data = build_report(max(1, env.size // 1024))
+    report = model.Report.from_dict(data)
+    size = len(json.dumps(data))
+
+    def op():
+        scoring.assess(report.vulnerabilities)
+        return size
+    return op
+
+# Harness ---------------------------------------------------------------------
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def run_case(name: str, size: int, iterations: int, llm_latency: float, fixture_cache: str, seed: int) -> Dict:
+    """Run one case in this process and return its measurements."""
+    workdir = tempfile.mkdtemp(prefix="breachx-bench-")
+    try:
+        env = BenchEnv(workdir, fixture_cache, size, llm_latency, seed)
+        op = CASES[name](env)
+        op()  # warm-up
+
+        latencies: List[float] = []
+        processed = 0
+        for _ in range(iterations):
+            start = time.perf_counter()
+            processed += op()
+            latencies.append(time.perf_counter() - start)
+
+        total = sum(latencies)
+        return {
+            "case": name,
+            "size": format_size(size),
+            "iterations": iterations,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "ops_per_s": iterations / total if total else 0.0,
+            "mb_per_s": processed / total / 1024 ** 2 if total else 0.0,
+            # ru_maxrss is reported in KB on Linux
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            **env.extra_stats(),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def run_isolated(name: str, size: int, args) -> Dict:
+    """Run a case in a fresh interpreter so peak RSS is attributable to it."""
+    command = [sys.executable, os.path.abspath(__file__), "--worker", "--cases", name,
+               "--sizes", str(size), "--iterations", str(args.iterations),
+               "--llm-latency", str(args.llm_latency), "--fixture-cache", args.fixture_cache,
+               "--seed", str(args.seed)]
+    proc = subprocess.run(command, capture_output=True, text=True)
+    for line in proc.stdout.splitlines():
+        if line.startswith("BENCH_RESULT "):
+            return json.loads(line[len("BENCH_RESULT "):])
+    error = (proc.stderr.strip().splitlines() or ["unknown error"])[-1]
+    return {"case": name, "size": format_size(size), "error": error}
+
+def compare(results: List[Dict], baseline_path: str, tolerance: float) -> List[Tuple[str, str, float, float]]:
+    """Return (key, metric, baseline, current) for every metric that regressed beyond tolerance."""
+    with open(baseline_path) as f:
+        baseline = {f"{r['case']}@{r['size']}": r for r in json.load(f)["results"]}
+
+    regressions = []
+    for result in results:
+        key = f"{result['case']}@{result['size']}"
+        if "error" in result or key not in baseline or "error" in baseline[key]:
+            continue
+        for metric in ("p50_ms", "p95_ms", "peak_rss_mb"):
+            before, after = baseline[key][metric], result[metric]
+            if before > 0 and after > before * (1 + tolerance):
+                regressions.append((key, metric, before, after))
+    return regressions
+
+def print_table(results: List[Dict]):
+    print(f"{'case':<28}{'size':>7}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'ops/s':>9}{'MB/s':>9}{'RSS MB':>9}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['case']:<28}{r['size']:>7}  error: {r['error']}")
+            continue
+        print(f"{r['case']:<28}{r['size']:>7}{r['p50_ms']:>11.1f}{r['p95_ms']:>11.1f}{r['p99_ms']:>11.1f}"
+              f"{r['ops_per_s']:>9.2f}{r['mb_per_s']:>9.1f}{r['peak_rss_mb']:>9.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the security report pipeline")
+    parser.add_argument("--cases", nargs="+", default=sorted(CASES), help="Cases to run (prefix match)")
+    parser.add_argument("--sizes", nargs="+", default=["1KB", "1MB"], help="Per-report fixture sizes, 1KB-500MB")
+    parser.add_argument("--iterations", type=int, default=5, help="Measured iterations per case")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Fake LLM latency per call in seconds")
+    parser.add_argument("--fixture-cache", default=DEFAULT_FIXTURE_CACHE, help="Where generated fixtures are kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-baseline", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Compare against a baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    names = [n for n in sorted(CASES) if any(n.startswith(c) for c in args.cases)]
+    sizes = [parse_size(s) for s in args.sizes]
+
+    if args.worker:
+        result = run_case(names[0], sizes[0], args.iterations, args.llm_latency, args.fixture_cache, args.seed)
+        print("BENCH_RESULT " + json.dumps(result))
+        return
+
+    results = [run_isolated(name, size, args) for size in sizes for name in names]
+    print_table(results)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, 'w') as f:
+            json.dump({"created": time.strftime('%Y-%m-%dT%H:%M:%S'), "llm_latency": args.llm_latency,
+                       "results": results}, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for key, metric, before, after in regressions:
+            print(f"REGRESSION {key} {metric}: {before:.1f} -> {after:.1f} (+{(after / before - 1) * 100:.0f}%)")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline")
+
+if __name__ == "__main__":
+    main()
@@ -1,111 +1,65 @@
-import json
+import io
+import re
 import argparse
 import os
+import shutil
 from datetime import datetime
-import markdown
-import matplotlib.pyplot as plt
-import numpy as np
-from fpdf import FPDF
-from jinja2 import Environment, FileSystemLoader
+from functools import lru_cache
+from reportkit import charts, instrumentation, model, scoring, shards
 
-class ReportGenerator:
-    def __init__(self, report_json_path):
-        """Initialize the report generator with the path to the JSON report."""
-        with open(report_json_path, 'r') as f:
-            self.report_data = json.load(f)
-        
-        self.now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        # Create output directory
-        self.output_dir = "generated-reports"
-        os.makedirs(self.output_dir, exist_ok=True)
-    
-    def _create_vulnerability_chart(self):
-        """Create a chart showing vulnerability distribution by severity."""
-        # Count vulnerabilities by severity
-        severity_counts = {"Critical": 0, "High": 0, "Medium": 0, "Low": 0, "Info": 0}
-        
-        for vuln in self.report_data.get("vulnerabilities", []):
-            severity = vuln.get("severity", "Info")
-            if severity in severity_counts:
-                severity_counts[severity] += 1
-        
-        # Create the chart
-        labels = list(severity_counts.keys())
-        values = list(severity_counts.values())
-        colors = ['darkred', 'red', 'orange', 'yellow', 'green']
-        
-        plt.figure(figsize=(10, 6))
-        bars = plt.bar(labels, values, color=colors)
-        
-        plt.title('Vulnerabilities by Severity')
-        plt.xlabel('Severity')
-        plt.ylabel('Count')
-        
-        # Add count labels on top of each bar
-        for bar in bars:
-            height = bar.get_height()
-            plt.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                    '%d' % int(height), ha='center', va='bottom')
-        
-        chart_path = os.path.join(self.output_dir, 'vulnerability_chart.png')
-        plt.savefig(chart_path)
-        plt.close()
-        
-        return chart_path
-    
-    def _create_risk_radar_chart(self):
-        """Create a radar chart showing risk areas."""
-        # Define risk categories and extract scores
-        categories = ['Injection', 'Authentication', 'Data Exposure', 'XSS', 'Access Control']
-        
-        # This would normally be calculated from the detailed report
-        # Here we're generating sample values based on vulnerabilities
-        scores = []
-        vuln_count = len(self.report_data.get("vulnerabilities", []))
-        
-        # Sample logic to generate risk scores
-        scores = [
-            min(10, sum(1 for v in self.report_data.get("vulnerabilities", []) if "SQL" in v.get("name", ""))),
-            min(10, sum(1 for v in self.report_data.get("vulnerabilities", []) if "auth" in v.get("name", "").lower())),
-            min(10, sum(1 for v in self.report_data.get("vulnerabilities", []) if "data" in v.get("name", "").lower())),
-            min(10, sum(1 for v in self.report_data.get("vulnerabilities", []) if "XSS" in v.get("name", ""))),
-            min(10, sum(1 for v in self.report_data.get("vulnerabilities", []) if "access" in v.get("name", "").lower()))
-        ]
-        
-        # Create the radar chart
-        angles = np.linspace(0, 2*np.pi, len(categories), endpoint=False).tolist()
-        angles += angles[:1]  # Close the loop
-        
-        scores += scores[:1]  # Close the loop
-        
-        fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True))
-        ax.plot(angles, scores, 'o-', linewidth=2)
-        ax.fill(angles, scores, alpha=0.25)
-        ax.set_thetagrids(np.degrees(angles[:-1]), categories)
-        
-        ax.set_ylim(0, 10)
-        ax.grid(True)
-        
-        plt.title('Security Risk Areas', size=15)
-        
-        chart_path = os.path.join(self.output_dir, 'risk_radar_chart.png')
-        plt.savefig(chart_path)
-        plt.close()
-        
-        return chart_path
-    
-    def generate_html_report(self):
-        """Generate an HTML report from the JSON data."""
-        # Create charts
-        vuln_chart = self._create_vulnerability_chart()
-        risk_chart = self._create_risk_radar_chart()
-        
-        # Set up Jinja2 environment
-        env = Environment(loader=FileSystemLoader('.'))
-        
-        # First, create the template file
-        html_template = """
+# Rendering dependencies (jinja2, fpdf, weasyprint, matplotlib) are imported inside the
+# methods that need them, so e.g. a Markdown-only run never pays for their import.
+
+# Row and badge colours used by the native PDF backend, mirroring the CSS classes
+# in the HTML template (.risk-* rows and .badge-* labels)
+PDF_ROW_COLORS = {
+    "critical": (255, 204, 204),
+    "high": (255, 221, 204),
+    "medium": (255, 255, 204),
+    "low": (204, 255, 204),
+}
+PDF_BADGE_COLORS = {
+    "critical": (217, 83, 79),
+    "high": (240, 173, 78),
+    "medium": (255, 215, 0),
+    "low": (92, 184, 92),
+    "info": (91, 192, 222),
+}
+
+PDF_BACKENDS = ("fpdf", "weasyprint")
+
+# single: one self-contained file; sharded: shell page plus finding shards loaded on demand
+HTML_MODES = ("single", "sharded")
+
+# Set REPORT_METRICS_SINK=jsonl to record per-format render timings
+tracer = instrumentation.configure(service="report-generator")
+
+def _pdf_text(value):
+    """Make a value safe for FPDF core fonts (latin-1 only, no markup)."""
+    if value is None:
+        return ""
+    text = re.sub(r'<[^>]+>', '', str(value))
+    return text.encode('latin-1', 'replace').decode('latin-1')
+
+@lru_cache(maxsize=None)
+def _security_report_pdf_class():
+    """Build the FPDF subclass for the native backend on first use."""
+    from fpdf import FPDF
+
+    class SecurityReportPDF(FPDF):
+        """FPDF document with the same footer as the HTML report."""
+
+        def footer(self):
+            self.set_y(-15)
+            self.set_font("helvetica", "I", 8)
+            self.set_text_color(119, 119, 119)
+            self.cell(0, 5, f"Generated by Security Assessment Platform - Page {self.page_no()}", align='C')
+            self.set_text_color(0, 0, 0)
+
+    return SecurityReportPDF
+
+# HTML report layout, compiled once per process by _html_template()
+HTML_TEMPLATE = """
         <!DOCTYPE html>
         <html lang="en">
         <head>
@@ -173,7 +127,8 @@ class ReportGenerator:
                     text-align: center;
                     margin: 20px 0;
                 }
-                .chart-container img {
+                .chart-container img,
+                .chart-container svg {
                     max-width: 100%;
                     height: auto;
                 }
@@ -210,6 +165,47 @@ class ReportGenerator:
                     padding: 15px;
                     border-left: 5px solid #5cb85c;
                 }
+                .findings-controls {
+                    display: flex;
+                    gap: 10px;
+                    margin: 20px 0 10px;
+                }
+                .findings-controls input {
+                    flex: 1;
+                    padding: 8px;
+                }
+                .findings-viewport {
+                    height: 480px;
+                    overflow-y: auto;
+                    position: relative;
+                    border: 1px solid #ddd;
+                    background-color: white;
+                }
+                .findings-row {
+                    position: absolute;
+                    left: 0;
+                    right: 0;
+                    height: 40px;
+                    display: grid;
+                    grid-template-columns: 18% 37% 15% 30%;
+                    align-items: center;
+                    padding: 0 12px;
+                    box-sizing: border-box;
+                    border-bottom: 1px solid #ddd;
+                    white-space: nowrap;
+                    cursor: pointer;
+                }
+                .findings-row span {
+                    overflow: hidden;
+                    text-overflow: ellipsis;
+                    padding-right: 8px;
+                }
+                .findings-header {
+                    position: static;
+                    background-color: #f2f2f2;
+                    font-weight: bold;
+                    cursor: default;
+                }
             </style>
         </head>
         <body>
@@ -229,15 +225,34 @@ class ReportGenerator:
                 
                 <div class="chart-container">
                     <h3>Vulnerability Distribution</h3>
-                    <img src="{{ vuln_chart_path }}" alt="Vulnerability Distribution">
+                    {{ vuln_chart | safe }}
                 </div>
                 
                 <div class="chart-container">
                     <h3>Risk Assessment by Category</h3>
-                    <img src="{{ risk_chart_path }}" alt="Risk Radar Chart">
+                    {{ risk_chart | safe }}
                 </div>
                 
                 <h2>Vulnerabilities</h2>
+                {% if manifest %}
+                <div class="findings-controls">
+                    <input id="findings-search" type="search" placeholder="Search ID, name, component, CWE...">
+                    <select id="findings-severity">
+                        <option value="">All severities</option>
+                        {% for severity, count in manifest.severity_counts.items() %}
+                        <option value="{{ severity }}">{{ severity }} ({{ count }})</option>
+                        {% endfor %}
+                    </select>
+                </div>
+                <p id="findings-status"></p>
+                <div class="findings-row findings-header">
+                    <span>ID</span><span>Name</span><span>Severity</span><span>Affected Component</span>
+                </div>
+                <div id="findings-viewport" class="findings-viewport">
+                    <div id="findings-spacer"></div>
+                </div>
+                <div id="findings-detail" class="vulnerability-detail"></div>
+                {% else %}
                 <table>
                     <thead>
                         <tr>
@@ -260,6 +275,7 @@ class ReportGenerator:
                         {% endfor %}
                     </tbody>
                 </table>
+                {% endif %}
                 
                 <h2>Good Security Practices</h2>
                 <div class="good-practices">
@@ -284,6 +300,7 @@ class ReportGenerator:
                     {{ report.detailed_analysis | safe }}
                 </div>
                 
+                {% if not manifest %}
                 <h2>Vulnerability Details</h2>
                 {% for vuln in report.vulnerabilities %}
                 <div class="vulnerability-detail">
@@ -297,6 +314,7 @@ class ReportGenerator:
                     </div>
                 </div>
                 {% endfor %}
+                {% endif %}
                 
             </div>
             
@@ -304,34 +322,334 @@ class ReportGenerator:
                 <p>Generated by Security Assessment Platform</p>
                 <p>© {{ current_year }} - All rights reserved</p>
             </div>
+            {% if manifest %}
+            <script type="application/json" id="findings-manifest">{{ manifest | tojson }}</script>
+            <script>{{ viewer_script | safe }}</script>
+            {% endif %}
         </body>
         </html>
         """
+
+# Client side of the sharded HTML report (reportkit.shards): fetches finding shards and
+# search buckets on demand and only builds DOM rows for the visible part of the list
+FINDINGS_VIEWER_SCRIPT = """
+(function () {
+    "use strict";
+    var manifest = JSON.parse(document.getElementById("findings-manifest").textContent);
+    var FIELD = {};
+    manifest.fields.forEach(function (name, i) { FIELD[name] = i; });
+    var ROW_HEIGHT = 40, OVERSCAN = 10, MAX_SHARDS = 16;
+    var viewport = document.getElementById("findings-viewport");
+    var spacer = document.getElementById("findings-spacer");
+    var status = document.getElementById("findings-status");
+    var detail = document.getElementById("findings-detail");
+    var search = document.getElementById("findings-search");
+    var severity = document.getElementById("findings-severity");
+    var shards = new Map();   // shard index -> {rows, promise}, least recently used first
+    var indexes = new Map();  // search bucket -> promise of {token: ordinal gaps}
+    var view = null;          // ordinals matching the filters, null for all findings
+    var frame = 0, query = 0, typing = 0;
+
+    function loadJson(url) {
+        return fetch(url).then(function (response) {
+            if (!response.ok) throw new Error(url + ": HTTP " + response.status);
+            return response.arrayBuffer();
+        }).then(function (buffer) {
+            var bytes = new Uint8Array(buffer);
+            // Served with Content-Encoding: gzip the browser has already inflated it
+            if (bytes[0] === 0x1f && bytes[1] === 0x8b) {
+                var stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+                return new Response(stream).json();
+            }
+            return JSON.parse(new TextDecoder().decode(bytes));
+        });
+    }
+
+    function failed(error) {
+        status.textContent = "Could not load findings: " + error.message;
+    }
+
+    function shard(index) {
+        var entry = shards.get(index);
+        if (entry) {
+            shards.delete(index);
+        } else {
+            entry = {rows: null};
+            var name = "shards/findings-" + String(index).padStart(5, "0") + ".json.gz";
+            entry.promise = loadJson(name).then(function (rows) { entry.rows = rows; });
+            entry.promise.then(schedule, failed);
+        }
+        shards.set(index, entry);
+        while (shards.size > MAX_SHARDS) shards.delete(shards.keys().next().value);
+        return entry;
+    }
+
+    function row(ordinal) {
+        if (ordinal < manifest.first_page.length) return manifest.first_page[ordinal];
+        var entry = shard(Math.floor(ordinal / manifest.shard_size));
+        return entry.rows ? entry.rows[ordinal % manifest.shard_size] : null;
+    }
+
+    function cell(text, className) {
+        var span = document.createElement("span");
+        if (className) span.className = className;
+        span.textContent = text == null ? "N/A" : text;
+        return span;
+    }
+
+    function rowElement(position, values) {
+        var element = document.createElement("div");
+        element.style.top = position * ROW_HEIGHT + "px";
+        element.className = "findings-row";
+        if (!values) {
+            element.appendChild(cell("Loading..."));
+            return element;
+        }
+        var level = String(values[FIELD.severity]).toLowerCase();
+        element.className += " risk-" + level;
+        element.appendChild(cell(values[FIELD.id]));
+        element.appendChild(cell(values[FIELD.name]));
+        var badge = document.createElement("span");
+        badge.appendChild(cell(values[FIELD.severity], "badge badge-" + level));
+        element.appendChild(badge);
+        element.appendChild(cell(values[FIELD.affected_component]));
+        element.addEventListener("click", function () { showDetail(values); });
+        return element;
+    }
+
+    function showDetail(values) {
+        detail.textContent = "";
+        var title = document.createElement("h3");
+        title.textContent = values[FIELD.name] + " ";
+        title.appendChild(cell(values[FIELD.severity], "badge badge-" + String(values[FIELD.severity]).toLowerCase()));
+        detail.appendChild(title);
+        [["ID", "id"], ["Affected Component", "affected_component"], ["Tool", "tool"], ["CVSS", "cvss"],
+         ["Known exploited", "kev"], ["CWE", "cwe"], ["Fixed in", "fixed_in"], ["Description", "description"],
+         ["Remediation", "remediation"]].forEach(function (item) {
+            var value = values[FIELD[item[1]]];
+            if (value == null) return;
+            var line = document.createElement("p");
+            var label = document.createElement("strong");
+            label.textContent = item[0] + ": ";
+            line.appendChild(label);
+            line.appendChild(document.createTextNode(value === true ? "yes" : value));
+            detail.appendChild(line);
+        });
+        detail.scrollIntoView({block: "nearest"});
+    }
+
+    function count() {
+        return view ? view.length : manifest.total;
+    }
+
+    function render() {
+        frame = 0;
+        var total = count();
+        spacer.style.height = total * ROW_HEIGHT + "px";
+        var first = Math.max(0, Math.floor(viewport.scrollTop / ROW_HEIGHT) - OVERSCAN);
+        var last = Math.min(total, Math.ceil((viewport.scrollTop + viewport.clientHeight) / ROW_HEIGHT) + OVERSCAN);
+        var fragment = document.createDocumentFragment();
+        for (var i = first; i < last; i++) {
+            fragment.appendChild(rowElement(i, row(view ? view[i] : i)));
+        }
+        spacer.textContent = "";
+        spacer.appendChild(fragment);
+    }
+
+    function schedule() {
+        if (!frame) frame = requestAnimationFrame(render);
+    }
+
+    function decode(gaps) {
+        var ordinals = new Array(gaps.length), value = 0;
+        for (var i = 0; i < gaps.length; i++) ordinals[i] = value += gaps[i];
+        return ordinals;
+    }
+
+    function intersect(a, b) {
+        var out = [], i = 0, j = 0;
+        while (i < a.length && j < b.length) {
+            if (a[i] < b[j]) i++;
+            else if (a[i] > b[j]) j++;
+            else { out.push(a[i]); i++; j++; }
+        }
+        return out;
+    }
+
+    function searchIndex(name) {
+        if (!indexes.has(name)) indexes.set(name, loadJson("search/" + name + ".json.gz"));
+        return indexes.get(name);
+    }
+
+    // Ordinals of findings with a token starting with the term
+    function matches(term) {
+        var name = term.charAt(0);
+        if (manifest.search_buckets.indexOf(name) < 0) return Promise.resolve([]);
+        return searchIndex(name).then(function (tokens) {
+            var found = new Set();
+            Object.keys(tokens).forEach(function (token) {
+                if (token.lastIndexOf(term, 0) === 0) decode(tokens[token]).forEach(function (o) { found.add(o); });
+            });
+            return Array.from(found).sort(function (a, b) { return a - b; });
+        });
+    }
+
+    function showCount() {
+        status.textContent = count().toLocaleString() + " of " + manifest.total.toLocaleString() + " findings";
+        viewport.scrollTop = 0;
+        schedule();
+    }
+
+    function applyFilters() {
+        var current = ++query;
+        var lists = (search.value.toLowerCase().match(/[a-z0-9]{2,}/g) || []).map(matches);
+        if (severity.value) {
+            lists.push(searchIndex("severity").then(function (index) { return decode(index[severity.value] || []); }));
+        }
+        if (!lists.length) {
+            view = null;
+            showCount();
+            return;
+        }
+        status.textContent = "Searching...";
+        Promise.all(lists).then(function (results) {
+            if (current !== query) return;
+            view = results.reduce(intersect);
+            showCount();
+        }, failed);
+    }
+
+    spacer.style.position = "relative";
+    viewport.addEventListener("scroll", schedule, {passive: true});
+    window.addEventListener("resize", schedule);
+    search.addEventListener("input", function () {
+        clearTimeout(typing);
+        typing = setTimeout(applyFilters, 150);
+    });
+    severity.addEventListener("change", applyFilters);
+    showCount();
+})();
+"""
+
+@lru_cache(maxsize=None)
+def _html_template():
+    """Compile the HTML report template (jinja2 is imported on first use)."""
+    from jinja2 import Environment
+    return Environment().from_string(HTML_TEMPLATE)
+
+class ReportGenerator:
+    def __init__(self, report_json_path, chart_format="svg", chart_renderer="builtin",
+                 output_dir="generated-reports"):
+        """Initialize the report generator with the path to the JSON or NDJSON report.
+        
+        ``chart_format`` selects how charts are embedded in HTML: inline SVG or PNG data URIs.
+        ``chart_renderer`` selects the pure-Python SVG renderer or matplotlib; PNG output
+        always uses matplotlib.
+        """
+        if chart_format not in charts.CHART_FORMATS:
+            raise ValueError(f"Unknown chart format: {chart_format}")
+        if chart_renderer not in charts.CHART_RENDERERS:
+            raise ValueError(f"Unknown chart renderer: {chart_renderer}")
+        self.chart_format = chart_format
+        self.chart_renderer = chart_renderer
+        
+        self.report = model.load_report(report_json_path)
+        
+        self.now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
+        # Create output directory
+        self.output_dir = output_dir
+        os.makedirs(self.output_dir, exist_ok=True)
+    
+    @tracer.traced("render.chart.severity", kind="render")
+    def _create_vulnerability_chart(self, fmt=None):
+        """Render the vulnerability distribution chart in memory."""
+        counts = charts.severity_counts(self.report.vulnerabilities)
+        return charts.severity_chart(counts, fmt or self.chart_format, self.chart_renderer)
+    
+    @tracer.traced("render.chart.risk_radar", kind="render")
+    def _create_risk_radar_chart(self, fmt=None):
+        """Render the risk areas radar chart in memory."""
+        # Scores stored by the analysis; older reports are scored from their findings
+        scores = scoring.report_assessment(self.report).radar()
+        return charts.risk_radar_chart(scores, fmt or self.chart_format, self.chart_renderer)
+    
+    @tracer.traced("render.html", kind="render")
+    def generate_html_report(self, mode="single", shard_size=shards.SHARD_SIZE):
+        """Generate an HTML report from the JSON data.
+        
+        ``single`` writes one self-contained file. ``sharded`` writes a directory
+        with a small shell page plus compressed finding shards and a search index
+        that the page loads on demand (see reportkit.shards). The shell must be
+        served over HTTP(S), e.g. from S3, since browsers block fetches from file:// pages.
+        """
+        if mode not in HTML_MODES:
+            raise ValueError(f"Unknown HTML mode: {mode}")
+        # Create charts, embedded inline so the report is a single relocatable file
+        vuln_chart = charts.inline_html(self._create_vulnerability_chart(), self.chart_format,
+                                        "Vulnerability Distribution")
+        risk_chart = charts.inline_html(self._create_risk_radar_chart(), self.chart_format,
+                                        "Risk Radar Chart")
         
         # Write the template to a file
         with open(os.path.join(self.output_dir, 'report_template.html'), 'w') as f:
-            f.write(html_template)
+            f.write(HTML_TEMPLATE)
         
-        # Load the template
-        template = env.from_string(html_template)
+        # Compiled once per process
+        template = _html_template()
+        
+        manifest = None
+        html_report_path = os.path.join(self.output_dir, 'security_report.html')
+        if mode == "sharded":
+            report_dir = os.path.join(self.output_dir, 'security_report')
+            # Shards of an earlier, larger report would linger next to the new ones
+            for name in ("shards", "search"):
+                shutil.rmtree(os.path.join(report_dir, name), ignore_errors=True)
+            with tracer.span("render.html.shards", kind="render") as span:
+                manifest = shards.write_shards(self.report.vulnerabilities, report_dir, shard_size)
+                span.add(bytes=manifest.pop("bytes"))
+                span.set(shards=manifest["shards"])
+            html_report_path = os.path.join(report_dir, 'index.html')
         
         # Render the template with the report data
         html_content = template.render(
-            report=self.report_data,
+            report=self.report,
             generation_date=self.now,
             current_year=datetime.now().year,
-            vuln_chart_path="vulnerability_chart.png",
-            risk_chart_path="risk_radar_chart.png"
+            vuln_chart=vuln_chart,
+            risk_chart=risk_chart,
+            manifest=manifest,
+            viewer_script=FINDINGS_VIEWER_SCRIPT
         )
         
         # Write the HTML report to a file
-        html_report_path = os.path.join(self.output_dir, 'security_report.html')
         with open(html_report_path, 'w') as f:
             f.write(html_content)
+        instrumentation.current_span().add(bytes=len(html_content))
         
         return html_report_path
     
-    def generate_pdf_report(self):
+    @tracer.traced("render.pdf", kind="render")
+    def generate_pdf_report(self, backend="fpdf"):
+        """Generate a PDF report with the selected backend.
+        
+        ``fpdf`` builds the document directly from the report data; ``weasyprint``
+        renders the HTML report and converts it.
+        """
+        if backend not in PDF_BACKENDS:
+            raise ValueError(f"Unknown PDF backend: {backend}. Choose one of {', '.join(PDF_BACKENDS)}")
+        
+        span = instrumentation.current_span()
+        span.set(backend=backend)
+        if backend == "weasyprint":
+            pdf_path = self._generate_pdf_weasyprint()
+        else:
+            pdf_path = self._generate_pdf_fpdf()
+        span.add(bytes=os.path.getsize(pdf_path))
+        
+        return pdf_path
+    
+    def _generate_pdf_weasyprint(self):
         """Generate a PDF report from the HTML report."""
         from weasyprint import HTML
         
@@ -344,6 +662,131 @@ class ReportGenerator:
         
         return pdf_path
     
+    def _generate_pdf_fpdf(self):
+        """Generate a PDF report directly from the JSON data with FPDF."""
+        pdf = _security_report_pdf_class()(format='A4')
+        pdf.set_auto_page_break(auto=True, margin=20)
+        pdf.set_left_margin(20)
+        pdf.set_right_margin(20)
+        pdf.add_page()
+        
+        # Header
+        pdf.set_fill_color(44, 62, 80)
+        pdf.set_text_color(255, 255, 255)
+        pdf.set_font("helvetica", "B", 18)
+        pdf.cell(0, 14, "Security Assessment Report", new_x="LMARGIN", new_y="NEXT", fill=True)
+        pdf.set_font("helvetica", "", 10)
+        pdf.cell(0, 8, f"Generated on: {self.now}", new_x="LMARGIN", new_y="NEXT", fill=True)
+        pdf.set_text_color(0, 0, 0)
+        pdf.ln(6)
+        
+        # Executive summary
+        self._pdf_heading(pdf, "Executive Summary")
+        pdf.set_font("helvetica", "", 11)
+        summary = self.report.summary or 'No summary available.'
+        pdf.multi_cell(0, 6, _pdf_text(summary), new_x="LMARGIN", new_y="NEXT")
+        pdf.ln(2)
+        pdf.set_font("helvetica", "B", 11)
+        pdf.cell(pdf.get_string_width("Overall Risk Level: ") + 1, 7, "Overall Risk Level: ")
+        self._pdf_badge(pdf, self.report.risk_level)
+        pdf.ln(10)
+        
+        # Charts, rendered in memory (FPDF embeds PNG)
+        for title, create_chart in (("Vulnerability Distribution", self._create_vulnerability_chart),
+                                    ("Risk Assessment by Category", self._create_risk_radar_chart)):
+            self._pdf_heading(pdf, title, size=12)
+            width = 120
+            pdf.image(io.BytesIO(create_chart(fmt="png")), x=(pdf.w - width) / 2, w=width)
+            pdf.ln(4)
+        
+        # Vulnerabilities table
+        pdf.add_page()
+        self._pdf_heading(pdf, "Vulnerabilities")
+        columns = (("ID", 25), ("Name", 65), ("Severity", 25), ("Affected Component", 55))
+        pdf.set_font("helvetica", "B", 10)
+        pdf.set_fill_color(242, 242, 242)
+        for label, width in columns:
+            pdf.cell(width, 8, label, border='B', fill=True)
+        pdf.ln()
+        pdf.set_font("helvetica", "", 10)
+        for vuln in self.report.vulnerabilities:
+            pdf.set_fill_color(*PDF_ROW_COLORS.get(vuln.severity.lower(), (255, 255, 255)))
+            values = (vuln.id or 'N/A', vuln.name, vuln.severity, vuln.affected_component or 'N/A')
+            for (_, width), value in zip(columns, values):
+                pdf.cell(width, 7, self._pdf_fit(pdf, value, width), border='B', fill=True)
+            pdf.ln()
+        pdf.ln(6)
+        
+        # Good practices and recommendations
+        self._pdf_bullets(pdf, "Good Security Practices", self.report.good_practices, (223, 240, 216))
+        self._pdf_bullets(pdf, "Recommendations", self.report.recommendations, (232, 244, 248))
+        
+        # Detailed analysis
+        self._pdf_heading(pdf, "Detailed Analysis")
+        pdf.set_font("helvetica", "", 11)
+        detailed_analysis = self.report.detailed_analysis or 'No detailed analysis available.'
+        pdf.multi_cell(0, 6, _pdf_text(detailed_analysis), new_x="LMARGIN", new_y="NEXT")
+        pdf.ln(6)
+        
+        # Vulnerability details
+        self._pdf_heading(pdf, "Vulnerability Details")
+        for vuln in self.report.vulnerabilities:
+            pdf.set_font("helvetica", "B", 12)
+            pdf.multi_cell(0, 7, _pdf_text(vuln.name), new_x="LMARGIN", new_y="NEXT")
+            self._pdf_badge(pdf, vuln.severity)
+            pdf.ln(9)
+            for label, value in (("ID", vuln.id or 'N/A'),
+                                 ("Affected Component", vuln.affected_component or 'N/A'),
+                                 ("Description", vuln.description or 'No description available.'),
+                                 ("Remediation", vuln.remediation or 'No remediation steps available.')):
+                pdf.set_font("helvetica", "B", 10)
+                pdf.cell(0, 6, f"{label}:", new_x="LMARGIN", new_y="NEXT")
+                pdf.set_font("helvetica", "", 10)
+                pdf.multi_cell(0, 5, _pdf_text(value), new_x="LMARGIN", new_y="NEXT")
+            pdf.ln(4)
+        
+        pdf_path = os.path.join(self.output_dir, 'security_report.pdf')
+        pdf.output(pdf_path)
+        
+        return pdf_path
+    
+    def _pdf_heading(self, pdf, text, size=15):
+        """Add a section heading to the native PDF."""
+        pdf.set_font("helvetica", "B", size)
+        pdf.cell(0, 10, _pdf_text(text), new_x="LMARGIN", new_y="NEXT")
+        pdf.ln(1)
+    
+    def _pdf_badge(self, pdf, severity):
+        """Add a coloured severity badge at the current position."""
+        label = _pdf_text(severity)
+        pdf.set_font("helvetica", "B", 10)
+        pdf.set_fill_color(*PDF_BADGE_COLORS.get(label.lower(), (119, 119, 119)))
+        if label.lower() == "medium":
+            pdf.set_text_color(51, 51, 51)
+        else:
+            pdf.set_text_color(255, 255, 255)
+        pdf.cell(pdf.get_string_width(label) + 6, 7, label, fill=True, align='C')
+        pdf.set_text_color(0, 0, 0)
+    
+    def _pdf_bullets(self, pdf, title, items, fill_color):
+        """Add a titled, shaded bullet list to the native PDF."""
+        self._pdf_heading(pdf, title)
+        pdf.set_font("helvetica", "", 11)
+        pdf.set_fill_color(*fill_color)
+        for item in items:
+            pdf.multi_cell(0, 6, f"- {_pdf_text(item)}", fill=True, new_x="LMARGIN", new_y="NEXT")
+        pdf.ln(6)
+    
+    def _pdf_fit(self, pdf, value, width):
+        """Truncate a table cell value so it fits within the column width."""
+        text = _pdf_text(value)
+        if pdf.get_string_width(text) <= width - 2:
+            return text
+        while text and pdf.get_string_width(text + "...") > width - 2:
+            text = text[:-1]
+        return text + "..."
+    
+    @tracer.traced("render.markdown", kind="render")
     def generate_markdown_report(self):
         """Generate a Markdown report from the JSON data."""
         # Create a markdown template
@@ -354,9 +797,9 @@ class ReportGenerator:
 
 ## Executive Summary
 
-{self.report_data.get('summary', 'No summary available.')}
+{self.report.summary or 'No summary available.'}
 
-**Overall Risk Level:** {self.report_data.get('risk_level', 'Unknown')}
+**Overall Risk Level:** {self.report.risk_level}
 
 ## Vulnerabilities
 
@@ -365,61 +808,75 @@ class ReportGenerator:
 """
         
         # Add vulnerability rows
-        for vuln in self.report_data.get('vulnerabilities', []):
-            md_content += f"| {vuln.get('id', 'N/A')} | {vuln.get('name', 'N/A')} | {vuln.get('severity', 'N/A')} | {vuln.get('affected_component', 'N/A')} |\n"
+        for vuln in self.report.vulnerabilities:
+            md_content += f"| {vuln.id or 'N/A'} | {vuln.name} | {vuln.severity} | {vuln.affected_component or 'N/A'} |\n"
         
         # Add good practices
         md_content += "\n## Good Security Practices\n\n"
-        for practice in self.report_data.get('good_practices', []):
+        for practice in self.report.good_practices:
             md_content += f"- {practice}\n"
         
         # Add recommendations
         md_content += "\n## Recommendations\n\n"
-        for recommendation in self.report_data.get('recommendations', []):
+        for recommendation in self.report.recommendations:
             md_content += f"- {recommendation}\n"
         
         # Add detailed analysis
-        md_content += f"\n## Detailed Analysis\n\n{self.report_data.get('detailed_analysis', 'No detailed analysis available.')}\n"
+        md_content += f"\n## Detailed Analysis\n\n{self.report.detailed_analysis or 'No detailed analysis available.'}\n"
         
         # Add vulnerability details
         md_content += "\n## Vulnerability Details\n\n"
-        for vuln in self.report_data.get('vulnerabilities', []):
-            md_content += f"### {vuln.get('name', 'Unknown Vulnerability')}\n\n"
-            md_content += f"**ID:** {vuln.get('id', 'N/A')}\n\n"
-            md_content += f"**Severity:** {vuln.get('severity', 'N/A')}\n\n"
-            md_content += f"**Affected Component:** {vuln.get('affected_component', 'N/A')}\n\n"
-            md_content += f"**Description:** {vuln.get('description', 'No description available.')}\n\n"
-            md_content += f"**Remediation:** {vuln.get('remediation', 'No remediation steps available.')}\n\n"
+        for vuln in self.report.vulnerabilities:
+            md_content += f"### {vuln.name}\n\n"
+            md_content += f"**ID:** {vuln.id or 'N/A'}\n\n"
+            md_content += f"**Severity:** {vuln.severity}\n\n"
+            md_content += f"**Affected Component:** {vuln.affected_component or 'N/A'}\n\n"
+            md_content += f"**Description:** {vuln.description or 'No description available.'}\n\n"
+            md_content += f"**Remediation:** {vuln.remediation or 'No remediation steps available.'}\n\n"
         
         # Write the markdown report to a file
         md_report_path = os.path.join(self.output_dir, 'security_report.md')
         with open(md_report_path, 'w') as f:
             f.write(md_content)
+        instrumentation.current_span().add(bytes=len(md_content))
         
         return md_report_path
 
 def main():
     parser = argparse.ArgumentParser(description="Security Report Generator")
-    parser.add_argument("--report-json", required=True, help="Path to the JSON security report")
+    parser.add_argument("--report-json", required=True, help="Path to the JSON or NDJSON security report")
     parser.add_argument("--format", choices=["html", "pdf", "markdown", "all"], default="all", help="Report format to generate")
+    parser.add_argument("--chart-format", choices=charts.CHART_FORMATS, default="svg",
+                        help="How charts are embedded in HTML: inline SVG or PNG data URIs")
+    parser.add_argument("--chart-renderer", choices=charts.CHART_RENDERERS, default="builtin",
+                        help="Render SVG charts in pure Python ('builtin') or with matplotlib")
+    parser.add_argument("--pdf-backend", choices=PDF_BACKENDS, default="fpdf",
+                        help="PDF backend: 'fpdf' builds the PDF natively, 'weasyprint' converts the HTML report")
+    parser.add_argument("--html-mode", choices=HTML_MODES, default="single",
+                        help="HTML as one file, or a shell page with findings in shards loaded on demand "
+                             "(for large reports; serve it over HTTP)")
+    parser.add_argument("--shard-size", type=int, default=shards.SHARD_SIZE,
+                        help="Findings per shard in sharded HTML mode")
     
     args = parser.parse_args()
     
     # Initialize the report generator
-    report_generator = ReportGenerator(args.report_json)
+    report_generator = ReportGenerator(args.report_json, chart_format=args.chart_format,
+                                       chart_renderer=args.chart_renderer)
     
     # Generate the requested report format(s)
     if args.format == "html" or args.format == "all":
-        html_path = report_generator.generate_html_report()
+        html_path = report_generator.generate_html_report(mode=args.html_mode, shard_size=args.shard_size)
         print(f"HTML report generated: {html_path}")
     
     if args.format == "pdf" or args.format == "all":
         try:
-            pdf_path = report_generator.generate_pdf_report()
+            pdf_path = report_generator.generate_pdf_report(backend=args.pdf_backend)
             print(f"PDF report generated: {pdf_path}")
         except Exception as e:
             print(f"Error generating PDF report: {e}")
-            print("PDF generation requires WeasyPrint. Install with: pip install weasyprint")
+            if args.pdf_backend == "weasyprint":
+                print("The weasyprint backend requires WeasyPrint. Install with: pip install weasyprint")
     
     if args.format == "markdown" or args.format == "all":
         md_path = report_generator.generate_markdown_report()
@@ -0,0 +1,134 @@
+"""Content-addressed blob store for passing large payloads by reference.
+
+Pipeline state keeps small handles instead of full report and analysis text.
+A handle is a dict with the digest, the size and, for payloads that still
+live in S3, the bucket and key. Content is held in an LRU-bounded in-memory cache.
+Blobs evicted from memory spill to files under ``/tmp`` and are read back on
+demand; the spill directory is created with the first spill. Handles that only name an S3 object are fetched when
+first needed. ``peak_memory_bytes`` and the spill counters show how much memory
+the payloads actually needed.
+
+Configuration comes from the environment:
+
+* ``REPORT_PAYLOADS``: ``inline`` (default) or ``ref`` to pass payloads by handle
+* ``REPORT_BLOB_MEMORY_MB``: in-memory cache bound before spilling (default 16)
+* ``REPORT_BLOB_SPILL_DIR``: parent directory for spill files
+"""
+import os
+import shutil
+import hashlib
+import tempfile
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Union
+
+Ref = Dict[str, Any]
+
+def is_ref(value: Any) -> bool:
+    return isinstance(value, dict) and ("blob" in value or "key" in value) and "size" in value
+
+class BlobStore:
+    def __init__(self, memory_limit: int = 16 * 1024 * 1024, spill_dir: Optional[str] = None,
+                 fetch: Optional[Callable[[Ref], bytes]] = None):
+        """``fetch`` loads content for handles that only point at a source object (e.g. an S3 key)."""
+        self.memory_limit = memory_limit
+        self.fetch = fetch
+        self._spill_root = spill_dir
+        self._spill_dir: Optional[str] = None
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._spilled: Dict[str, str] = {}
+        self.memory_bytes = 0
+        self.peak_memory_bytes = 0
+        self.spills = 0
+        self.spill_bytes = 0
+        self.spill_reads = 0
+        self.fetches = 0
+
+    def _spill(self, digest: str, data: bytes):
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="blobs-", dir=self._spill_root)
+        path = os.path.join(self._spill_dir, digest)
+        with open(path, 'wb') as f:
+            f.write(data)
+        self._spilled[digest] = path
+        self.spills += 1
+        self.spill_bytes += len(data)
+
+    def _remember(self, digest: str, data: bytes):
+        if len(data) > self.memory_limit:
+            # Larger than the whole cache: straight to disk
+            if digest not in self._spilled:
+                self._spill(digest, data)
+            return
+        if digest in self._memory:
+            self._memory.move_to_end(digest)
+            return
+        self._memory[digest] = data
+        self.memory_bytes += len(data)
+        self.peak_memory_bytes = max(self.peak_memory_bytes, self.memory_bytes)
+        while self.memory_bytes > self.memory_limit:
+            evicted_digest, evicted = self._memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+            if evicted_digest not in self._spilled:
+                self._spill(evicted_digest, evicted)
+
+    def put(self, data: Union[bytes, str], **meta: Any) -> Ref:
+        """Store content and return its handle; extra ``meta`` is kept on the handle."""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        self._remember(digest, data)
+        return dict(meta, blob=digest, size=len(data))
+
+    def reference(self, size: int, **source: Any) -> Ref:
+        """Handle for content that stays at its source until read (needs ``fetch``)."""
+        return dict(source, blob=None, size=size)
+
+    def get(self, ref: Ref) -> bytes:
+        digest = ref.get("blob")
+        if digest in self._memory:
+            self._memory.move_to_end(digest)
+            return self._memory[digest]
+        if digest in self._spilled:
+            self.spill_reads += 1
+            with open(self._spilled[digest], 'rb') as f:
+                data = f.read()
+            self._remember(digest, data)
+            return data
+        if self.fetch is None:
+            raise KeyError(f"Blob not found: {digest or ref}")
+        # Source-backed handles are read on demand and not cached: each is consumed once
+        self.fetches += 1
+        return self.fetch(ref)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "memory_bytes": self.memory_bytes,
+            "peak_memory_bytes": self.peak_memory_bytes,
+            "spills": self.spills,
+            "spill_bytes": self.spill_bytes,
+            "spill_reads": self.spill_reads,
+            "fetches": self.fetches,
+        }
+
+    def clear(self):
+        """Drop all blobs and spill files, e.g. at the end of an invocation."""
+        self._memory.clear()
+        self._spilled.clear()
+        self.memory_bytes = 0
+        self.peak_memory_bytes = 0
+        self.spills = self.spill_bytes = self.spill_reads = self.fetches = 0
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+
+def configure(fetch: Optional[Callable[[Ref], bytes]] = None, default_spill_dir: Optional[str] = None,
+              default_mode: str = "inline") -> Optional[BlobStore]:
+    """Blob store from REPORT_PAYLOADS / REPORT_BLOB_* environment variables, or None for inline payloads."""
+    mode = os.environ.get("REPORT_PAYLOADS", default_mode).lower()
+    if mode == "inline":
+        return None
+    if mode != "ref":
+        raise ValueError(f"Unknown REPORT_PAYLOADS: {mode}")
+    memory_limit = int(float(os.environ.get("REPORT_BLOB_MEMORY_MB", "16")) * 1024 * 1024)
+    spill_dir = os.environ.get("REPORT_BLOB_SPILL_DIR") or default_spill_dir
+    return BlobStore(memory_limit=memory_limit, spill_dir=spill_dir, fetch=fetch)
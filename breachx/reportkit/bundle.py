@@ -0,0 +1,241 @@
+"""Single-file scan bundles with an index header and per-member compression.
+
+A bundle is a plain tar archive. Its first member, ``index.json``, lists every
+other member with its offset, compressed size, raw size and checksum, and
+carries the scan manifest (``summary.json``). Each member is compressed on its
+own (gzip by default, or zstd with the ``zstandard`` package), so a reader
+only fetches the index plus the byte ranges it needs. For S3 that means one
+ranged GET for the header and one per member, without downloading the whole
+bundle. Bundles remain valid tar files: ``tar -xf`` gives the compressed members.
+
+Usage:
+    index = write_bundle("/reports", "/tmp/scan.bundle.tar")
+    reader = BundleReader.from_s3(s3, bucket, "reports/1700000000/scan.bundle.tar")
+    nmap = reader.read("nmap/report.txt")
+"""
+import io
+import os
+import gzip
+import json
+import tarfile
+import hashlib
+import tempfile
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+BUNDLE_NAME = "scan.bundle.tar"
+INDEX_NAME = "index.json"
+FORMAT = "breachx-bundle"
+VERSION = 1
+CODECS = ("gzip", "zstd")
+
+BLOCK = tarfile.BLOCKSIZE
+HEADER_PROBE = 64 * 1024  # first ranged read; usually covers header + index
+CHUNK_SIZE = 1024 * 1024
+
+def _padded(size: int) -> int:
+    return (size + BLOCK - 1) // BLOCK * BLOCK
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd bundles need the 'zstandard' package (pip install zstandard)") from None
+    return zstandard
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        # mtime=0 keeps bundles byte-identical for identical input
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if codec == "zstd":
+        return _zstd().ZstdCompressor(level=10).compress(data)
+    raise ValueError(f"Unknown bundle codec: {codec}")
+
+def _compress_file(path: str, codec: str, out) -> Tuple[int, str]:
+    """Compress a file into ``out`` chunk by chunk; return its raw size and sha256."""
+    if codec == "gzip":
+        # Same settings as compress(); an empty filename keeps the temp file's name out of the header
+        writer = gzip.GzipFile(filename="", mode="wb", compresslevel=6, fileobj=out, mtime=0)
+    elif codec == "zstd":
+        # The declared size goes in the frame header, which ZstdDecompressor.decompress needs
+        writer = _zstd().ZstdCompressor(level=10).stream_writer(out, size=os.path.getsize(path), closefd=False)
+    else:
+        raise ValueError(f"Unknown bundle codec: {codec}")
+    digest = hashlib.sha256()
+    raw_size = 0
+    with open(path, 'rb') as f, writer:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            raw_size += len(chunk)
+            writer.write(chunk)
+    return raw_size, digest.hexdigest()
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "zstd":
+        return _zstd().ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown bundle codec: {codec}")
+
+def _member_suffix(codec: str) -> str:
+    return ".zst" if codec == "zstd" else ".gz"
+
+def _tar_name(name: str, position: int, codec: str) -> str:
+    """Member path inside the tar; names too long for a ustar header get a numbered one."""
+    tar_name = name + _member_suffix(codec)
+    if len(tar_name.encode('utf-8')) <= 100:
+        return tar_name
+    return f"members/{position:06d}{_member_suffix(codec)}"
+
+def _walk(src_dir: str) -> Iterator[Tuple[str, str]]:
+    for dirpath, dirnames, filenames in os.walk(src_dir):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            yield os.path.relpath(path, src_dir).replace(os.sep, "/"), path
+
+def write_bundle(src_dir: str, out_path: str, codec: str = "gzip", manifest_name: str = "summary.json",
+                 include: Optional[Callable[[str], bool]] = None) -> Dict[str, Any]:
+    """Pack every file under ``src_dir`` into a bundle and return its index.
+
+    ``include`` filters members by relative path. The manifest file, if present,
+    is stored both as a member and inline in the index.
+
+    The index goes first but needs every member's compressed size, so members
+    are compressed in chunks into a temporary file next to ``out_path`` and then
+    copied into the tar: memory stays at one chunk whatever the scan size.
+    """
+    members = []
+    manifest = None
+    # Member data starts after its 512-byte tar header; offsets are relative to the end of the index
+    offset = 0
+    with tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(out_path))) as staged:
+        for name, path in _walk(src_dir):
+            if include and not include(name):
+                continue
+            if name == manifest_name:
+                try:
+                    with open(path, 'rb') as f:
+                        manifest = json.load(f)
+                except ValueError:
+                    manifest = None
+            start = staged.tell()
+            raw_size, sha256 = _compress_file(path, codec, staged)
+            size = staged.tell() - start
+            members.append({
+                "name": name,
+                "offset": offset + BLOCK,
+                "size": size,
+                "raw_size": raw_size,
+                "sha256": sha256,
+            })
+            offset += BLOCK + _padded(size)
+
+        index = {"format": FORMAT, "version": VERSION, "codec": codec, "manifest": manifest, "members": members}
+        index_bytes = json.dumps(index, separators=(",", ":")).encode('utf-8')
+
+        staged.seek(0)
+        with tarfile.open(out_path, "w", format=tarfile.USTAR_FORMAT) as tar:
+            info = tarfile.TarInfo(INDEX_NAME)
+            info.size = len(index_bytes)
+            tar.addfile(info, io.BytesIO(index_bytes))
+            # Members were staged in order, so each one is the next ``size`` bytes
+            for position, member in enumerate(members):
+                info = tarfile.TarInfo(_tar_name(member["name"], position, codec))
+                info.size = member["size"]
+                tar.addfile(info, staged)
+    return index
+
+class BundleReader:
+    """Random-access reader over any ranged byte source.
+
+    ``read_range(start, length)`` returns ``length`` bytes from ``start`` (or fewer
+    at the end of the object). Only the header and requested members are read.
+    """
+
+    def __init__(self, read_range: Callable[[int, int], bytes]):
+        self._read_range = read_range
+        self.bytes_read = 0
+        self.requests = 0
+        self.index, self._base = self._read_index()
+        self.codec = self.index["codec"]
+        self._members = {m["name"]: m for m in self.index["members"]}
+
+    @classmethod
+    def from_file(cls, path: str) -> "BundleReader":
+        def read_range(start: int, length: int) -> bytes:
+            with open(path, 'rb') as f:
+                f.seek(start)
+                return f.read(length)
+        return cls(read_range)
+
+    @classmethod
+    def from_s3(cls, client, bucket: str, key: str) -> "BundleReader":
+        def read_range(start: int, length: int) -> bytes:
+            response = client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{start + length - 1}")
+            return response['Body'].read()
+        return cls(read_range)
+
+    def _read(self, start: int, length: int) -> bytes:
+        data = self._read_range(start, length)
+        self.requests += 1
+        self.bytes_read += len(data)
+        return data
+
+    def _read_index(self) -> Tuple[Dict[str, Any], int]:
+        head = self._read(0, HEADER_PROBE)
+        try:
+            info = tarfile.TarInfo.frombuf(head[:BLOCK], tarfile.ENCODING, "surrogateescape")
+        except tarfile.TarError as e:
+            raise ValueError(f"Not a scan bundle: {e}") from None
+        if info.name != INDEX_NAME:
+            raise ValueError(f"Not a scan bundle: first member is {info.name!r}")
+        if BLOCK + info.size > len(head):
+            head += self._read(len(head), BLOCK + info.size - len(head))
+        index = json.loads(head[BLOCK:BLOCK + info.size])
+        if index.get("format") != FORMAT or index.get("version") != VERSION:
+            raise ValueError(f"Unsupported bundle format: {index.get('format')} v{index.get('version')}")
+        return index, BLOCK + _padded(info.size)
+
+    @property
+    def manifest(self) -> Optional[Dict[str, Any]]:
+        return self.index.get("manifest")
+
+    def names(self) -> List[str]:
+        return list(self._members)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._members
+
+    def read(self, name: str) -> bytes:
+        """Fetch, decompress and verify one member."""
+        try:
+            member = self._members[name]
+        except KeyError:
+            raise KeyError(f"No member {name!r} in bundle") from None
+        return self._decode(member, self._read(self._base + member["offset"], member["size"]))
+
+    def _decode(self, member: Dict[str, Any], blob: bytes) -> bytes:
+        data = decompress(blob, self.codec)
+        if hashlib.sha256(data).hexdigest() != member["sha256"]:
+            raise ValueError(f"Checksum mismatch for bundle member {member['name']!r}")
+        return data
+
+    def read_many(self, names: List[str]) -> Dict[str, bytes]:
+        """Fetch several members; adjacent members share one ranged read."""
+        wanted = sorted((self._members[n] for n in names), key=lambda m: m["offset"])
+        results = {}
+        i = 0
+        while i < len(wanted):
+            # Coalesce a run of members that follow each other in the archive
+            j = i
+            while (j + 1 < len(wanted)
+                   and wanted[j + 1]["offset"] == wanted[j]["offset"] + _padded(wanted[j]["size"]) + BLOCK):
+                j += 1
+            start = wanted[i]["offset"]
+            end = wanted[j]["offset"] + wanted[j]["size"]
+            chunk = self._read(self._base + start, end - start)
+            for member in wanted[i:j + 1]:
+                relative = member["offset"] - start
+                results[member["name"]] = self._decode(member, chunk[relative:relative + member["size"]])
+            i = j + 1
+        return results
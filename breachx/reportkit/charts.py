@@ -0,0 +1,115 @@
+"""In-memory chart rendering for security reports.
+
+Charts are rendered to SVG or PNG bytes instead of files so reports can embed
+them inline. Rendering is cached on the severity/category counts, since most
+reports share identical distributions.
+
+SVG charts come from the pure-Python renderer in ``svgcharts`` by default;
+matplotlib is only imported for PNG output or when explicitly requested.
+"""
+import io
+import math
+import base64
+from functools import lru_cache
+from typing import List, Tuple
+from reportkit import scoring
+from reportkit.model import Finding
+
+SEVERITY_LEVELS = ("Critical", "High", "Medium", "Low", "Info")
+SEVERITY_COLORS = ('darkred', 'red', 'orange', 'yellow', 'green')
+RISK_CATEGORIES = scoring.CATEGORIES
+
+CHART_FORMATS = ("svg", "png")
+CHART_RENDERERS = ("builtin", "matplotlib")
+CHART_CACHE_SIZE = 256
+
+MIME_TYPES = {"svg": "image/svg+xml", "png": "image/png"}
+
+def severity_counts(vulnerabilities: List[Finding]) -> Tuple[int, ...]:
+    """Count vulnerabilities per severity level, in SEVERITY_LEVELS order."""
+    counts = dict.fromkeys(SEVERITY_LEVELS, 0)
+    for vuln in vulnerabilities:
+        severity = vuln.severity
+        if severity in counts:
+            counts[severity] += 1
+    return tuple(counts.values())
+
+def _render(fig, fmt: str) -> bytes:
+    """Serialize a matplotlib figure to SVG or PNG bytes."""
+    import matplotlib
+
+    buffer = io.BytesIO()
+    # Keep text as <text> elements and drop the timestamp so SVG output is small and stable
+    with matplotlib.rc_context({'svg.fonttype': 'none', 'svg.hashsalt': 'breachx'}):
+        fig.savefig(buffer, format=fmt, metadata={'Date': None} if fmt == "svg" else None)
+    return buffer.getvalue()
+
+def _use_builtin(fmt: str, renderer: str) -> bool:
+    """Decide whether the pure-Python renderer can produce this chart."""
+    if renderer not in CHART_RENDERERS:
+        raise ValueError(f"Unknown chart renderer: {renderer}")
+    return fmt == "svg" and renderer == "builtin"
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def severity_chart(counts: Tuple[int, ...], fmt: str = "svg", renderer: str = "builtin") -> bytes:
+    """Render the vulnerabilities-by-severity bar chart."""
+    if _use_builtin(fmt, renderer):
+        from reportkit import svgcharts
+        return svgcharts.bar_chart(SEVERITY_LEVELS, counts, SEVERITY_COLORS,
+                                   'Vulnerabilities by Severity', 'Severity', 'Count')
+
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot()
+    bars = ax.bar(SEVERITY_LEVELS, counts, color=SEVERITY_COLORS)
+
+    ax.set_title('Vulnerabilities by Severity')
+    ax.set_xlabel('Severity')
+    ax.set_ylabel('Count')
+
+    # Add count labels on top of each bar
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
+                '%d' % int(height), ha='center', va='bottom')
+
+    return _render(fig, fmt)
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def risk_radar_chart(scores: Tuple[float, ...], fmt: str = "svg", renderer: str = "builtin") -> bytes:
+    """Render the security risk areas radar chart."""
+    if _use_builtin(fmt, renderer):
+        from reportkit import svgcharts
+        return svgcharts.radar_chart(RISK_CATEGORIES, scores, 'Security Risk Areas')
+
+    from matplotlib.figure import Figure
+
+    angles = [2 * math.pi * i / len(RISK_CATEGORIES) for i in range(len(RISK_CATEGORIES))]
+
+    fig = Figure(figsize=(8, 8))
+    ax = fig.add_subplot(projection='polar')
+    # Close the loop
+    ax.plot(angles + angles[:1], list(scores) + list(scores[:1]), 'o-', linewidth=2)
+    ax.fill(angles + angles[:1], list(scores) + list(scores[:1]), alpha=0.25)
+    ax.set_thetagrids([math.degrees(a) for a in angles], RISK_CATEGORIES)
+
+    ax.set_ylim(0, 10)
+    ax.grid(True)
+    ax.set_title('Security Risk Areas', size=15)
+
+    return _render(fig, fmt)
+
+def data_uri(payload: bytes, fmt: str) -> str:
+    """Encode chart bytes as a data URI."""
+    return f"data:{MIME_TYPES[fmt]};base64,{base64.b64encode(payload).decode('ascii')}"
+
+def inline_html(payload: bytes, fmt: str, alt: str) -> str:
+    """Return markup that embeds the chart in an HTML page.
+
+    SVG is inlined as markup (minus its XML prologue); PNG becomes a data URI image.
+    """
+    if fmt == "svg":
+        svg = payload.decode('utf-8')
+        return svg[svg.index('<svg'):]
+    return f'<img src="{data_uri(payload, fmt)}" alt="{alt}">'
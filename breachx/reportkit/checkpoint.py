@@ -0,0 +1,216 @@
+"""Checkpoint and resume for the report pipeline.
+
+The pipeline saves its progress after every node and after every per-tool
+analysis. Progress is the list of completed steps plus a JSON snapshot of the
+state. The invocation that continues a suspended run resumes from the last
+completed step instead of paying for every LLM call again. Each record names
+the run that wrote it (``run_id``), and only a continuation carrying that id
+resumes it: a new event for the same scan starts fresh and ignores checkpoints
+left by runs in flight or crashed. Before each step, ``Run.ensure_time``
+checks the invocation deadline. When too little time is left, it checkpoints
+and raises ``Suspend``, so the caller can re-enqueue itself. The Lambda only
+suspends with ``DEADLINE_POLICY=suspend``; by default it degrades sections
+instead (see reportkit.deadline).
+
+Large finished pieces of work (per-tool analyses) are saved once each, as
+parts next to the record (``save_part``), so a save rewrites only the small
+state record. Checkpoints are stored in S3 next to the scan's reports
+(``<prefix>/_checkpoint/state.json``, parts under ``_checkpoint/parts/``) or in
+a local directory. Configuration
+comes from the environment:
+
+* ``CHECKPOINTS``: ``s3`` (default), ``local`` or ``off``
+* ``CHECKPOINT_DIR``: directory for the local backend
+* ``CHECKPOINT_RESERVE_MS``: time left at which to suspend (default 60000)
+"""
+import os
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+FORMAT = "breachx-checkpoint"
+VERSION = 2
+CHECKPOINT_NAME = "_checkpoint/state.json"
+PARTS_DIR = "_checkpoint/parts"
+
+class Suspend(Exception):
+    """Raised when the invocation is about to time out; progress has been saved."""
+
+    def __init__(self, step: str):
+        super().__init__(f"Suspended before {step}")
+        self.step = step
+
+class LocalCheckpoints:
+    """One JSON file per scan in a directory; writes are atomic renames."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, bucket: str, prefix: str) -> str:
+        return os.path.join(self.directory, f"{bucket}/{prefix}".strip('/').replace('/', '__') + ".json")
+
+    def _part_path(self, bucket: str, prefix: str, name: str) -> str:
+        return self._path(bucket, prefix)[:-len(".json")] + ".parts__" + name.replace('/', '__')
+
+    def load(self, bucket: str, prefix: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(bucket, prefix)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, bucket: str, prefix: str, record: Dict[str, Any]):
+        path = self._path(bucket, prefix)
+        with open(path + ".tmp", 'w') as f:
+            json.dump(record, f)
+        os.replace(path + ".tmp", path)
+
+    def save_part(self, bucket: str, prefix: str, name: str, data: bytes):
+        path = self._part_path(bucket, prefix, name)
+        with open(path + ".tmp", 'wb') as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+
+    def load_part(self, bucket: str, prefix: str, name: str) -> bytes:
+        with open(self._part_path(bucket, prefix, name), 'rb') as f:
+            return f.read()
+
+    def clear(self, bucket: str, prefix: str, parts: List[str] = ()):
+        for path in [self._path(bucket, prefix)] + [self._part_path(bucket, prefix, name) for name in parts]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+class S3Checkpoints:
+    """Checkpoints stored under the scan's own prefix in the input bucket."""
+
+    def __init__(self, s3):
+        self.s3 = s3
+
+    @staticmethod
+    def key(prefix: str) -> str:
+        return f"{prefix}/{CHECKPOINT_NAME}"
+
+    @staticmethod
+    def part_key(prefix: str, name: str) -> str:
+        return f"{prefix}/{PARTS_DIR}/{name}"
+
+    def load(self, bucket: str, prefix: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = self.s3.get_object(Bucket=bucket, Key=self.key(prefix))
+        except Exception as e:
+            if getattr(e, 'response', {}).get('Error', {}).get('Code', '') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        return json.loads(response['Body'].read())
+
+    def save(self, bucket: str, prefix: str, record: Dict[str, Any]):
+        self.s3.put_object(Bucket=bucket, Key=self.key(prefix), Body=json.dumps(record).encode('utf-8'),
+                           ContentType='application/json')
+
+    def save_part(self, bucket: str, prefix: str, name: str, data: bytes):
+        self.s3.put_object(Bucket=bucket, Key=self.part_key(prefix, name), Body=data)
+
+    def load_part(self, bucket: str, prefix: str, name: str) -> bytes:
+        return self.s3.get_object(Bucket=bucket, Key=self.part_key(prefix, name))['Body'].read()
+
+    def clear(self, bucket: str, prefix: str, parts: List[str] = ()):
+        self.s3.delete_object(Bucket=bucket, Key=self.key(prefix))
+        for name in parts:
+            self.s3.delete_object(Bucket=bucket, Key=self.part_key(prefix, name))
+
+class Run:
+    """Progress of one pipeline run over a scan prefix.
+
+    ``run_id`` identifies the run across the invocations that continue it.
+    ``snapshot`` turns the state into what is persisted, e.g. dropping report
+    contents that can be re-read from the scan prefix. ``remaining_ms`` returns
+    the time left in the invocation (Lambda's ``get_remaining_time_in_millis``).
+    """
+
+    def __init__(self, store, bucket: str, prefix: str, run_id: str, snapshot: Callable[[Dict], Dict] = dict,
+                 remaining_ms: Optional[Callable[[], int]] = None, reserve_ms: int = 60000):
+        self.store = store
+        self.bucket = bucket
+        self.prefix = prefix
+        self.run_id = run_id
+        self.snapshot = snapshot
+        self.remaining_ms = remaining_ms
+        self.reserve_ms = reserve_ms
+        self.completed: List[str] = []
+        self.parts: List[str] = []
+        self.resumed = False
+        self.saves = 0
+
+    def resume(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Merge this run's saved state into ``state`` and restore the completed steps.
+
+        A checkpoint written by another run (or in an older format) is ignored.
+        """
+        record = self.store.load(self.bucket, self.prefix) if self.store is not None else None
+        if not record or record.get("format") != FORMAT or record.get("version") != VERSION:
+            return state
+        if record.get("run_id") != self.run_id:
+            return state
+        self.completed = list(record["completed"])
+        self.parts = list(record.get("parts", []))
+        self.resumed = True
+        return dict(state, **record["state"])
+
+    def done(self, step: str) -> bool:
+        return step in self.completed
+
+    def save(self, state: Dict[str, Any], step: Optional[str] = None):
+        """Persist the state, marking ``step`` complete if given."""
+        if step is not None and step not in self.completed:
+            self.completed.append(step)
+        if self.store is None:
+            return
+        self.store.save(self.bucket, self.prefix, {
+            "format": FORMAT,
+            "version": VERSION,
+            "run_id": self.run_id,
+            "completed": self.completed,
+            "parts": self.parts,
+            "state": self.snapshot(state),
+            "saved_at": time.time(),
+        })
+        self.saves += 1
+
+    def save_part(self, name: str, text: str):
+        """Persist one finished piece of work on its own; the next ``save`` records it."""
+        if self.store is not None:
+            self.store.save_part(self.bucket, self.prefix, name, text.encode('utf-8'))
+        if name not in self.parts:
+            self.parts.append(name)
+
+    def load_part(self, name: str) -> str:
+        return self.store.load_part(self.bucket, self.prefix, name).decode('utf-8')
+
+    def ensure_time(self, state: Dict[str, Any], step: str):
+        """Checkpoint and raise Suspend if the invocation can't fit another step."""
+        if self.store is None or self.remaining_ms is None:
+            return
+        if self.remaining_ms() < self.reserve_ms:
+            self.save(state)
+            raise Suspend(step)
+
+    def finish(self):
+        if self.store is not None:
+            self.store.clear(self.bucket, self.prefix, self.parts)
+
+def configure(s3=None, default_backend: str = "s3"):
+    """Checkpoint store from CHECKPOINT* environment variables, or None when disabled."""
+    backend = os.environ.get("CHECKPOINTS", default_backend).lower()
+    if backend in ("off", "none", ""):
+        return None
+    if backend == "local":
+        return LocalCheckpoints(os.environ.get("CHECKPOINT_DIR", "/tmp/checkpoints"))
+    if backend == "s3":
+        return S3Checkpoints(s3)
+    raise ValueError(f"Unknown CHECKPOINTS backend: {backend}")
+
+def reserve_ms() -> int:
+    return int(os.environ.get("CHECKPOINT_RESERVE_MS", "60000"))
@@ -0,0 +1,476 @@
+"""Offline CVE index for ranking and enriching findings without the LLM.
+
+The index is a single binary file, memory-mapped read-only, holding CVE
+metadata: CVSS base score and vector, CWE, whether the CVE is in CISA's Known
+Exploited Vulnerabilities catalog, and fixed versions. Lookups probe an
+open-addressing hash table directly in the mapping, so they cost O(1) and the
+index is never parsed or loaded as a whole. Workers that map the same file
+share its pages.
+
+Findings from every tool are enriched from the index and ranked by known
+exploitation, then CVSS (falling back to the tool's severity). Only the top-K
+go to the model; the rest are rendered deterministically as a table.
+
+The snapshot is built offline from downloaded NVD 2.0 JSON feeds, the CISA KEV
+catalog and/or an NDJSON snapshot (one ``{"id", "cvss", "vector", "cwe", "kev",
+"fixed"}`` object per line), and replaced atomically, so a refresh never
+exposes a half-written file::
+
+    python -m reportkit.cveindex build --out reportkit/data/cve-index.bin \\
+        --nvd nvdcve-2.0-*.json --kev known_exploited_vulnerabilities.json
+
+Configuration comes from the environment:
+
+* ``CVE_INDEX_PATH``: index file (default ``reportkit/data/cve-index.bin``), or ``off``
+* ``CVE_TOP_K``: findings per tool sent to the model (default 25, 0 disables ranking)
+
+File layout (little-endian): a header, then ``count`` fixed-size records
+sorted by key, a slot table of ``slots`` record numbers (0 = empty), and a
+table of length-prefixed UTF-8 strings for vectors and fixed versions.
+"""
+import os
+import re
+import sys
+import json
+import mmap
+import glob
+import time
+import struct
+import argparse
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from reportkit import knowledge_cache, model, scoring
+
+MAGIC = b"BXCVEIDX"
+VERSION = 1
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cve-index.bin")
+
+# magic, version, reserved, count, slots, records offset, slots offset, strings offset, built at
+HEADER = struct.Struct("<8sHHIIQQQd")
+# key, cvss * 10, flags, severity, cwe, vector string, fixed string
+RECORD = struct.Struct("<QHBBIII")
+SLOT = struct.Struct("<I")
+STRING_LENGTH = struct.Struct("<H")
+
+NO_CVSS = 0xFFFF
+NO_STRING = 0xFFFFFFFF
+FLAG_KEV = 0x01
+
+CVE_ID = re.compile(r"CVE-(\d{4})-(\d{4,7})", re.IGNORECASE)
+
+_SEVERITY_RANK = {level: rank for rank, level in enumerate(model.SEVERITIES)}
+
+# Fields that carry a finding's title, severity and fixed version in scanner JSON
+NAME_FIELDS = ("Title", "title", "name", "alert", "finding")
+SEVERITY_FIELDS = ("severity", "Severity", "riskdesc", "risk")
+FIXED_FIELDS = ("FixedVersion", "fixed_version", "fixedVersion")
+VERSION_FIELDS = ("InstalledVersion", "version")
+ZAP_RISK_CODES = {"3": "High", "2": "Medium", "1": "Low", "0": "Info"}
+
+# Rows in the deterministic table of findings not sent to the model
+TABLE_LIMIT = 500
+
+@dataclass(slots=True)
+class CveRecord:
+    id: str
+    cvss: Optional[float] = None
+    vector: Optional[str] = None
+    cwe: Optional[str] = None
+    kev: bool = False
+    fixed: Optional[str] = None
+    severity: Optional[str] = None
+
+def cve_key(cve_id: str) -> Optional[int]:
+    """Integer key for a CVE id: year * 10**7 + sequence number."""
+    match = CVE_ID.fullmatch(str(cve_id).strip())
+    if not match:
+        return None
+    return int(match.group(1)) * 10_000_000 + int(match.group(2))
+
+def _key_id(key: int) -> str:
+    year, number = divmod(key, 10_000_000)
+    return f"CVE-{year}-{number:04d}"
+
+def _slot(key: int, mask: int) -> int:
+    return (((key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> 32) & mask
+
+def severity_from_cvss(score: Optional[float]) -> Optional[str]:
+    if score is None:
+        return None
+    if score >= 9.0:
+        return "Critical"
+    if score >= 7.0:
+        return "High"
+    if score >= 4.0:
+        return "Medium"
+    return "Low" if score > 0 else "Info"
+
+# Reading ---------------------------------------------------------------------
+
+class CveIndex:
+    """Read-only, memory-mapped view of an index file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lookups = 0
+        self.hits = 0
+        self._open()
+
+    def _open(self):
+        with open(self.path, "rb") as f:
+            self._stat = os.fstat(f.fileno())
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count, slots, records, table, strings, built_at = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{self.path}: not a version {VERSION} CVE index")
+        self.count = count
+        self.built_at = built_at
+        self._mask = slots - 1
+        self._records = records
+        self._table = table
+        self._strings = strings
+
+    def refresh(self) -> bool:
+        """Remap the file if it was replaced since it was opened."""
+        stat = os.stat(self.path)
+        if (stat.st_ino, stat.st_mtime_ns) == (self._stat.st_ino, self._stat.st_mtime_ns):
+            return False
+        self._map.close()
+        self._open()
+        return True
+
+    def _string(self, offset: int) -> Optional[str]:
+        if offset == NO_STRING:
+            return None
+        start = self._strings + offset
+        (length,) = STRING_LENGTH.unpack_from(self._map, start)
+        return self._map[start + STRING_LENGTH.size:start + STRING_LENGTH.size + length].decode("utf-8")
+
+    def get(self, cve_id: str) -> Optional[CveRecord]:
+        key = cve_key(cve_id)
+        if key is None:
+            return None
+        self.lookups += 1
+        slot = _slot(key, self._mask)
+        while True:
+            (number,) = SLOT.unpack_from(self._map, self._table + slot * SLOT.size)
+            if number == 0:
+                return None
+            record_key, cvss, flags, severity, cwe, vector, fixed = RECORD.unpack_from(
+                self._map, self._records + (number - 1) * RECORD.size)
+            if record_key == key:
+                self.hits += 1
+                return CveRecord(_key_id(key), None if cvss == NO_CVSS else cvss / 10, self._string(vector),
+                                 f"CWE-{cwe}" if cwe else None, bool(flags & FLAG_KEV), self._string(fixed),
+                                 model.SEVERITIES[severity] if severity < len(model.SEVERITIES) else None)
+            slot = (slot + 1) & self._mask
+
+    def __contains__(self, cve_id: str) -> bool:
+        return self.get(cve_id) is not None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[CveRecord]:
+        for number in range(self.count):
+            (key,) = struct.unpack_from("<Q", self._map, self._records + number * RECORD.size)
+            yield self.get(_key_id(key))
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": self.count, "lookups": self.lookups, "hits": self.hits}
+
+    def close(self):
+        self._map.close()
+
+def configure(default_path: str = DEFAULT_PATH) -> Optional[CveIndex]:
+    """Open the index from CVE_INDEX_PATH, or None when disabled or not built."""
+    path = os.environ.get("CVE_INDEX_PATH", default_path)
+    if path.lower() in ("off", "none", "") or not os.path.exists(path):
+        return None
+    return CveIndex(path)
+
+def top_k() -> int:
+    return int(os.environ.get("CVE_TOP_K", "25"))
+
+# Building --------------------------------------------------------------------
+
+def build_index(records: Iterable[CveRecord], out_path: str) -> int:
+    """Write records to an index file atomically; returns the number of entries."""
+    by_key: Dict[int, CveRecord] = {}
+    for record in records:
+        key = cve_key(record.id)
+        if key is not None:
+            by_key[key] = record
+    keys = sorted(by_key)
+    slots = 1
+    while slots < max(len(keys), 1) * 2:  # load factor <= 0.5 keeps probe chains short
+        slots <<= 1
+    mask = slots - 1
+
+    strings = bytearray()
+    string_offsets: Dict[str, int] = {}
+
+    def string(value: Optional[str]) -> int:
+        if not value:
+            return NO_STRING
+        if value not in string_offsets:
+            data = value.encode("utf-8")[:0xFFFF]
+            string_offsets[value] = len(strings)
+            strings.extend(STRING_LENGTH.pack(len(data)) + data)
+        return string_offsets[value]
+
+    record_bytes = bytearray()
+    table = [0] * slots
+    for number, key in enumerate(keys, 1):
+        record = by_key[key]
+        severity = record.severity or severity_from_cvss(record.cvss)
+        cwe = re.fullmatch(r"CWE-(\d+)", record.cwe or "")
+        record_bytes.extend(RECORD.pack(
+            key, NO_CVSS if record.cvss is None else round(record.cvss * 10),
+            FLAG_KEV if record.kev else 0, _SEVERITY_RANK.get(severity, 0xFF),
+            int(cwe.group(1)) if cwe else 0, string(record.vector), string(record.fixed)))
+        slot = _slot(key, mask)
+        while table[slot]:
+            slot = (slot + 1) & mask
+        table[slot] = number
+
+    records_offset = HEADER.size
+    table_offset = records_offset + len(record_bytes)
+    strings_offset = table_offset + slots * SLOT.size
+    tmp_path = out_path + ".tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(keys), slots, records_offset, table_offset, strings_offset,
+                            time.time()))
+        f.write(record_bytes)
+        f.write(struct.pack(f"<{slots}I", *table))
+        f.write(strings)
+    os.replace(tmp_path, out_path)
+    return len(keys)
+
+def _nvd_metric(metrics: Dict[str, Any]) -> Tuple[Optional[float], Optional[str], Optional[str]]:
+    for name in ("cvssMetricV40", "cvssMetricV31", "cvssMetricV30", "cvssMetricV2"):
+        entries = metrics.get(name) or []
+        entry = next((e for e in entries if e.get("type") == "Primary"), entries[0] if entries else None)
+        if entry:
+            data = entry.get("cvssData", {})
+            return data.get("baseScore"), data.get("vectorString"), data.get("baseSeverity") or entry.get("baseSeverity")
+    return None, None, None
+
+def read_nvd(path: str) -> Iterator[CveRecord]:
+    """Records from an NVD 2.0 JSON feed or API response page."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    for item in data.get("vulnerabilities", []):
+        cve = item.get("cve", {})
+        score, vector, severity = _nvd_metric(cve.get("metrics", {}))
+        cwe = next((d["value"] for w in cve.get("weaknesses", []) for d in w.get("description", [])
+                    if str(d.get("value", "")).startswith("CWE-")), None)
+        fixed = sorted({match["versionEndExcluding"] for config in cve.get("configurations", [])
+                        for node in config.get("nodes", []) for match in node.get("cpeMatch", [])
+                        if match.get("versionEndExcluding")})
+        yield CveRecord(cve.get("id", ""), score, vector, cwe, False, ", ".join(fixed[:8]) or None,
+                        model.normalize_severity(severity) if severity else None)
+
+def read_kev(path: str) -> Iterator[str]:
+    """CVE ids in the CISA Known Exploited Vulnerabilities catalog (JSON)."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    for item in data.get("vulnerabilities", []):
+        if item.get("cveID"):
+            yield item["cveID"]
+
+def read_snapshot(path: str) -> Iterator[CveRecord]:
+    """Records from an NDJSON snapshot."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                yield CveRecord(item["id"], item.get("cvss"), item.get("vector"), item.get("cwe"),
+                                bool(item.get("kev")), item.get("fixed"), item.get("severity"))
+
+def collect_records(nvd: Iterable[str] = (), kev: Iterable[str] = (), snapshots: Iterable[str] = ()) -> List[CveRecord]:
+    """Merge the sources; later sources override earlier ones, KEV only adds the flag."""
+    records: Dict[str, CveRecord] = {}
+    for path in snapshots:
+        for record in read_snapshot(path):
+            records[record.id.upper()] = record
+    for path in nvd:
+        for record in read_nvd(path):
+            previous = records.get(record.id.upper())
+            record.kev = bool(previous and previous.kev)
+            records[record.id.upper()] = record
+    for path in kev:
+        for cve_id in read_kev(path):
+            records.setdefault(cve_id.upper(), CveRecord(cve_id.upper())).kev = True
+    return list(records.values())
+
+# Ranking ---------------------------------------------------------------------
+
+def _severity(node: Dict[str, Any]) -> Optional[str]:
+    value = next((node[f] for f in SEVERITY_FIELDS if isinstance(node.get(f), str) and node[f]), None)
+    if value is None and isinstance(node.get("info"), dict):  # nuclei
+        value = node["info"].get("severity")
+    if value is None and str(node.get("riskcode")) in ZAP_RISK_CODES:
+        return ZAP_RISK_CODES[str(node["riskcode"])]
+    if not isinstance(value, str):
+        return None
+    # ZAP's riskdesc is "High (Medium)": risk, then confidence
+    return model.normalize_severity(value.split(" (")[0])
+
+def _name(node: Dict[str, Any], rule_id: str) -> str:
+    name = next((node[f] for f in NAME_FIELDS if isinstance(node.get(f), str) and node[f]), None)
+    if name is None and isinstance(node.get("info"), dict):
+        name = node["info"].get("name")
+    return str(name or rule_id)
+
+def _walk(node: Any, tool: str, found: Dict[Tuple[str, str], model.Finding]):
+    if isinstance(node, dict):
+        rule_id = next((node[f] for f in knowledge_cache.ID_FIELDS
+                        if isinstance(node.get(f), (str, int)) and node.get(f) != ""), None)
+        severity = _severity(node)
+        if rule_id is not None and str(severity).lower() not in knowledge_cache.IGNORED_SEVERITIES - {"none"}:
+            rule_id = knowledge_cache.normalize_rule(rule_id)
+            component = next((node[f] for f in knowledge_cache.COMPONENT_FIELDS if isinstance(node.get(f), str)), None)
+            version = next((node[f] for f in VERSION_FIELDS if isinstance(node.get(f), str)), None)
+            if component and version:
+                component = f"{component} {version}"
+            fixed = next((node[f] for f in FIXED_FIELDS if isinstance(node.get(f), str) and node[f]), None)
+            found.setdefault((rule_id, component or ""), model.Finding(
+                _name(node, rule_id), severity or "Info", rule_id, component, tool=tool, fixed_in=fixed))
+        for value in node.values():
+            if isinstance(value, (dict, list)):
+                _walk(value, tool, found)
+    elif isinstance(node, list):
+        for value in node:
+            _walk(value, tool, found)
+
+def collect_findings(report: Any, tool: str) -> List[model.Finding]:
+    """Findings in a scanner report: structured entries for JSON, CVE ids for text."""
+    found: Dict[Tuple[str, str], model.Finding] = {}
+    if isinstance(report, (dict, list)):
+        _walk(report, tool, found)
+    else:
+        for cve in knowledge_cache.CVE_PATTERN.findall(str(report)):
+            found.setdefault((cve.upper(), ""), model.Finding(cve.upper(), "Info", cve.upper(), tool=tool))
+    return list(found.values())
+
+def finding_cve(finding: model.Finding) -> Optional[str]:
+    """The CVE a finding refers to: its id, or one named in its title."""
+    for text in (finding.id, finding.name):
+        match = CVE_ID.search(text or "")
+        if match:
+            return match.group(0).upper()
+    return None
+
+def enrich(findings: Iterable[model.Finding], index: Optional[CveIndex]) -> int:
+    """Fill CVSS, CWE, KEV and fixed versions from the index in place; returns the hits."""
+    hits = 0
+    if index is None:
+        return hits
+    for finding in findings:
+        cve = finding_cve(finding)
+        record = index.get(cve) if cve else None
+        if record is None:
+            continue
+        hits += 1
+        finding.cvss = record.cvss if finding.cvss is None else finding.cvss
+        finding.cwe = finding.cwe or record.cwe
+        finding.kev = record.kev
+        finding.fixed_in = finding.fixed_in or record.fixed
+        if finding.severity == "Info" and record.severity:
+            finding.severity = record.severity
+    return hits
+
+def rank(findings: Iterable[model.Finding]) -> List[model.Finding]:
+    """Known-exploited first, then by CVSS or severity; ties broken by id for stable output."""
+    return sorted(findings, key=lambda f: (not f.kev, -scoring.base_score(f), _SEVERITY_RANK.get(f.severity, 9),
+                                           f.id or "", f.affected_component or ""))
+
+def condense(report: Any, findings: List[model.Finding], limit: int
+             ) -> Tuple[Any, List[model.Finding], List[model.Finding]]:
+    """Split a report's ranked findings (``rank_report``) into the top ``limit`` and the rest.
+
+    When a JSON report has more findings than ``limit``, the report is replaced
+    by its top-level metadata and severity counts; the top findings are sent to
+    the model through ``format_ranked`` and the rest through ``format_table``.
+    """
+    if limit <= 0:  # ranking disabled
+        return report, [], []
+    if len(findings) <= limit:
+        return report, findings, []
+    top, rest = findings[:limit], findings[limit:]
+    if isinstance(report, dict):
+        counts: Dict[str, int] = {}
+        for finding in findings:
+            counts[finding.severity] = counts.get(finding.severity, 0) + 1
+        report = dict({key: value for key, value in report.items() if not isinstance(value, (dict, list))},
+                      findings_total=len(findings), findings_by_severity=counts,
+                      findings_omitted=len(rest))
+    return report, top, rest
+
+def rank_report(report: Any, tool: str, index: Optional[CveIndex]) -> List[model.Finding]:
+    findings = collect_findings(report, tool)
+    enrich(findings, index)
+    return rank(findings)
+
+def _line(finding: model.Finding) -> List[str]:
+    return [finding.id or "", finding.severity, "" if finding.cvss is None else f"{finding.cvss:.1f}",
+            "yes" if finding.kev else "", finding.cwe or "", finding.affected_component or "",
+            finding.fixed_in or "", finding.name if finding.name != finding.id else ""]
+
+def format_ranked(findings: List[model.Finding], total: int) -> str:
+    """Prompt section listing the top-ranked findings in order."""
+    if not findings:
+        return ""
+    lines = [f"{position}. " + " | ".join(field for field in _line(finding) if field)
+             for position, finding in enumerate(findings, 1)]
+    return (f"RANKED FINDINGS (top {len(findings)} of {total}; fields: id | severity | CVSS | KEV | CWE | "
+            f"component | fixed in | title):\n" + "\n".join(lines) + "\n\n")
+
+def format_table(findings: List[model.Finding], start: int = 1) -> str:
+    """Markdown table of the findings not sent to the model."""
+    if not findings:
+        return ""
+    rows = ["| # | ID | Severity | CVSS | KEV | CWE | Component | Fixed in | Title |",
+            "|---|----|----------|------|-----|-----|-----------|----------|-------|"]
+    for position, finding in enumerate(findings[:TABLE_LIMIT], start):
+        cells = [str(position)] + [field.replace("|", "/") for field in _line(finding)]
+        rows.append("| " + " | ".join(cells) + " |")
+    if len(findings) > TABLE_LIMIT:
+        rows.append(f"\n... and {len(findings) - TABLE_LIMIT} more lower-ranked findings")
+    return "\n\n## Additional Findings (ranked offline)\n" + "\n".join(rows)
+
+# Command line ----------------------------------------------------------------
+
+def _expand(patterns: List[str]) -> List[str]:
+    return sorted(path for pattern in patterns for path in (glob.glob(pattern) or [pattern]))
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m reportkit.cveindex", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Build or refresh an index from downloaded feeds")
+    build.add_argument("--out", default=DEFAULT_PATH, help="Index file to write (replaced atomically)")
+    build.add_argument("--nvd", nargs="*", default=[], help="NVD 2.0 JSON feed files or API pages")
+    build.add_argument("--kev", nargs="*", default=[], help="CISA KEV catalog JSON files")
+    build.add_argument("--snapshot", nargs="*", default=[], help="NDJSON snapshot files")
+    lookup = commands.add_parser("lookup", help="Look up CVE ids in an index")
+    lookup.add_argument("--index", default=DEFAULT_PATH)
+    lookup.add_argument("ids", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        records = collect_records(_expand(args.nvd), _expand(args.kev), _expand(args.snapshot))
+        count = build_index(records, args.out)
+        print(f"Wrote {count} CVEs to {args.out} ({os.path.getsize(args.out) / 1024 ** 2:.1f} MB)")
+    else:
+        index = CveIndex(args.index)
+        for cve_id in args.ids:
+            record = index.get(cve_id)
+            print(json.dumps({"id": cve_id, "found": False} if record is None else
+                             {key: getattr(record, key) for key in CveRecord.__slots__}))
+
+if __name__ == "__main__":
+    sys.exit(main())
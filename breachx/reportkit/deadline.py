@@ -0,0 +1,146 @@
+"""Deadline-aware planning so an invocation always delivers a report.
+
+A ``Planner`` reads the time left in the invocation (Lambda's
+``get_remaining_time_in_millis``) and estimates what each stage costs from
+recent history. Before an expensive step, the caller asks whether the step
+still fits while leaving time for the stages that must follow (summary and
+PDF). When it doesn't, the caller runs a cheap deterministic fallback instead
+and records the section as degraded. A step that starts is also bounded: its
+calls get a timeout (``timeout_s``) that leaves time for the stages after it,
+and a call that hits it falls back the same way. Degraded sections are listed
+in the report (``format_degraded``). Work is ordered by expected value, so the
+least important sections are the ones degraded.
+
+Stage costs are an exponentially weighted moving average per stage, kept in a
+small JSON file. In Lambda, /tmp survives between warm invocations of the same
+container. Configuration comes from the environment:
+
+* ``DEADLINE_POLICY``: ``degrade`` (default), ``suspend`` (checkpoint and re-invoke,
+  see reportkit.checkpoint) or ``off``
+* ``DEADLINE_HISTORY_PATH``: stage cost history file (default /tmp/stage-costs.json)
+* ``DEADLINE_SAFETY``: multiplier on estimated costs (default 1.5)
+* ``DEADLINE_MARGIN_MS``: fixed time kept free at the end (default 5000)
+"""
+import os
+import json
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+POLICIES = ("degrade", "suspend", "off")
+
+# Starting estimates (ms) until a stage has history
+DEFAULT_COSTS_MS = {
+    "llm.analyze": 20000,
+    "llm.summary": 25000,
+    "create_pdf": 5000,
+}
+
+class OutOfTime(Exception):
+    """A call ran into the timeout derived from the invocation's remaining time."""
+
+def timed_out(error: Optional[BaseException]) -> bool:
+    """Whether an exception, or one it was raised from, is a client timeout."""
+    for _ in range(10):
+        if error is None:
+            return False
+        name = type(error).__name__
+        if isinstance(error, TimeoutError) or "Timeout" in name or name == "DeadlineExceeded":
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+class History:
+    """Per-stage moving average of durations, persisted to a JSON file."""
+
+    def __init__(self, path: Optional[str] = None, alpha: float = 0.3,
+                 defaults: Optional[Dict[str, float]] = None):
+        self.path = path
+        self.alpha = alpha
+        self.defaults = dict(DEFAULT_COSTS_MS, **(defaults or {}))
+        self.costs: Dict[str, float] = {}
+        if path:
+            try:
+                with open(path) as f:
+                    self.costs = {stage: float(ms) for stage, ms in json.load(f).items()}
+            except (OSError, ValueError, AttributeError):
+                self.costs = {}
+
+    def estimate(self, stage: str) -> float:
+        return self.costs.get(stage, self.defaults.get(stage, 0.0))
+
+    def record(self, stage: str, ms: float):
+        previous = self.costs.get(stage)
+        self.costs[stage] = ms if previous is None else previous + self.alpha * (ms - previous)
+
+    def save(self):
+        if not self.path:
+            return
+        with open(self.path + ".tmp", 'w') as f:
+            json.dump(self.costs, f)
+        os.replace(self.path + ".tmp", self.path)
+
+class Planner:
+    """Decides, step by step, whether full work still fits in the invocation.
+
+    ``remaining_ms`` returns the time left; without it (local runs) every step fits.
+    """
+
+    def __init__(self, remaining_ms: Optional[Callable[[], int]] = None, history: Optional[History] = None,
+                 safety: float = 1.5, margin_ms: float = 5000):
+        self.remaining_ms = remaining_ms
+        self.history = history or History()
+        self.safety = safety
+        self.margin_ms = margin_ms
+
+    def order(self, priorities: Dict[str, float]) -> List[str]:
+        """Keys by descending priority; ties keep their name order."""
+        return sorted(priorities, key=lambda key: (-priorities[key], key))
+
+    def needed_ms(self, stages: Iterable[str]) -> float:
+        return sum(self.history.estimate(stage) for stage in stages) * self.safety + self.margin_ms
+
+    def fits(self, stage: str, then: Iterable[str] = ()) -> bool:
+        """Whether ``stage`` fits and still leaves time for the ``then`` stages."""
+        if self.remaining_ms is None:
+            return True
+        return self.remaining_ms() >= self.needed_ms([stage, *then])
+
+    def timeout_s(self, then: Iterable[str] = ()) -> Optional[float]:
+        """Time a call may take and still leave time for the ``then`` stages; None without a deadline."""
+        if self.remaining_ms is None:
+            return None
+        return max(1000.0, self.remaining_ms() - self.needed_ms(then)) / 1000
+
+    @contextmanager
+    def timed(self, stage: str) -> Iterator[None]:
+        """Record the duration of a stage in the cost history."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.history.record(stage, (time.perf_counter() - start) * 1000)
+
+    def finish(self):
+        self.history.save()
+
+def policy() -> str:
+    value = os.environ.get("DEADLINE_POLICY", "degrade").lower()
+    if value not in POLICIES:
+        raise ValueError(f"Unknown DEADLINE_POLICY: {value}")
+    return value
+
+def configure(remaining_ms: Optional[Callable[[], int]] = None) -> Optional[Planner]:
+    """Planner from DEADLINE_* environment variables, or None unless the policy is ``degrade``."""
+    if policy() != "degrade":
+        return None
+    history = History(os.environ.get("DEADLINE_HISTORY_PATH", "/tmp/stage-costs.json"))
+    return Planner(remaining_ms, history, safety=float(os.environ.get("DEADLINE_SAFETY", "1.5")),
+                   margin_ms=float(os.environ.get("DEADLINE_MARGIN_MS", "5000")))
+
+def format_degraded(degraded: Dict[str, str]) -> str:
+    """Report section listing what was shortened to meet the deadline."""
+    if not degraded:
+        return ""
+    lines = [f"- {section}: {reason}" for section, reason in degraded.items()]
+    return "## Degraded Sections\nThese sections were shortened to deliver the report in time:\n" + "\n".join(lines)
@@ -0,0 +1,336 @@
+"""Incremental readers for scanner outputs that aren't a single report file.
+
+Most tools write ``<tool>/report.txt`` or ``<tool>/report.json``, which the
+pipelines read as they are. The tools registered here write more than that:
+
+* **sqlmap** writes an ``--output-dir`` tree per target (``log``,
+  ``target.txt``, ``results-*.csv``, ``dump/<db>/<table>.csv``, session files)
+* **XSStrike** prints its findings to stdout (``logs/xss.log``), with
+  ``xss/report.json`` only when it managed to write one
+* **jwt_tool** writes a verbose text log in which a few lines matter
+
+Each reader walks the scan's file listing lazily and streams only the files it
+needs. Large text logs are read from the tail; CSVs are always read from the
+start, since their header is the first line. The reader compacts what it finds
+into a small dict (injection points, payloads, DBMS fingerprint, ...), bounded
+to ``limit`` characters of JSON, ready for prompting. Dumped tables are
+streamed only to count their rows: nothing but the header is kept.
+
+A source is a scan's files, in a local directory (``LocalSource``), under an S3
+prefix (``S3Source``) or in a scan bundle (``BundleSource``).
+"""
+import os
+import re
+import csv
+import json
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Default bound on one tool's compacted result, in characters of JSON
+MAX_RESULT_CHARS = 12000
+# Text outputs larger than this are read from the tail (tools summarize at the end)
+SCAN_BYTES = 4 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+
+@dataclass
+class Ingested:
+    tool: str
+    data: Dict[str, Any]
+    files: List[str] = field(default_factory=list)
+    bytes_read: int = 0
+    truncated: bool = False
+
+def _clean(line: bytes) -> str:
+    return ANSI_ESCAPE.sub("", line.decode('utf-8', 'replace')).rstrip()
+
+class Source:
+    """A scan's files by path relative to the scan root, with sizes."""
+
+    def __init__(self):
+        self.bytes_read = 0
+        self._files: Optional[Dict[str, int]] = None
+
+    def _list(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+    def _chunks(self, name: str, start: int) -> Iterator[bytes]:
+        raise NotImplementedError
+
+    def files(self, prefix: str = "") -> Dict[str, int]:
+        if self._files is None:
+            self._files = self._list()
+        return {name: size for name, size in self._files.items() if name.startswith(prefix)}
+
+    def read(self, name: str) -> bytes:
+        data = b"".join(self._chunks(name, 0))
+        self.bytes_read += len(data)
+        return data
+
+    def lines(self, name: str, max_bytes: Optional[int] = SCAN_BYTES) -> Iterator[str]:
+        """Stream decoded lines (ANSI colours stripped), from the last ``max_bytes`` of large files.
+
+        ``max_bytes=None`` streams the whole file from the start.
+        """
+        start = max(0, self.files()[name] - max_bytes) if max_bytes is not None else 0
+        skip_partial = start > 0
+        pending = b""
+        for chunk in self._chunks(name, start):
+            self.bytes_read += len(chunk)
+            pending += chunk
+            *complete, pending = pending.split(b"\n")
+            for line in complete:
+                if skip_partial:
+                    skip_partial = False
+                    continue
+                yield _clean(line)
+        if pending and not skip_partial:
+            yield _clean(pending)
+
+class LocalSource(Source):
+    def __init__(self, root: str):
+        super().__init__()
+        self.root = root
+
+    def _list(self) -> Dict[str, int]:
+        found = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                found[os.path.relpath(path, self.root).replace(os.sep, '/')] = os.path.getsize(path)
+        return found
+
+    def _chunks(self, name: str, start: int) -> Iterator[bytes]:
+        with open(os.path.join(self.root, name), 'rb') as f:
+            f.seek(start)
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+class S3Source(Source):
+    """Objects under ``prefix``; pass ``objects`` (list_objects_v2 Contents) to skip relisting."""
+
+    def __init__(self, client, bucket: str, prefix: str, objects: Optional[List[Dict[str, Any]]] = None):
+        super().__init__()
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.rstrip('/') + '/'
+        self._objects = objects
+
+    def _list(self) -> Dict[str, int]:
+        objects = self._objects
+        if objects is None:
+            objects = []
+            kwargs = {'Bucket': self.bucket, 'Prefix': self.prefix}
+            while True:
+                response = self.client.list_objects_v2(**kwargs)
+                objects.extend(response.get('Contents', []))
+                if not response.get('IsTruncated'):
+                    break
+                kwargs['ContinuationToken'] = response['NextContinuationToken']
+        return {item['Key'][len(self.prefix):]: item.get('Size', 0) for item in objects
+                if item['Key'].startswith(self.prefix)}
+
+    def _chunks(self, name: str, start: int) -> Iterator[bytes]:
+        kwargs = {'Range': f"bytes={start}-"} if start else {}
+        body = self.client.get_object(Bucket=self.bucket, Key=self.prefix + name, **kwargs)['Body']
+        yield from body.iter_chunks(CHUNK_SIZE)
+
+class BundleSource(Source):
+    """Members of a scan bundle; each member is fetched (one ranged read) only when a reader opens it."""
+
+    def __init__(self, reader):
+        super().__init__()
+        self.reader = reader
+
+    def _list(self) -> Dict[str, int]:
+        return {member["name"]: member["raw_size"] for member in self.reader.index["members"]}
+
+    def _chunks(self, name: str, start: int) -> Iterator[bytes]:
+        yield self.reader.read(name)[start:]
+
+# Registry --------------------------------------------------------------------
+
+Reader = Callable[[Source, str, int], Optional[Ingested]]
+READERS: Dict[str, Reader] = {}
+
+def register(*tools: str):
+    """Register a reader for the given tool names."""
+    def decorator(fn: Reader) -> Reader:
+        for tool in tools:
+            READERS[tool] = fn
+        return fn
+    return decorator
+
+def has_reader(tool: str) -> bool:
+    return tool in READERS
+
+def ingest(source: Source, tool: str, limit: int = MAX_RESULT_CHARS) -> Optional[Ingested]:
+    """Run the tool's reader; None when the tool has no reader or left no output."""
+    reader = READERS.get(tool)
+    if reader is None:
+        return None
+    before = source.bytes_read
+    result = reader(source, tool, limit)
+    if result is not None:
+        result.bytes_read = source.bytes_read - before
+    return result
+
+def ingest_all(source: Source, limit: int = MAX_RESULT_CHARS) -> Dict[str, Ingested]:
+    """Every registered tool with output in the source."""
+    results = {}
+    for tool in READERS:
+        result = ingest(source, tool, limit)
+        if result is not None:
+            results[tool] = result
+    return results
+
+def bound(data: Dict[str, Any], limit: int) -> bool:
+    """Trim the longest lists in ``data`` until its JSON fits ``limit``; True if anything was dropped."""
+    truncated = False
+    while len(json.dumps(data)) > limit:
+        lists = [(len(value), key) for key, value in data.items() if isinstance(value, list) and value]
+        if not lists:
+            break
+        length, key = max(lists)
+        data[key] = data[key][:length // 2]
+        omitted = data.setdefault("omitted", {})
+        omitted[key] = omitted.get(key, 0) + length - length // 2
+        truncated = True
+    return truncated
+
+def _add_unique(items: List[Any], item: Any, cap: int):
+    if item not in items and len(items) < cap:
+        items.append(item)
+
+# Readers ---------------------------------------------------------------------
+
+SQLMAP_FINGERPRINT = {
+    "back-end DBMS": "dbms",
+    "web server operating system": "web_server_os",
+    "web application technology": "technology",
+}
+
+@register("sqlmap")
+def read_sqlmap(source: Source, tool: str, limit: int) -> Optional[Ingested]:
+    """Injection points, DBMS fingerprint and dumped tables from a sqlmap --output-dir tree."""
+    files = source.files(f"{tool}/")
+    if not files:
+        return None
+    data: Dict[str, Any] = {"targets": [], "injection_points": [], "dbms": [], "web_server_os": [],
+                            "technology": [], "dumped_tables": []}
+    read = []
+    for name in sorted(files):
+        base = name.rsplit('/', 1)[-1]
+        if base == "target.txt":
+            for line in source.lines(name):
+                if line.strip():
+                    _add_unique(data["targets"], line.split("#", 1)[0].strip(), 20)
+                    break
+        elif base == "log":
+            _parse_sqlmap_log(source.lines(name), data)
+        elif base.startswith("results-") and base.endswith(".csv"):
+            rows = csv.DictReader(source.lines(name, max_bytes=None))
+            for row in rows:
+                _add_unique(data["injection_points"], {
+                    "target": row.get("Target URL"), "place": row.get("Place"), "parameter": row.get("Parameter"),
+                    "techniques": row.get("Technique(s)"), "notes": row.get("Note(s)") or None,
+                }, 100)
+        elif "/dump/" in f"/{name}" and base.endswith(".csv"):
+            # Dumped data is sensitive and useless to the LLM: keep the shape only
+            rows = csv.reader(source.lines(name, max_bytes=None))
+            header = next(rows, [])
+            data["dumped_tables"].append({"table": name.split("/dump/", 1)[-1][:-len(".csv")],
+                                          "columns": header[:30], "rows": sum(1 for _ in rows)})
+        else:
+            continue
+        read.append(name)
+    if not read:
+        return None
+    data = {key: value for key, value in data.items() if value}
+    truncated = bound(data, limit)
+    return Ingested(tool, data, read, truncated=truncated)
+
+def _parse_sqlmap_log(lines: Iterator[str], data: Dict[str, Any]):
+    parameter = None
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("Parameter: "):
+            # "Parameter: id (GET)"
+            name, _, place = stripped[len("Parameter: "):].partition(" (")
+            parameter = {"parameter": name, "place": place.rstrip(")") or None}
+        elif parameter is not None and stripped.startswith("Type: "):
+            point = dict(parameter, type=stripped[len("Type: "):])
+            _add_unique(data["injection_points"], point, 100)
+        elif parameter is not None and stripped.startswith(("Title: ", "Payload: ")) and data["injection_points"]:
+            key, _, value = stripped.partition(": ")
+            data["injection_points"][-1].setdefault(key.lower(), value[:300])
+        elif stripped == "---":
+            continue
+        else:
+            key, _, value = stripped.partition(": ")
+            if key in SQLMAP_FINGERPRINT and value:
+                parameter = None
+                _add_unique(data[SQLMAP_FINGERPRINT[key]], value, 10)
+
+XSS_MARKERS = {
+    "Vulnerable webpage:": "vulnerable_pages",
+    "Vector for ": "vectors",
+    "Payload:": "payloads",
+    "Testing parameter:": "parameters",
+    "Potentially vulnerable objects found": "dom_sinks",
+    "WAF Status:": "waf",
+}
+
+@register("xss")
+def read_xsstrike(source: Source, tool: str, limit: int) -> Optional[Ingested]:
+    """Vulnerable pages, parameters and working payloads from XSStrike's report or stdout log."""
+    names = [name for name in sorted(source.files(f"{tool}/")) if name.endswith(".json")]
+    for name in names:
+        try:
+            report = json.loads(source.read(name))
+        except ValueError:
+            continue
+        data = report if isinstance(report, dict) else {"findings": report}
+        return Ingested(tool, data, [name], truncated=bound(data, limit))
+
+    log_names = [name for name in sorted(source.files(f"{tool}/")) if not name.endswith(".json")]
+    log_names += [name for name in (f"logs/{tool}.log",) if name in source.files("logs/")]
+    data: Dict[str, Any] = {}
+    for name in log_names:
+        for line in source.lines(name):
+            for marker, key in XSS_MARKERS.items():
+                position = line.find(marker)
+                if position >= 0:
+                    value = line[position:] if key == "vectors" else line[position + len(marker):]
+                    _add_unique(data.setdefault(key, []), value.strip()[:300], 100)
+                    break
+    if not data:
+        return None
+    return Ingested(tool, data, log_names, truncated=bound(data, limit))
+
+JWT_SIGNALS = re.compile(r"vulnerab|exploit|\[\+\]|CVE-\d|\balg\b|\bkid\b|\bjku\b|\bx5u\b|crack|secret|"
+                         r"signature|tamper|forged|valid", re.IGNORECASE)
+
+@register("jwt")
+def read_jwt_tool(source: Source, tool: str, limit: int) -> Optional[Ingested]:
+    """jwt_tool result lines (exploits tried, signature checks, cracked secrets), deduplicated."""
+    names = sorted(source.files(f"{tool}/"))
+    if not names:
+        return None
+    data: Dict[str, Any] = {"results": [], "tokens": []}
+    for name in names:
+        for line in source.lines(name):
+            line = line.strip()
+            if line.startswith("eyJ"):
+                # Keep only the header segment of a token: it names the algorithm and key references
+                _add_unique(data["tokens"], line.split(".", 1)[0], 10)
+            elif JWT_SIGNALS.search(line):
+                _add_unique(data["results"], line[:300], 300)
+    data = {key: value for key, value in data.items() if value}
+    if not data:
+        return None
+    return Ingested(tool, data, names, truncated=bound(data, limit))
@@ -0,0 +1,262 @@
+"""Structured timing, token and memory instrumentation for the report pipeline.
+
+Work is wrapped in spans (graph nodes, LLM calls, S3 transfers, render steps).
+Each finished span records wall time, bytes, prompt/completion tokens, cache
+hits and memory, and is written to a sink as one JSON line or as a CloudWatch
+Embedded Metric Format (EMF) record.
+
+Configuration comes from the environment:
+
+* ``REPORT_METRICS_SINK``: ``jsonl``, ``emf`` or ``none``
+* ``REPORT_METRICS_PATH``: file to append to (defaults to stdout)
+* ``REPORT_METRICS_NAMESPACE``: EMF namespace (default ``BreachX/Reports``)
+* ``REPORT_METRICS_TRACEMALLOC``: ``1`` to record peak Python heap per span
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import resource
+import threading
+import functools
+import contextvars
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, TextIO
+
+# Metric name -> CloudWatch unit
+METRIC_UNITS = {
+    "wall_ms": "Milliseconds",
+    "bytes": "Bytes",
+    "prompt_tokens": "Count",
+    "completion_tokens": "Count",
+    "cached_tokens": "Count",
+    "cache_hits": "Count",
+    "cache_misses": "Count",
+    "llm_calls": "Count",
+    "knowledge_hits": "Count",
+    "knowledge_misses": "Count",
+    "knowledge_learned": "Count",
+    "ranked_findings": "Count",
+    "unranked_findings": "Count",
+    "blob_peak_memory_bytes": "Bytes",
+    "blob_spill_bytes": "Bytes",
+    "checkpoints": "Count",
+    "peak_heap_mb": "Megabytes",
+    "max_rss_mb": "Megabytes",
+}
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("report_span", default=None)
+
+def max_rss_mb() -> float:
+    """Process high-water resident set size in MB (ru_maxrss is KB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+class Span:
+    """A timed unit of work with numeric metrics and free-form attributes."""
+
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_id", "attributes", "metrics",
+                 "start", "_peak_heap")
+
+    def __init__(self, name: str, kind: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.metrics: Dict[str, float] = {}
+        self.start = time.perf_counter()
+        self._peak_heap = 0
+
+    def add(self, **metrics: float):
+        """Increment numeric metrics, e.g. ``span.add(bytes=len(body))``."""
+        for name, value in metrics.items():
+            if value:
+                self.metrics[name] = self.metrics.get(name, 0) + value
+
+    def set(self, **attributes: Any):
+        """Attach attributes such as the tool name or S3 key."""
+        self.attributes.update(attributes)
+
+    def record_llm_response(self, response: Any):
+        """Record token usage and provider cache hits from a LangChain chat response."""
+        self.add(llm_calls=1, **llm_usage(response))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "attributes": self.attributes,
+            "metrics": self.metrics,
+        }
+
+def llm_usage(response: Any) -> Dict[str, int]:
+    """Extract prompt/completion/cached token counts from OpenAI or Gemini responses."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    metadata = getattr(response, "response_metadata", None) or {}
+    if usage:
+        details = usage.get("input_token_details") or {}
+        cached = details.get("cache_read", 0)
+        prompt, completion = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    elif "token_usage" in metadata:
+        # OpenAI style
+        token_usage = metadata["token_usage"] or {}
+        cached = (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+        prompt, completion = token_usage.get("prompt_tokens", 0), token_usage.get("completion_tokens", 0)
+    else:
+        # Gemini style
+        gemini_usage = metadata.get("usage_metadata") or {}
+        cached = gemini_usage.get("cached_content_token_count", 0)
+        prompt = gemini_usage.get("prompt_token_count", 0)
+        completion = gemini_usage.get("candidates_token_count", 0)
+    return {"prompt_tokens": prompt or 0, "completion_tokens": completion or 0,
+            "cached_tokens": cached or 0, "cache_hits": 1 if cached else 0}
+
+class NullSink:
+    """Discard spans."""
+
+    def emit(self, span: Span, wall_ms: float):
+        pass
+
+class _StreamSink:
+    """Base for sinks that write one JSON document per line."""
+
+    def __init__(self, path: Optional[str] = None, stream: Optional[TextIO] = None):
+        self.path = path
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def _write(self, record: Dict[str, Any]):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if self.path:
+                with open(self.path, 'a') as f:
+                    f.write(line)
+            else:
+                stream = self.stream or sys.stdout
+                stream.write(line)
+                stream.flush()
+
+class JsonLinesSink(_StreamSink):
+    """Write each span as a JSON line."""
+
+    def emit(self, span: Span, wall_ms: float):
+        record = span.to_dict()
+        record["timestamp"] = time.time()
+        record["metrics"] = dict(span.metrics, wall_ms=wall_ms)
+        self._write(record)
+
+class EmfSink(_StreamSink):
+    """Write each span as a CloudWatch Embedded Metric Format record.
+
+    In Lambda, EMF lines written to stdout are turned into metrics by CloudWatch Logs;
+    pointing ``path`` at a file gives a local sink for tests.
+    """
+
+    def __init__(self, namespace: str = "BreachX/Reports", service: str = "report-pipeline", **kwargs):
+        super().__init__(**kwargs)
+        self.namespace = namespace
+        self.service = service
+
+    def emit(self, span: Span, wall_ms: float):
+        metrics = dict(span.metrics, wall_ms=wall_ms)
+        record = {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": self.namespace,
+                    "Dimensions": [["Service", "Kind", "Span"]],
+                    "Metrics": [{"Name": name, "Unit": METRIC_UNITS.get(name, "None")} for name in metrics],
+                }],
+            },
+            "Service": self.service,
+            "Kind": span.kind,
+            "Span": span.name,
+            "TraceId": span.trace_id,
+            "SpanId": span.span_id,
+            "ParentId": span.parent_id,
+            **{f"attr.{k}": v for k, v in span.attributes.items()},
+            **metrics,
+        }
+        self._write(record)
+
+class Tracer:
+    """Creates spans and sends finished ones to a sink."""
+
+    def __init__(self, sink=None, service: str = "report-pipeline", trace_heap: bool = False):
+        self.sink = sink or NullSink()
+        self.service = service
+        self.trace_heap = trace_heap
+        self.trace_id = uuid.uuid4().hex
+        self.enabled = not isinstance(self.sink, NullSink)
+
+    def new_trace(self, trace_id: Optional[str] = None) -> str:
+        """Start a new trace, e.g. once per Lambda invocation."""
+        self.trace_id = trace_id or uuid.uuid4().hex
+        return self.trace_id
+
+    @contextmanager
+    def span(self, name: str, kind: str = "stage", **attributes: Any) -> Iterator[Span]:
+        parent = _current_span.get()
+        span = Span(name, kind, self.trace_id, parent.span_id if parent else None, attributes)
+        token = _current_span.set(span)
+
+        if self.trace_heap:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            # Fold the heap peak reached so far into the parent before resetting the counter
+            if parent is not None:
+                parent._peak_heap = max(parent._peak_heap, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+
+        try:
+            yield span
+        except Exception as e:
+            span.set(error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            wall_ms = (time.perf_counter() - span.start) * 1000
+            _current_span.reset(token)
+            if self.trace_heap:
+                span._peak_heap = max(span._peak_heap, tracemalloc.get_traced_memory()[1])
+                span.metrics["peak_heap_mb"] = span._peak_heap / 1024 ** 2
+                if parent is not None:
+                    parent._peak_heap = max(parent._peak_heap, span._peak_heap)
+            span.metrics["max_rss_mb"] = max_rss_mb()
+            self.sink.emit(span, wall_ms)
+
+    def traced(self, name: Optional[str] = None, kind: str = "stage") -> Callable:
+        """Decorator that runs the function inside a span."""
+        def decorator(fn: Callable) -> Callable:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name or fn.__name__, kind=kind):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+def current_span() -> Optional[Span]:
+    """Return the innermost active span, if any."""
+    return _current_span.get()
+
+def configure(default_sink: str = "none", service: str = "report-pipeline") -> Tracer:
+    """Build a tracer from REPORT_METRICS_* environment variables."""
+    sink_name = os.environ.get("REPORT_METRICS_SINK", default_sink).lower()
+    path = os.environ.get("REPORT_METRICS_PATH") or None
+    trace_heap = os.environ.get("REPORT_METRICS_TRACEMALLOC") == "1"
+
+    if sink_name == "jsonl":
+        sink = JsonLinesSink(path=path)
+    elif sink_name == "emf":
+        sink = EmfSink(namespace=os.environ.get("REPORT_METRICS_NAMESPACE", "BreachX/Reports"),
+                       service=service, path=path)
+    elif sink_name == "none":
+        sink = NullSink()
+    else:
+        raise ValueError(f"Unknown REPORT_METRICS_SINK: {sink_name}")
+    return Tracer(sink, service=service, trace_heap=trace_heap)
@@ -0,0 +1,244 @@
+"""Persistent priority and fair-share job queue for scan analysis.
+
+Jobs are stored in SQLite, so a restart loses nothing. Scheduling works as follows:
+
+* **Priority classes**: ``critical`` (scans with critical findings) before
+  ``interactive`` (a user is waiting) before ``on-demand`` before ``nightly``.
+* **Fair share**: each user, then each repository, gets a FIFO lane. The next
+  job is taken from the lane heads, so a user with 200 queued rescans gets one
+  turn at a time, like anyone else at the same priority. ``max_running_per_user``
+  and ``max_running_per_repo`` cap the concurrent share of one user or repository.
+* **Deduplication**: a second pending job with the same kind, user, target and
+  payload (hashed together, so a different ``scan_dir``, output or option makes it
+  a different job) is merged into the first. Only jobs with a ``target_url``
+  are deduplicated. The first job keeps the higher of the two priorities.
+
+Queue wait (enqueue to start) is recorded per job; ``stats()`` reports p50/p95
+per priority class.
+"""
+import os
+import json
+import time
+import uuid
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+# Lower runs first
+PRIORITY_CLASSES = {"critical": 0, "interactive": 10, "on-demand": 20, "nightly": 50}
+
+class QueueFull(Exception):
+    """Raised when a user already has the maximum number of pending jobs."""
+
+class JobQueue:
+    def __init__(self, path: str = ":memory:", max_running_per_user: int = 2, max_running_per_repo: int = 1,
+                 max_pending_per_user: int = 500):
+        self.path = path
+        self.max_running_per_user = max_running_per_user
+        self.max_running_per_repo = max_running_per_repo
+        self.max_pending_per_user = max_pending_per_user
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                repository_id TEXT NOT NULL,
+                target_url TEXT,
+                priority_class TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                enqueued_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                duplicates INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                dedupe_key TEXT
+            );
+            CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, user_id, priority, enqueued_at);
+            CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (status, finished_at);
+        """)
+        # Queues created before dedupe_key merged on (kind, target_url) alone
+        columns = {row["name"] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        if "dedupe_key" not in columns:
+            self._db.execute("ALTER TABLE jobs ADD COLUMN dedupe_key TEXT")
+        self._db.executescript("""
+            DROP INDEX IF EXISTS jobs_dedupe;
+            CREATE UNIQUE INDEX IF NOT EXISTS jobs_dedupe_key ON jobs (dedupe_key)
+                WHERE status = 'pending' AND dedupe_key IS NOT NULL;
+        """)
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], user_id: str = "anonymous", repository_id: str = "",
+                target_url: Optional[str] = None, priority_class: str = "on-demand") -> Dict[str, Any]:
+        """Add a job, or merge it into an identical pending job of the same user.
+
+        Returns ``{"id": ..., "deduplicated": bool}``.
+        """
+        if priority_class not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class: {priority_class}")
+        priority = PRIORITY_CLASSES[priority_class]
+        dedupe_key = _dedupe_key(kind, user_id, target_url, payload) if target_url else None
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if dedupe_key:
+                    row = self._db.execute(
+                        "SELECT id, priority FROM jobs WHERE status = 'pending' AND dedupe_key = ?",
+                        (dedupe_key,)).fetchone()
+                    if row:
+                        # Keep the more urgent class of the two requests
+                        if priority < row["priority"]:
+                            self._db.execute("UPDATE jobs SET priority = ?, priority_class = ? WHERE id = ?",
+                                             (priority, priority_class, row["id"]))
+                        self._db.execute("UPDATE jobs SET duplicates = duplicates + 1 WHERE id = ?", (row["id"],))
+                        self._db.execute("COMMIT")
+                        return {"id": row["id"], "deduplicated": True}
+
+                (pending,) = self._db.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'pending' AND user_id = ?", (user_id,)).fetchone()
+                if pending >= self.max_pending_per_user:
+                    raise QueueFull(f"User {user_id} already has {pending} pending jobs")
+
+                job_id = uuid.uuid4().hex[:12]
+                self._db.execute(
+                    "INSERT INTO jobs (id, kind, payload, user_id, repository_id, target_url, priority_class, "
+                    "priority, enqueued_at, dedupe_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, kind, json.dumps(payload), user_id, repository_id, target_url, priority_class,
+                     priority, time.time(), dedupe_key))
+                self._db.execute("COMMIT")
+                return {"id": job_id, "deduplicated": False}
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """Mark the next eligible job as running and return it, or None."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                running_users = dict(self._db.execute(
+                    "SELECT user_id, COUNT(*) FROM jobs WHERE status = 'running' GROUP BY user_id").fetchall())
+                running_repos = dict(self._db.execute(
+                    "SELECT repository_id, COUNT(*) FROM jobs WHERE status = 'running' GROUP BY repository_id"
+                ).fetchall())
+                last_started = dict(self._db.execute(
+                    "SELECT user_id, MAX(started_at) FROM jobs WHERE started_at IS NOT NULL GROUP BY user_id"
+                ).fetchall())
+
+                # Head of each (user, repository) lane, so one busy user can't crowd the candidates
+                heads = self._db.execute("""
+                    SELECT * FROM (
+                        SELECT *, ROW_NUMBER() OVER (
+                            PARTITION BY user_id, repository_id ORDER BY priority, enqueued_at) AS lane_position
+                        FROM jobs WHERE status = 'pending'
+                    ) WHERE lane_position = 1
+                """).fetchall()
+                eligible = [
+                    row for row in heads
+                    if running_users.get(row["user_id"], 0) < self.max_running_per_user
+                    and (not row["repository_id"]
+                         or running_repos.get(row["repository_id"], 0) < self.max_running_per_repo)
+                ]
+                if not eligible:
+                    self._db.execute("COMMIT")
+                    return None
+
+                # Most urgent first; ties go to the user with the fewest running jobs, then the one served longest ago
+                job = min(eligible, key=lambda row: (row["priority"], running_users.get(row["user_id"], 0),
+                                                     last_started.get(row["user_id"]) or 0, row["enqueued_at"]))
+                now = time.time()
+                self._db.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                    (now, job["id"]))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        claimed = self._to_dict(job)
+        claimed.update(status="running", started_at=now)
+        return claimed
+
+    def complete(self, job_id: str):
+        self._finish(job_id, "done", None)
+
+    def fail(self, job_id: str, error: str):
+        self._finish(job_id, "failed", error)
+
+    def _finish(self, job_id: str, status: str, error: Optional[str]):
+        with self._lock:
+            self._db.execute("UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE id = ?",
+                             (status, time.time(), error, job_id))
+
+    def requeue_running(self) -> int:
+        """Put jobs left running by a crashed process back in the queue."""
+        with self._lock:
+            cursor = self._db.execute("UPDATE jobs SET status = 'pending', started_at = NULL WHERE status = 'running'")
+            return cursor.rowcount
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'pending'").fetchone()[0]
+
+    def stats(self, window_s: float = 3600) -> Dict[str, Any]:
+        """Queue depth per class and queue-wait percentiles for jobs started in the window."""
+        since = time.time() - window_s
+        with self._lock:
+            depth = dict(self._db.execute(
+                "SELECT priority_class, COUNT(*) FROM jobs WHERE status = 'pending' GROUP BY priority_class"
+            ).fetchall())
+            running = self._db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'running'").fetchone()[0]
+            rows = self._db.execute(
+                "SELECT priority_class, started_at - enqueued_at FROM jobs WHERE started_at >= ?", (since,)
+            ).fetchall()
+        waits: Dict[str, List[float]] = {}
+        for priority_class, wait in rows:
+            waits.setdefault(priority_class, []).append(wait)
+        return {
+            "pending": depth,
+            "running": running,
+            "wait_s": {
+                priority_class: {"count": len(values), "p50": _percentile(values, 0.5),
+                                 "p95": _percentile(values, 0.95)}
+                for priority_class, values in waits.items()
+            },
+        }
+
+    def purge(self, older_than_s: float = 7 * 86400) -> int:
+        """Delete finished jobs older than the retention period."""
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                                      (time.time() - older_than_s,))
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = {key: row[key] for key in row.keys() if key not in ("lane_position", "dedupe_key")}
+        job["payload"] = json.loads(job["payload"])
+        return job
+
+def _dedupe_key(kind: str, user_id: str, target_url: str, payload: Dict[str, Any]) -> str:
+    canonical = json.dumps([kind, user_id, target_url, payload], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 3)
@@ -0,0 +1,268 @@
+"""Finding-level knowledge cache shared across targets.
+
+The same CVEs and misconfigurations come up on many targets. The cache stores
+the generic description and remediation text for each finding, keyed on its
+normalized identity: the CVE or rule id plus the component class, with versions
+stripped. Before prompting, the pipeline looks up the findings in a report. The
+LLM only explains findings it has not seen before, plus what is specific to the
+target. Cached explanations are attached to the analysis afterwards.
+
+Storage is a SQLite file, bounded to ``max_entries`` with least-recently-used
+eviction, fronted by a small in-memory LRU. Configuration comes from the
+environment:
+
+* ``KNOWLEDGE_CACHE_PATH``: SQLite file, or ``off`` to disable the cache
+* ``KNOWLEDGE_CACHE_MAX_ENTRIES``: persistent size bound (default 50000)
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+CVE_PATTERN = re.compile(r"\bCVE-\d{4}-\d{4,7}\b", re.IGNORECASE)
+VERSION_PATTERN = re.compile(r"[\s/:@=_-]*v?\d")
+
+# Fields that carry a finding id / affected component in scanner JSON (trivy, nuclei, zap, testssl, ...)
+ID_FIELDS = ("VulnerabilityID", "cve", "template-id", "templateID", "pluginid", "alertRef", "id")
+COMPONENT_FIELDS = ("PkgName", "affected_component", "component", "product", "service")
+# testssl/nuclei severities that are not findings
+IGNORED_SEVERITIES = {"ok", "info", "informational", "none"}
+
+# Marker the analysis prompts use for machine-readable explanations of new findings
+KNOWLEDGE_MARKER = "KNOWLEDGE:"
+
+@dataclass
+class Knowledge:
+    rule_id: str
+    component: str
+    description: str
+    remediation: str
+
+    @property
+    def key(self) -> str:
+        return finding_key(self.rule_id, self.component)
+
+def normalize_rule(rule_id: str) -> str:
+    """CVE ids in canonical upper case; other rule ids lower-case with dashes."""
+    rule_id = str(rule_id).strip()
+    if CVE_PATTERN.fullmatch(rule_id):
+        return rule_id.upper()
+    return re.sub(r"\s+", "-", rule_id.lower())
+
+def component_class(component: Optional[str]) -> str:
+    """Reduce a component to its product class: 'OpenSSL/1.0.2k' -> 'openssl'."""
+    if not component:
+        return "any"
+    name = VERSION_PATTERN.split(str(component).lower(), maxsplit=1)[0]
+    name = re.sub(r"\s+", " ", name).strip(" -_/:")
+    return name or "any"
+
+def finding_key(rule_id: str, component: Optional[str] = None) -> str:
+    rule = normalize_rule(rule_id)
+    # A CVE already pins the product; keying it on component would split identical advice
+    component = "any" if CVE_PATTERN.fullmatch(rule) else component_class(component)
+    return f"{rule}|{component}"
+
+def _walk_findings(node: Any, default_component: Optional[str], found: Dict[str, Tuple[str, str]]):
+    if isinstance(node, dict):
+        rule_id = next((node[f] for f in ID_FIELDS if isinstance(node.get(f), (str, int)) and node.get(f) != ""), None)
+        severity = str(node.get("severity") or node.get("Severity") or "").lower()
+        if rule_id is not None and severity not in IGNORED_SEVERITIES:
+            component = next((node[f] for f in COMPONENT_FIELDS if isinstance(node.get(f), str)), default_component)
+            found.setdefault(finding_key(rule_id, component), (normalize_rule(rule_id), component_class(component)))
+        for value in node.values():
+            _walk_findings(value, default_component, found)
+    elif isinstance(node, list):
+        for value in node:
+            _walk_findings(value, default_component, found)
+
+def extract_findings(report: Any, default_component: Optional[str] = None) -> Dict[str, Tuple[str, str]]:
+    """Finding identities in a scanner report: key -> (rule id, component class).
+
+    Structured JSON is walked for id/component fields; CVE ids are also picked
+    out of any text.
+    """
+    found: Dict[str, Tuple[str, str]] = {}
+    if isinstance(report, (dict, list)):
+        _walk_findings(report, default_component, found)
+        text = json.dumps(report)
+    else:
+        text = str(report)
+    for cve in CVE_PATTERN.findall(text):
+        found.setdefault(finding_key(cve), (cve.upper(), "any"))
+    return found
+
+def match_finding(vulnerability: Dict[str, Any], findings: Dict[str, Tuple[str, str]]) -> Optional[str]:
+    """Key of the scanner finding (``extract_findings``) a structured vulnerability reports, or None.
+
+    The report prompt asks the model to echo the scanner's rule id as the
+    vulnerability id, so lookups and learned entries share the scanner's keys.
+    A CVE anywhere in the vulnerability is a key on its own. Vulnerabilities
+    matching neither are not cached: their LLM-chosen names would never be
+    looked up again.
+    """
+    rule = normalize_rule(vulnerability.get("id") or "")
+    for key, (rule_id, _) in findings.items():
+        if rule == rule_id:
+            return key
+    for field in ("id", "name", "description"):
+        match = CVE_PATTERN.search(str(vulnerability.get(field, "")))
+        if match:
+            return finding_key(match.group(0))
+    return None
+
+def split_knowledge_block(text: str) -> Tuple[str, List[Knowledge]]:
+    """Strip the ``KNOWLEDGE:`` block from an LLM analysis and parse its entries.
+
+    Each line after the marker is a JSON object with id, component, description
+    and remediation; malformed lines are ignored.
+    """
+    head, marker, tail = text.partition(KNOWLEDGE_MARKER)
+    if not marker:
+        return text, []
+    entries = []
+    for line in tail.splitlines():
+        line = line.strip().strip("`").strip()
+        if not line.startswith("{"):
+            continue
+        try:
+            item = json.loads(line)
+            entries.append(Knowledge(normalize_rule(item["id"]), component_class(item.get("component")),
+                                     str(item["description"]), str(item["remediation"])))
+        except (ValueError, KeyError, TypeError):
+            continue
+    return head.rstrip(), entries
+
+def format_known_findings(entries: Iterable[Knowledge]) -> str:
+    """Prompt section listing findings the LLM should not re-explain."""
+    lines = [f"- {entry.rule_id} ({entry.component})" for entry in entries]
+    if not lines:
+        return ""
+    return "KNOWN FINDINGS (already explained in the knowledge base):\n" + "\n".join(lines) + "\n\n"
+
+def format_reference(entries: Iterable[Knowledge]) -> str:
+    """Appendix with the cached explanations for known findings."""
+    sections = [f"{entry.rule_id} ({entry.component})\nDescription: {entry.description}\n"
+                f"Remediation: {entry.remediation}" for entry in entries]
+    if not sections:
+        return ""
+    return "\n\n## Known Issue Reference\n" + "\n\n".join(sections)
+
+class KnowledgeCache:
+    """SQLite-backed finding knowledge with an in-memory LRU in front."""
+
+    def __init__(self, path: str = ":memory:", max_entries: int = 50000, memory_entries: int = 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, Knowledge]" = OrderedDict()
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS knowledge (
+            key TEXT PRIMARY KEY,
+            rule_id TEXT NOT NULL,
+            component TEXT NOT NULL,
+            description TEXT NOT NULL,
+            remediation TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            uses INTEGER NOT NULL DEFAULT 0
+        )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS knowledge_last_used ON knowledge (last_used)")
+        self._db.commit()
+
+    def _remember(self, key: str, entry: Knowledge):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Knowledge]:
+        """Look up finding keys; returns only the ones that are known."""
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, Knowledge] = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                else:
+                    missing.append(key)
+            for start in range(0, len(missing), 500):
+                batch = missing[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT key, rule_id, component, description, remediation FROM knowledge "
+                    f"WHERE key IN ({','.join('?' * len(batch))})", batch).fetchall()
+                for key, rule_id, component, description, remediation in rows:
+                    entry = Knowledge(rule_id, component, description, remediation)
+                    found[key] = entry
+                    self._remember(key, entry)
+            if found:
+                self._db.executemany("UPDATE knowledge SET last_used = ?, uses = uses + 1 WHERE key = ?",
+                                     [(time.time(), key) for key in found])
+                self._db.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key: str) -> Optional[Knowledge]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, entries: Iterable[Knowledge]):
+        now = time.time()
+        entries = list(entries)
+        if not entries:
+            return
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO knowledge (key, rule_id, component, description, remediation, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+                "description = excluded.description, remediation = excluded.remediation, last_used = excluded.last_used",
+                [(e.key, e.rule_id, e.component, e.description, e.remediation, now, now) for e in entries])
+            for entry in entries:
+                self._remember(entry.key, entry)
+            self._evict()
+            self._db.commit()
+
+    def put(self, entry: Knowledge):
+        self.put_many([entry])
+
+    def _evict(self):
+        (count,) = self._db.execute("SELECT COUNT(*) FROM knowledge").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            evicted = [key for (key,) in self._db.execute(
+                "SELECT key FROM knowledge ORDER BY last_used LIMIT ?", (excess,))]
+            self._db.executemany("DELETE FROM knowledge WHERE key = ?", [(key,) for key in evicted])
+            for key in evicted:
+                self._memory.pop(key, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM knowledge").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+def configure(default_path: str) -> Optional[KnowledgeCache]:
+    """Open the cache from KNOWLEDGE_CACHE_* environment variables, or None when disabled."""
+    path = os.environ.get("KNOWLEDGE_CACHE_PATH", default_path)
+    if path.lower() in ("off", "none", ""):
+        return None
+    max_entries = int(os.environ.get("KNOWLEDGE_CACHE_MAX_ENTRIES", "50000"))
+    return KnowledgeCache(path, max_entries=max_entries)
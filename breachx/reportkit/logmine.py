@@ -0,0 +1,203 @@
+"""Line-template mining that compacts verbose text scanner output for prompts.
+
+Text reports (nmap ``-oN``, SSRFmap's report.txt, jwt_tool and nikto text
+output) are mostly lines that repeat with different ports, paths or payloads.
+Cutting them to the first few thousand characters loses everything after the
+head. Instead, ``Miner`` clusters lines into templates in one streaming pass,
+Drain style: lines are routed through a fixed-depth prefix tree by token count
+and leading tokens. Each line then joins the most similar cluster in its leaf,
+and the tokens where they differ become ``<*>``. Each template keeps a count,
+the position of its first line and a few example lines. ``render`` prints the
+templates in report order, keeps rare lines verbatim and shows example values
+for the wildcards.
+
+Work per line is bounded by the leaf size and line length, so mining is linear
+in the input. Memory is bounded by ``max_clusters`` whatever the input size;
+lines that would need a new cluster past the limit are only counted.
+
+Usage:
+    python -m reportkit.logmine nmap-report.txt --limit 8000
+"""
+import io
+import sys
+import time
+import argparse
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+WILDCARD = "<*>"
+# Longer lines are cut before mining; one base64 blob shouldn't become a template
+MAX_LINE_CHARS = 400
+MAX_TOKENS = 40
+MAX_VALUE_CHARS = 60
+
+@dataclass(slots=True)
+class Cluster:
+    template: List[str]
+    first_line: int
+    count: int = 0
+    examples: List[List[str]] = field(default_factory=list)  # first distinct lines, as tokens
+
+    @property
+    def rare(self) -> bool:
+        """Every line of the cluster is kept as an example."""
+        return self.count == len(self.examples) or WILDCARD not in self.template
+
+def _has_digit(token: str) -> bool:
+    return any(c.isdigit() for c in token)
+
+class Miner:
+    """Streaming Drain-style line clustering.
+
+    ``similarity`` is the fraction of equal tokens needed to join a cluster.
+    ``depth`` counts the tree levels, including the root and the token-count
+    level, so lines are routed by their first ``depth - 2`` tokens. Tokens with
+    digits route as wildcards.
+    """
+
+    def __init__(self, similarity: float = 0.4, depth: int = 4, max_children: int = 100,
+                 max_clusters: int = 5000, max_examples: int = 3):
+        self.similarity = similarity
+        self.depth = depth
+        self.max_children = max_children
+        self.max_clusters = max_clusters
+        self.max_examples = max_examples
+        self.clusters: List[Cluster] = []
+        self.lines = 0
+        self.chars = 0
+        self.blank = 0
+        self.overflow = 0   # lines past max_clusters that matched no template
+        self._leaves: Dict[Tuple, List[Cluster]] = {}
+        self._nodes: Set[Tuple] = set()
+        self._fanout: Dict[Tuple, int] = {}
+
+    def add(self, line: str):
+        self.lines += 1
+        self.chars += len(line)
+        tokens = line[:MAX_LINE_CHARS].split()
+        if not tokens:
+            self.blank += 1
+            return
+        if len(tokens) > MAX_TOKENS:
+            tokens[MAX_TOKENS - 1:] = [" ".join(tokens[MAX_TOKENS - 1:])]
+
+        leaf = self._leaf(tokens)
+        cluster = self._match(leaf, tokens)
+        if cluster is None:
+            if len(self.clusters) >= self.max_clusters:
+                self.overflow += 1
+                return
+            cluster = Cluster(list(tokens), self.lines)
+            leaf.append(cluster)
+            self.clusters.append(cluster)
+        else:
+            template = cluster.template
+            for i, token in enumerate(tokens):
+                if template[i] != token:
+                    template[i] = WILDCARD
+        cluster.count += 1
+        if len(cluster.examples) < self.max_examples and tokens not in cluster.examples:
+            cluster.examples.append(tokens)
+
+    def add_all(self, lines: Iterable[str]) -> "Miner":
+        for line in lines:
+            self.add(line)
+        return self
+
+    def _leaf(self, tokens: List[str]) -> List[Cluster]:
+        path: Tuple = (len(tokens),)
+        for token in tokens[:self.depth - 2]:
+            child = path + (WILDCARD if _has_digit(token) else token,)
+            if child not in self._nodes:
+                # A node with too many children sends new tokens down its wildcard branch
+                if self._fanout.get(path, 0) >= self.max_children:
+                    child = path + (WILDCARD,)
+                if child not in self._nodes:
+                    self._nodes.add(child)
+                    self._fanout[path] = self._fanout.get(path, 0) + 1
+            path = child
+        return self._leaves.setdefault(path, [])
+
+    def _match(self, leaf: List[Cluster], tokens: List[str]) -> Optional[Cluster]:
+        best, best_similarity = None, -1.0
+        for cluster in leaf:
+            equal = sum(1 for a, b in zip(cluster.template, tokens) if a == b)
+            similarity = equal / len(tokens)
+            if similarity > best_similarity:
+                best, best_similarity = cluster, similarity
+        return best if best_similarity >= self.similarity else None
+
+    def render(self, limit: int = 0) -> str:
+        """Templates and rare lines in report order, fitted to ``limit`` characters (0 = no limit).
+
+        To fit, example values are dropped first. Then the most frequent
+        templates are dropped, since rare lines are more often the findings.
+        """
+        header = (f"COMPACTED TEXT REPORT: {self.lines} lines as {len(self.clusters)} templates. "
+                  f"'[xN]' marks a line repeated N times with <*> for the parts that vary, "
+                  f"followed by example values; rare lines are verbatim.")
+        clusters = sorted(self.clusters, key=lambda cluster: cluster.first_line)
+        for with_examples in (True, False):
+            entries = [(cluster, _format(cluster, with_examples)) for cluster in clusters]
+            body = "\n".join(text for _, text in entries)
+            if not limit or len(header) + len(body) + 1 <= limit:
+                break
+        else:
+            # Keep the rarest entries that fit, still printed in report order
+            budget = limit - len(header) - 80
+            kept = set()
+            for cluster, text in sorted(entries, key=lambda entry: (entry[0].count, entry[0].first_line)):
+                if len(text) + 1 > budget:
+                    break
+                budget -= len(text) + 1
+                kept.add(id(cluster))
+            dropped = sum(1 for cluster, _ in entries if id(cluster) not in kept)
+            body = "\n".join(text for cluster, text in entries if id(cluster) in kept)
+            body += f"\n[{dropped} frequent templates omitted to fit the prompt]"
+        if self.overflow:
+            body += f"\n[{self.overflow} more lines not clustered: template limit reached]"
+        return f"{header}\n{body}"
+
+    def stats(self) -> Dict[str, int]:
+        return {"lines": self.lines, "chars": self.chars, "blank": self.blank, "templates": len(self.clusters),
+                "rare": sum(1 for cluster in self.clusters if cluster.rare), "overflow": self.overflow}
+
+def _format(cluster: Cluster, with_examples: bool) -> str:
+    if cluster.rare:
+        if WILDCARD not in cluster.template and cluster.count > 1:
+            return f"[x{cluster.count}] " + " ".join(cluster.template)
+        return "\n".join(" ".join(tokens) for tokens in cluster.examples)
+    text = f"[x{cluster.count}] " + " ".join(cluster.template)
+    if with_examples:
+        positions = [i for i, token in enumerate(cluster.template) if token == WILDCARD]
+        values = [", ".join(tokens[i][:MAX_VALUE_CHARS] for i in positions) for tokens in cluster.examples]
+        text += "  e.g. " + " | ".join(values)
+    return text
+
+def compact_text(text: str, limit: int) -> str:
+    """``text`` compacted to templates if it is longer than ``limit`` characters; unchanged otherwise."""
+    if not limit or len(text) <= limit:
+        return text
+    return Miner().add_all(io.StringIO(text)).render(limit)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact a text scanner report into line templates")
+    parser.add_argument("path", help="Text report; '-' reads stdin")
+    parser.add_argument("--limit", type=int, default=8000, help="Output size in characters (0 = no limit)")
+    parser.add_argument("--similarity", type=float, default=0.4)
+    parser.add_argument("--max-clusters", type=int, default=5000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    miner = Miner(similarity=args.similarity, max_clusters=args.max_clusters)
+    # Streamed line by line, so multi-GB reports run in bounded memory
+    with (open(args.path, errors="replace") if args.path != "-" else sys.stdin) as f:
+        miner.add_all(f)
+    output = miner.render(args.limit)
+    print(output)
+    stats = miner.stats()
+    print(f"{stats['lines']} lines ({stats['chars']} chars) -> {stats['templates']} templates, "
+          f"{stats['rare']} rare, {len(output)} chars in {time.perf_counter() - start:.2f} s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""Typed report model shared by analysis, the Lambda and the renderers.
+
+``Finding``, ``ToolResult`` and ``Report`` are slotted dataclasses. Severities
+are normalized to the canonical levels and interned, so 100k findings cost a
+fraction of the equivalent dicts. ``decode_llm_report`` validates LLM JSON
+output straight into the model. It is a single pass with no pydantic, and
+errors name the offending field.
+
+Reports are exchanged between stages as NDJSON. The first line is a header
+object with the report-level fields. Each following line is a compact array:
+``["F", id, name, severity, affected_component, description, remediation, tool,
+cvss, cwe, kev, fixed_in]`` for a finding (readers accept rows without the
+trailing enrichment fields), or ``["T", tool, status, analysis, report_key, analyzed_at, error]``
+for a tool result. Rows are written one at a time and read back in batches
+of lines. ``load_report`` also accepts the legacy indented JSON report, so
+existing files keep working.
+
+NDJSON trades decode speed for memory and size. Decoding it into the model
+is faster than loading legacy JSON into the model. It is about 2x slower
+than ``json.load`` into plain dicts, since every row becomes a ``Finding``.
+In exchange, the file is about a quarter smaller and the decoded report holds
+about 30% less memory (benchmarks/bench_model.py). Rows are trusted: they are
+decoded positionally without field validation. The legacy indented JSON
+stays the default output. NDJSON is written only for ``.ndjson``/``.jsonl``
+paths.
+"""
+import io
+import sys
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, IO, Iterator, List, Optional
+
+FORMAT = "breachx-report"
+VERSION = 1
+
+SEVERITIES = ("Critical", "High", "Medium", "Low", "Info")
+SEVERITY_ALIASES = {"informational": "Info", "information": "Info", "none": "Info", "moderate": "Medium",
+                    "important": "High", "severe": "Critical"}
+_SEVERITY_LOOKUP = dict({level.lower(): level for level in SEVERITIES}, **SEVERITY_ALIASES)
+_CANONICAL_SEVERITIES = {level: level for level in SEVERITIES}
+
+FINDING_TAG = "F"
+TOOL_TAG = "T"
+
+# Bytes of NDJSON rows decoded per json.loads call
+DECODE_BATCH_BYTES = 1024 * 1024
+
+class ModelError(ValueError):
+    """Data that doesn't fit the report model; the message names the field."""
+
+def normalize_severity(value: Any, path: str = "severity") -> str:
+    """Canonical severity level; unrecognized labels are kept (interned) as given."""
+    if value is None:
+        return "Info"
+    if not isinstance(value, str):
+        raise ModelError(f"{path}: expected a string, got {type(value).__name__}")
+    label = value.strip()
+    return _SEVERITY_LOOKUP.get(label.lower()) or sys.intern(label)
+
+def _text(data: Dict[str, Any], key: str, path: str, required: bool = False) -> Optional[str]:
+    value = data.get(key)
+    if value is None:
+        if required:
+            raise ModelError(f"{path}.{key}: required")
+        return None
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, (dict, list)):
+        # LLMs sometimes return structure where prose was asked for
+        return json.dumps(value)
+    raise ModelError(f"{path}.{key}: expected a string, got {type(value).__name__}")
+
+def _strings(data: Dict[str, Any], key: str, path: str) -> List[str]:
+    value = data.get(key) or []
+    if isinstance(value, str):
+        return [value]
+    if not isinstance(value, list):
+        raise ModelError(f"{path}.{key}: expected a list, got {type(value).__name__}")
+    return [item if isinstance(item, str) else json.dumps(item) for item in value]
+
+def _object(value: Any, path: str) -> Dict[str, Any]:
+    if not isinstance(value, dict):
+        raise ModelError(f"{path}: expected an object, got {type(value).__name__}")
+    return value
+
+@dataclass(slots=True)
+class Finding:
+    name: str
+    severity: str = "Info"
+    id: Optional[str] = None
+    affected_component: Optional[str] = None
+    description: Optional[str] = None
+    remediation: Optional[str] = None
+    tool: Optional[str] = None
+    # Enrichment from reportkit.cveindex
+    cvss: Optional[float] = None
+    cwe: Optional[str] = None
+    kev: Optional[bool] = None
+    fixed_in: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], path: str = "finding") -> "Finding":
+        data = _object(data, path)
+        name = _text(data, "name", path) or _text(data, "id", path)
+        if not name:
+            raise ModelError(f"{path}.name: required")
+        component = _text(data, "affected_component", path)
+        tool = _text(data, "tool", path)
+        cvss = data.get("cvss")
+        if cvss is not None and not isinstance(cvss, (int, float)):
+            raise ModelError(f"{path}.cvss: expected a number, got {type(cvss).__name__}")
+        kev = data.get("kev")
+        return cls(name=name, severity=normalize_severity(data.get("severity"), f"{path}.severity"),
+                   id=_text(data, "id", path), affected_component=sys.intern(component) if component else component,
+                   description=_text(data, "description", path), remediation=_text(data, "remediation", path),
+                   tool=sys.intern(tool) if tool else tool, cvss=cvss, cwe=_text(data, "cwe", path),
+                   kev=bool(kev) if kev is not None else None, fixed_in=_text(data, "fixed_in", path))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Legacy report JSON shape; unset optional fields are left out."""
+        data = {"id": self.id, "name": self.name, "severity": self.severity,
+                "description": self.description, "affected_component": self.affected_component,
+                "remediation": self.remediation, "tool": self.tool, "cvss": self.cvss, "cwe": self.cwe,
+                "kev": self.kev, "fixed_in": self.fixed_in}
+        return {key: value for key, value in data.items() if value is not None}
+
+    def to_row(self) -> List[Any]:
+        row = [FINDING_TAG, self.id, self.name, self.severity, self.affected_component, self.description,
+               self.remediation, self.tool, self.cvss, self.cwe, self.kev, self.fixed_in]
+        # Unenriched findings keep the short row
+        return row[:8] if row[8:] == [None] * 4 else row
+
+    @classmethod
+    def from_row(cls, row: List[Any]) -> "Finding":
+        """Finding from a row written by ``to_row``; rows are trusted, so fields are not validated."""
+        severity, component, tool = row[3], row[4], row[7]
+        # Repeated strings share one object: canonical severities, then interned components and tools
+        return cls(row[2], _CANONICAL_SEVERITIES.get(severity) or normalize_severity(severity), row[1],
+                   component and sys.intern(component), row[5], row[6], tool and sys.intern(tool), *row[8:])
+
+@dataclass(slots=True)
+class ToolResult:
+    tool: str
+    status: str = "ok"
+    analysis: Optional[str] = None
+    report_key: Optional[str] = None
+    analyzed_at: Optional[str] = None
+    error: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], path: str = "tool") -> "ToolResult":
+        data = _object(data, path)
+        return cls(tool=_text(data, "tool", path, required=True), status=_text(data, "status", path) or "ok",
+                   analysis=_text(data, "analysis", path), report_key=_text(data, "report_key", path),
+                   analyzed_at=_text(data, "analyzed_at", path), error=_text(data, "error", path))
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"tool": self.tool, "status": self.status, "analysis": self.analysis, "report_key": self.report_key,
+                "analyzed_at": self.analyzed_at, "error": self.error}
+        return {key: value for key, value in data.items() if value is not None}
+
+    def to_row(self) -> List[Any]:
+        return [TOOL_TAG, self.tool, self.status, self.analysis, self.report_key, self.analyzed_at, self.error]
+
+    @classmethod
+    def from_row(cls, row: List[Any]) -> "ToolResult":
+        return cls(*row[1:])
+
+@dataclass(slots=True)
+class Report:
+    summary: str = ""
+    risk_level: str = "Unknown"
+    vulnerabilities: List[Finding] = field(default_factory=list)
+    good_practices: List[str] = field(default_factory=list)
+    recommendations: List[str] = field(default_factory=list)
+    detailed_analysis: str = ""
+    target_url: Optional[str] = None
+    tools: List[ToolResult] = field(default_factory=list)
+    risk: Optional[Dict[str, Any]] = None  # reportkit.scoring.Assessment.to_dict()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], path: str = "report") -> "Report":
+        data = _object(data, path)
+        vulnerabilities = data.get("vulnerabilities") or []
+        if not isinstance(vulnerabilities, list):
+            raise ModelError(f"{path}.vulnerabilities: expected a list, got {type(vulnerabilities).__name__}")
+        tools = data.get("tools") or []
+        if not isinstance(tools, list):
+            raise ModelError(f"{path}.tools: expected a list, got {type(tools).__name__}")
+        risk_level = data.get("risk_level")
+        risk = data.get("risk")
+        if risk is not None and not isinstance(risk, dict):
+            raise ModelError(f"{path}.risk: expected an object, got {type(risk).__name__}")
+        return cls(
+            summary=_text(data, "summary", path) or "",
+            risk_level=normalize_severity(risk_level, f"{path}.risk_level") if risk_level else "Unknown",
+            vulnerabilities=[Finding.from_dict(item, f"{path}.vulnerabilities[{i}]")
+                             for i, item in enumerate(vulnerabilities)],
+            good_practices=_strings(data, "good_practices", path),
+            recommendations=_strings(data, "recommendations", path),
+            detailed_analysis=_text(data, "detailed_analysis", path) or "",
+            target_url=_text(data, "target_url", path),
+            tools=[ToolResult.from_dict(item, f"{path}.tools[{i}]") for i, item in enumerate(tools)],
+            risk=risk,
+        )
+
+    def _header(self) -> Dict[str, Any]:
+        return {"summary": self.summary, "risk_level": self.risk_level, "good_practices": self.good_practices,
+                "recommendations": self.recommendations, "detailed_analysis": self.detailed_analysis,
+                "target_url": self.target_url, "risk": self.risk}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Legacy report JSON shape (what generator.py used to read)."""
+        data = self._header()
+        data["vulnerabilities"] = [finding.to_dict() for finding in self.vulnerabilities]
+        if self.tools:
+            data["tools"] = [tool.to_dict() for tool in self.tools]
+        for key in ("target_url", "risk"):
+            if data[key] is None:
+                del data[key]
+        return data
+
+def _strip_fence(text: str) -> str:
+    body = text.strip()
+    if body.startswith("```"):
+        body = body[3:]
+        if body[:4].lower() == "json":
+            body = body[4:]
+        if body.endswith("```"):
+            body = body[:-3]
+    return body
+
+def decode_llm_report(text: str) -> Report:
+    """Validate an LLM's JSON report (optionally fenced or wrapped in prose) into a Report."""
+    body = _strip_fence(text)
+    try:
+        data = json.loads(body)
+    except json.JSONDecodeError:
+        start, end = body.find("{"), body.rfind("}")
+        if start < 0 or end <= start:
+            raise ModelError("report: no JSON object in LLM output")
+        try:
+            data = json.loads(body[start:end + 1])
+        except json.JSONDecodeError as e:
+            raise ModelError(f"report: invalid JSON ({e})") from e
+    return Report.from_dict(data)
+
+# NDJSON interchange ----------------------------------------------------------
+
+def _dump_line(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False) + "\n"
+
+def write_ndjson(report: Report, fp: IO[str]):
+    """Stream a report as NDJSON: header, then one row per finding and tool result."""
+    fp.write(_dump_line(dict(report._header(), format=FORMAT, version=VERSION)))
+    for finding in report.vulnerabilities:
+        fp.write(_dump_line(finding.to_row()))
+    for tool in report.tools:
+        fp.write(_dump_line(tool.to_row()))
+
+def _read_header(fp: IO[str]) -> Dict[str, Any]:
+    header = json.loads(fp.readline() or "null")
+    if not isinstance(header, dict) or header.get("format") != FORMAT:
+        raise ModelError("report: not a breachx NDJSON report")
+    if header.get("version") != VERSION:
+        raise ModelError(f"report: unsupported version {header.get('version')}")
+    return header
+
+def _row_batches(fp: IO[str]) -> Iterator[List[List[Any]]]:
+    # readlines(hint) and one json.loads per batch keep the per-row work in C
+    while True:
+        lines = fp.readlines(DECODE_BATCH_BYTES)
+        if not lines:
+            return
+        lines = [line for line in lines if not line.isspace()]
+        if lines:
+            yield json.loads("[" + ",".join(lines) + "]")
+
+def _unknown_row(row: List[Any]) -> ModelError:
+    return ModelError(f"report: unknown record type {row[0]!r}")
+
+def read_ndjson(fp: IO[str]) -> Report:
+    header = _read_header(fp)
+    report = Report(summary=header.get("summary") or "", risk_level=header.get("risk_level") or "Unknown",
+                    good_practices=header.get("good_practices") or [],
+                    recommendations=header.get("recommendations") or [],
+                    detailed_analysis=header.get("detailed_analysis") or "", target_url=header.get("target_url"),
+                    risk=header.get("risk"))
+    # Appends straight into the report's lists; this loop runs once per finding
+    add_finding, add_tool, from_row = report.vulnerabilities.append, report.tools.append, Finding.from_row
+    for rows in _row_batches(fp):
+        for row in rows:
+            if row[0] == FINDING_TAG:
+                add_finding(from_row(row))
+            elif row[0] == TOOL_TAG:
+                add_tool(ToolResult.from_row(row))
+            else:
+                raise _unknown_row(row)
+    return report
+
+def dumps_ndjson(report: Report) -> str:
+    buffer = io.StringIO()
+    write_ndjson(report, buffer)
+    return buffer.getvalue()
+
+def loads_ndjson(text: str) -> Report:
+    return read_ndjson(io.StringIO(text))
+
+def is_ndjson_path(path: str) -> bool:
+    return path.endswith((".ndjson", ".jsonl"))
+
+def save_report(report: Report, path: str):
+    """Write NDJSON for .ndjson/.jsonl paths, the legacy indented JSON otherwise."""
+    with open(path, 'w') as f:
+        if is_ndjson_path(path):
+            write_ndjson(report, f)
+        else:
+            json.dump(report.to_dict(), f, indent=2)
+
+def load_report(path: str) -> Report:
+    """Read a report in either format; NDJSON is detected from its header line."""
+    with open(path, 'r') as f:
+        first = f.readline()
+        f.seek(0)
+        if f'"format":"{FORMAT}"' in first.replace(" ", ""):
+            return read_ndjson(f)
+        return Report.from_dict(json.load(f))
@@ -0,0 +1,295 @@
+"""Versioned prompt templates for every LLM call in the report pipeline.
+
+Each template is split into a static prefix (shared preamble, task
+instructions, output format) and a variable body that holds the report
+content. The variable part always comes last, so calls that use the same
+template send byte-identical prefixes. That lets provider-side prompt caching
+(OpenAI automatic prefix caching, Gemini implicit caching) reuse them.
+Templates carry a version and a hash of their static prefix, so cache
+behaviour and output changes can be traced back to a prompt revision.
+"""
+import hashlib
+from dataclasses import dataclass, replace
+from typing import Any, Dict
+
+# Shared by every template so even different tools share the first cacheable block
+PREAMBLE = """You are a cybersecurity expert working for a security assessment platform.
+You analyze the output of automated security scanners and turn it into accurate,
+actionable findings for executives and technical teams.
+Only report issues supported by the scan data. Prefer concrete versions, CVE IDs,
+ports and endpoints over generic advice."""
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    name: str
+    version: int
+    instructions: str            # static: task description and output format
+    body: str                    # variable: placeholders for report content
+    max_input_chars: int = 6000  # truncation for the main report variable, 0 = none
+    content_variable: str = "report"  # body variable holding the scanner output
+
+    @property
+    def id(self) -> str:
+        return f"{self.name}@v{self.version}"
+
+    @property
+    def prefix(self) -> str:
+        return f"{PREAMBLE}\n\n{self.instructions}"
+
+    @property
+    def prefix_hash(self) -> str:
+        """Stable hash of the static prefix, used as the provider cache key."""
+        return hashlib.sha256(f"{self.id}\n{self.prefix}".encode('utf-8')).hexdigest()[:16]
+
+    def truncate(self, text: str) -> str:
+        """Apply the template's input limit to the report content."""
+        return text[:self.max_input_chars] if self.max_input_chars else text
+
+    def with_static(self, **values: Any) -> "PromptTemplate":
+        """Fill placeholders in the static instructions (e.g. parser format instructions)."""
+        return replace(self, instructions=self.instructions.format(**values))
+
+    def render(self, **variables: Any) -> str:
+        """Return the full prompt: static prefix first, variable content last.
+
+        The content variable is truncated to ``max_input_chars``.
+        """
+        if self.content_variable in variables:
+            variables[self.content_variable] = self.truncate(str(variables[self.content_variable]))
+        return f"{self.prefix}\n\n{self.body.format(**variables)}"
+
+PROMPTS: Dict[str, PromptTemplate] = {}
+
+def register(template: PromptTemplate) -> PromptTemplate:
+    PROMPTS[template.name] = template
+    return template
+
+def get_prompt(name: str) -> PromptTemplate:
+    try:
+        return PROMPTS[name]
+    except KeyError:
+        raise KeyError(f"Unknown prompt template: {name}") from None
+
+def cache_options(template: PromptTemplate, provider: str) -> Dict[str, Any]:
+    """Request options that help the provider reuse the cached prompt prefix.
+
+    OpenAI routes requests with the same ``prompt_cache_key`` to the same cache.
+    Gemini caches identical prefixes implicitly and needs no extra options.
+    """
+    if provider == "openai":
+        return {"extra_body": {"prompt_cache_key": f"breachx-{template.prefix_hash}"}}
+    return {}
+
+# Appended to the analysis instructions so explanations of new findings can be cached
+# (reportkit.knowledge_cache) and known ones are not re-explained
+KNOWLEDGE_INSTRUCTIONS = """Findings listed under KNOWN FINDINGS are explained elsewhere in the report: mention them by ID
+with what is specific to this target, without re-explaining them.
+After your analysis, write a line containing only KNOWLEDGE: followed by one JSON object per line
+for each other CVE or misconfiguration you identified, with keys "id" (CVE or rule id), "component"
+(affected product without version), "description" and "remediation" (both generic, not target-specific)."""
+
+# Findings are ranked offline (reportkit.cveindex); only the top ones reach the model
+RANKING_INSTRUCTIONS = """Findings listed under RANKED FINDINGS are ordered by known exploitation (CISA KEV) and CVSS
+from an offline CVE index. Keep that order when listing vulnerabilities and use the given CVSS, CWE and fixed
+versions rather than estimating them. Lower-ranked findings are listed in a table after your analysis: do
+not enumerate them."""
+
+# Lambda: per-tool analyses --------------------------------------------------
+
+# Risk assessments are computed from the findings (reportkit.scoring) and appended by the caller
+
+register(PromptTemplate(
+    name="lambda.analyze.nmap",
+    version=4,
+    max_input_chars=8000,  # Nmap reports are verbose
+    instructions="""Task: analyze an Nmap scan report and extract key findings about discovered hosts,
+open ports, services, and potential vulnerabilities.
+
+Provide a detailed analysis in the following format:
+1. Key Findings: (list major discoveries like number of hosts, critical open ports)
+2. Open Ports and Services: (list with service versions if available)
+3. Potential Vulnerabilities: (based on open services and versions)
+4. Security Recommendations: (actionable steps to address findings)
+
+""" + KNOWLEDGE_INSTRUCTIONS + "\n\n" + RANKING_INSTRUCTIONS,
+    body="{known_findings}{ranked_findings}REPORT:\n{report}",
+))
+
+register(PromptTemplate(
+    name="lambda.analyze.testssl",
+    version=4,
+    max_input_chars=8000,
+    instructions="""Task: analyze a testssl.sh SSL/TLS scan report (JSON) and extract key findings about SSL/TLS
+configuration, certificate issues, supported protocols, and vulnerabilities like Heartbleed, POODLE, etc.
+
+Provide a detailed analysis in the following format:
+1. Key Findings: (certificate issues, protocol weaknesses)
+2. SSL/TLS Protocol Issues: (list insecure protocols enabled)
+3. Cipher Vulnerabilities: (weak ciphers, insecure configurations)
+4. Certificate Analysis: (validity, trust chain issues)
+5. Security Recommendations: (specific configuration changes needed)
+
+""" + KNOWLEDGE_INSTRUCTIONS + "\n\n" + RANKING_INSTRUCTIONS,
+    body="{known_findings}{ranked_findings}REPORT:\n{report}",
+))
+
+register(PromptTemplate(
+    name="lambda.analyze.trivy",
+    version=4,
+    max_input_chars=8000,
+    instructions="""Task: analyze a Trivy vulnerability scanner report (JSON) and extract key findings about
+container/system vulnerabilities, focusing on severity levels, vulnerable packages, and available fixes.
+
+Provide a detailed analysis in the following format:
+1. Key Findings: (critical and high severity vulnerabilities)
+2. Vulnerability Breakdown: (count by severity level)
+3. Critical Vulnerabilities: (the top ranked findings with CVE IDs, in ranked order)
+4. Affected Components: (key packages/libraries requiring updates)
+5. Remediation Actions: (specific update recommendations)
+
+""" + KNOWLEDGE_INSTRUCTIONS + "\n\n" + RANKING_INSTRUCTIONS,
+    body="{known_findings}{ranked_findings}REPORT:\n{report}",
+))
+
+register(PromptTemplate(
+    name="lambda.analyze.ssrfmap",
+    version=4,
+    instructions="""Task: analyze an SSRF vulnerability scan report and extract key findings about Server-Side
+Request Forgery vulnerabilities, potentially exploitable endpoints, and security implications.
+
+Provide a detailed analysis in the following format:
+1. Key Findings: (list discovered SSRF vulnerabilities)
+2. Vulnerable Endpoints: (list with vulnerability details)
+3. Potential Impact: (what could be exploited via these SSRF issues)
+4. Recommendations: (how to fix or mitigate these vulnerabilities)
+
+""" + KNOWLEDGE_INSTRUCTIONS + "\n\n" + RANKING_INSTRUCTIONS,
+    body="{known_findings}{ranked_findings}REPORT:\n{report}",
+))
+
+register(PromptTemplate(
+    name="lambda.analyze.generic",
+    version=4,
+    instructions="""Task: analyze the output of a security scanning tool and extract key findings, vulnerabilities,
+and recommendations. Focus on severity levels, actionable insights, and potential risks.
+
+Provide a detailed analysis in the following format:
+1. Key Findings: (list major discoveries)
+2. Vulnerabilities Identified: (list with severity)
+3. Recommendations: (actionable steps)
+
+""" + KNOWLEDGE_INSTRUCTIONS + "\n\n" + RANKING_INSTRUCTIONS,
+    body="TOOL: {tool_name}\n\n{known_findings}{ranked_findings}REPORT:\n{report}",
+))
+
+register(PromptTemplate(
+    name="lambda.summary",
+    version=2,
+    max_input_chars=0,
+    instructions="""Task: create an executive summary of multiple security scan reports from the per-tool
+analyses provided below.
+
+Please provide:
+1. Executive Summary: Brief overview of the security posture
+2. Critical Findings: The most important discoveries across all tools
+3. Risk Analysis: Potential impact, keeping the computed risk levels given in each analysis
+4. Consolidated Recommendations: Prioritized list of actions
+5. Tool-specific Insights: Brief summary of what each tool revealed
+
+Format this as a professional security report suitable for executives and technical teams.""",
+    body="The following analyses were generated from these tools: {tool_list}.\n\n{combined_analysis}",
+))
+
+# analysis.py ----------------------------------------------------------------
+
+register(PromptTemplate(
+    name="analysis.report",
+    version=6,
+    max_input_chars=5000,  # applied to each tool's results by the caller
+    content_variable="",
+    instructions="""Task: analyze the security scan results below and generate a comprehensive security report.
+
+Provide a structured analysis focusing on:
+1. Executive summary
+2. Identified vulnerabilities with severity ratings and the tool that reported each
+3. Security good practices already implemented
+4. Recommendations for improvement
+5. Detailed analysis of security issues
+
+Do not rate the overall risk: it is computed from the vulnerabilities you list.
+
+When the scan results give a CVE or rule id for a vulnerability (ZAP pluginId, Nuclei template-id, ...),
+use it as the vulnerability id. If a KNOWN FINDINGS section is present, use the id listed there for
+those vulnerabilities and set their description and remediation to "KNOWN": they are filled in from the
+knowledge base. Put what is specific to this target in detailed_analysis instead.
+
+""" + RANKING_INSTRUCTIONS + """
+
+Format your response as a JSON object with the following structure:
+{format_instructions}""",
+    body="""{known_findings}{ranked_findings}Target URL: {target_url}
+
+ZAP Scan Results:
+{zap_results}
+
+SQLMap Results:
+{sqlmap_results}
+
+Nikto Scan Results:
+{nikto_results}
+
+Nuclei Scan Results:
+{nuclei_results}
+
+SSRFMap Results:
+{ssrfmap_results}
+
+Dependency Check Results:
+{dependency_results}
+
+Other Tool Results (XSStrike, JWT_Tool, ...):
+{other_results}""",
+))
+
+register(PromptTemplate(
+    name="analysis.explain",
+    version=1,
+    max_input_chars=0,
+    content_variable="vulnerabilities",
+    instructions="""Task: give a generic description and remediation for each vulnerability below.
+Write a line containing only KNOWLEDGE: followed by one JSON object per line, with keys "id" (as given),
+"component", "description" and "remediation".""",
+    body="VULNERABILITIES:\n{vulnerabilities}",
+))
+
+for _tool, _task in (
+    ("zap", "Analyze these ZAP scan results and extract the most critical vulnerabilities."),
+    ("sqlmap", "Analyze these SQLMap results and determine if there are SQL injection vulnerabilities."),
+    ("nikto", "Analyze these Nikto scan results and extract the most important findings."),
+    ("nuclei", "Analyze these Nuclei scan results and identify the most important vulnerabilities."),
+):
+    register(PromptTemplate(
+        name=f"analysis.tool.{_tool}",
+        version=1,
+        max_input_chars=3000,
+        content_variable="results",
+        instructions=f"Task: {_task}",
+        body="RESULTS:\n{results}",
+    ))
+
+register(PromptTemplate(
+    name="analysis.recommendations",
+    version=1,
+    max_input_chars=0,
+    instructions="Task: Based on the security analysis below, generate specific recommendations for improvement.",
+    body="ANALYSIS:\n{analysis}",
+))
+
+register(PromptTemplate(
+    name="analysis.risk",
+    version=1,
+    max_input_chars=0,
+    instructions="""Task: Based on the security analysis below, assess the overall security risk level
+(Critical, High, Medium, Low) and provide justification.""",
+    body="ANALYSIS:\n{analysis}",
+))
@@ -0,0 +1,172 @@
+"""Rules-based risk scoring for structured findings.
+
+Scores only depend on a finding's structured fields: CVSS (or the severity
+when there is none), known exploitation and exposure. They are stable across
+runs and need no model call. Scoring takes one pass that turns the findings
+into columns (score, category, tool). The overall risk level, the per-category
+radar scores and the per-tool risk are aggregations over those columns. The
+report JSON (``Report.risk``) and the charts use the same ``Assessment``.
+
+A group of findings scores as its worst finding plus a logarithmic bonus for
+the rest, weighted by their squared scores: many low findings barely move the
+score, while several highs push it towards critical.
+"""
+import re
+import math
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from reportkit.model import Finding
+
+CATEGORIES = ('Injection', 'Authentication', 'Data Exposure', 'XSS', 'Access Control')
+OTHER = "Other"
+UNATTRIBUTED = "other"
+
+# Score of findings without CVSS
+SEVERITY_SCORES = {"Critical": 9.5, "High": 8.0, "Medium": 5.5, "Low": 2.5, "Info": 0.0}
+
+# Known-exploited findings are scaled up and never score below High
+KEV_FACTOR = 1.25
+KEV_FLOOR = 7.0
+
+# Package findings are not necessarily reachable from the network
+TOOL_EXPOSURE = {"trivy": 0.8, "dependencies": 0.8}
+
+LEVELS = ((9.0, "Critical"), (7.0, "High"), (4.0, "Medium"))
+
+CWE_CATEGORIES = {
+    "Injection": (77, 78, 89, 90, 91, 94, 95, 502, 564, 611, 643, 917, 943, 1336),
+    "Authentication": (255, 287, 288, 290, 294, 306, 307, 345, 347, 384, 521, 522, 613, 640, 798, 1390),
+    "Data Exposure": (200, 201, 209, 256, 295, 311, 312, 315, 319, 326, 327, 328, 359, 532, 538, 548, 916),
+    "XSS": (79, 80, 83, 87),
+    "Access Control": (22, 23, 284, 285, 352, 425, 434, 601, 639, 862, 863, 918, 942, 1021),
+}
+_CWE_LOOKUP = {f"CWE-{number}": category for category, numbers in CWE_CATEGORIES.items() for number in numbers}
+
+# Checked in order against the lower-cased name, then id; XSS before Injection ("html injection").
+# Case-sensitive patterns on lower-cased text are several times faster than re.IGNORECASE.
+KEYWORD_CATEGORIES = (
+    ("XSS", re.compile(r"xss|cross[- ]site scripting|html injection")),
+    ("Injection", re.compile(r"sql|injection|command exec|\brce\b|remote code|deserializ|xxe|template|ldap")),
+    ("Authentication", re.compile(r"auth(?!oriz)|login|password|credential|session|jwt|token|brute")),
+    ("Access Control", re.compile(r"access|authoriz|privilege|idor|traversal|ssrf|csrf|cors|redirect|upload")),
+    ("Data Exposure", re.compile(r"disclos|exposure|leak|sensitive|tls|ssl|cipher|certificate|clear ?text|"
+                                 r"listing|backup|data")),
+)
+
+# Tools whose findings all fall in one category. Pipeline keys ("xss", "jwt") plus the tool names
+# the LLM tends to write in the tool field
+TOOL_CATEGORIES = {"sqlmap": "Injection", "xss": "XSS", "xsstrike": "XSS", "jwt": "Authentication",
+                   "jwt_tool": "Authentication", "testssl": "Data Exposure", "ssrfmap": "Access Control"}
+
+def base_score(finding: Finding) -> float:
+    """CVSS when known, else the severity's score."""
+    return finding.cvss if finding.cvss is not None else SEVERITY_SCORES.get(finding.severity, 0.0)
+
+def finding_score(finding: Finding) -> float:
+    """0-10 risk of one finding: base score, exploitation and exposure."""
+    score = base_score(finding) * TOOL_EXPOSURE.get(finding.tool, 1.0)
+    if finding.kev:
+        score = max(KEV_FLOOR, score * KEV_FACTOR)
+    return min(10.0, score)
+
+def category(finding: Finding) -> str:
+    """Risk category of a finding: from its CWE, then its name/id, then its tool."""
+    if finding.cwe in _CWE_LOOKUP:
+        return _CWE_LOOKUP[finding.cwe]
+    name = _text_category(finding.name)
+    if name is None and finding.id and not finding.id.startswith("CVE-"):
+        name = _text_category(finding.id)
+    return name or TOOL_CATEGORIES.get(finding.tool, OTHER)
+
+@lru_cache(maxsize=65536)
+def _text_category(text: str) -> Optional[str]:
+    # Scanners repeat titles across hosts and packages, so most lookups hit the cache
+    text = text.lower()
+    for name, pattern in KEYWORD_CATEGORIES:
+        if pattern.search(text):
+            return name
+    return None
+
+def risk_level(score: float) -> str:
+    for threshold, level in LEVELS:
+        if score >= threshold:
+            return level
+    return "Low"
+
+def combine(scores: Iterable[float]) -> float:
+    """Score of a group: its worst finding plus a log bonus for the rest."""
+    top = weight = 0.0
+    for score in scores:
+        top = max(top, score)
+        weight += (score / 10) ** 2
+    if not top:
+        return 0.0
+    return round(min(10.0, top + math.log2(1 + max(0.0, weight - (top / 10) ** 2))), 1)
+
+@dataclass(slots=True)
+class Assessment:
+    score: float = 0.0
+    risk_level: str = "Low"
+    categories: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(CATEGORIES, 0.0))
+    tools: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    findings: int = 0
+    known_exploited: int = 0
+
+    def radar(self) -> Tuple[float, ...]:
+        """Category scores in CATEGORIES order, for the radar chart."""
+        return tuple(self.categories.get(name, 0.0) for name in CATEGORIES)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"score": self.score, "risk_level": self.risk_level, "categories": self.categories,
+                "tools": self.tools, "findings": self.findings, "known_exploited": self.known_exploited}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Assessment":
+        return cls(data.get("score", 0.0), data.get("risk_level", "Low"),
+                   dict(dict.fromkeys(CATEGORIES, 0.0), **data.get("categories", {})), data.get("tools", {}),
+                   data.get("findings", 0), data.get("known_exploited", 0))
+
+def assess(findings: Iterable[Finding]) -> Assessment:
+    """Overall, per-category and per-tool risk of a set of findings."""
+    findings = list(findings)
+    # Columns, one entry per finding
+    scores = [finding_score(finding) for finding in findings]
+    categories = [category(finding) for finding in findings]
+    tools = [finding.tool or UNATTRIBUTED for finding in findings]
+
+    by_category: Dict[str, List[float]] = {}
+    by_tool: Dict[str, List[float]] = {}
+    for score, name, tool in zip(scores, categories, tools):
+        by_category.setdefault(name, []).append(score)
+        by_tool.setdefault(tool, []).append(score)
+
+    total = combine(scores)
+    assessment = Assessment(total, risk_level(total), findings=len(findings),
+                            known_exploited=sum(1 for finding in findings if finding.kev))
+    for name in CATEGORIES:
+        assessment.categories[name] = combine(by_category.get(name, ()))
+    for tool in sorted(by_tool):
+        tool_score = combine(by_tool[tool])
+        assessment.tools[tool] = {"score": tool_score, "risk_level": risk_level(tool_score),
+                                  "findings": len(by_tool[tool])}
+    return assessment
+
+def report_assessment(report) -> Assessment:
+    """A report's stored assessment, or one computed from its findings (older reports)."""
+    if report.risk:
+        return Assessment.from_dict(report.risk)
+    return assess(report.vulnerabilities)
+
+def format_assessment(assessment: Assessment, title: Optional[str] = "Risk Assessment") -> str:
+    """Plain-text summary of an assessment for analyses and reports."""
+    lines = [f"{title} (computed from {assessment.findings} findings): "
+             f"{assessment.risk_level} ({assessment.score:.1f}/10)"] if title else []
+    if assessment.known_exploited:
+        lines.append(f"- {assessment.known_exploited} known-exploited (CISA KEV) findings")
+    lines.extend(f"- {name}: {score:.1f}/10" for name, score in assessment.categories.items() if score)
+    if len(assessment.tools) > 1:
+        lines.extend(f"- {tool}: {risk['risk_level']} ({risk['score']:.1f}/10, {risk['findings']} findings)"
+                     for tool, risk in assessment.tools.items())
+    return "\n".join(lines)
@@ -0,0 +1,105 @@
+"""Paginated, compressed finding shards for the sharded HTML report.
+
+A single-file HTML report renders every finding twice and grows to tens of MB
+for large scans. The sharded layout splits the report into a small shell page
+and static files that the page loads on demand:
+
+* ``shards/findings-00000.json.gz``: ``shard_size`` findings per file, as
+  rows in ``FIELDS`` order. Findings are sorted by risk (reportkit.scoring), so the
+  first shard holds the ones worth reading first.
+* ``search/<c>.json.gz``: prebuilt inverted index. It maps every token whose
+  first character is ``c`` to the delta-encoded ordinals of the findings that
+  contain it. A search only fetches the buckets of its terms.
+* ``search/severity.json.gz``: ordinals per severity, for the severity filter.
+
+``write_shards`` returns the manifest that the shell page embeds. It holds the
+shard count, the bucket names, the severity counts and the first
+``FIRST_PAGE`` rows inline, so the first screen of findings paints without a
+fetch. The shell stays
+the same size whatever the number of findings. Files are gzipped with a fixed
+mtime, so a report regenerated from the same findings is byte-identical.
+"""
+import os
+import re
+import gzip
+import json
+from collections import defaultdict
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List
+
+from reportkit import scoring
+from reportkit.model import Finding
+
+SHARD_SIZE = 500
+FIRST_PAGE = 50
+FIELDS = ("id", "name", "severity", "affected_component", "tool", "cvss", "kev", "cwe", "fixed_in",
+          "description", "remediation")
+# Fields whose words are searchable; descriptions are left out to keep the index small
+SEARCH_FIELDS = ("id", "name", "affected_component", "tool", "cwe", "fixed_in")
+TOKEN = re.compile(r"[a-z0-9]{2,}")
+# The shell page builds the same names from the shard count
+SHARD_NAME = "shards/findings-{:05d}.json.gz"
+
+_row_values = attrgetter(*FIELDS)
+_search_values = attrgetter(*SEARCH_FIELDS)
+
+def finding_row(finding: Finding) -> List[Any]:
+    return list(_row_values(finding))
+
+def finding_tokens(finding: Finding) -> set:
+    text = " ".join(filter(None, _search_values(finding)))
+    return set(TOKEN.findall(text.lower()))
+
+def deltas(ordinals: List[int]) -> List[int]:
+    """Ascending ordinals as gaps: [3, 5, 9] -> [3, 2, 4]. Gaps are short in JSON."""
+    return [ordinal - previous for previous, ordinal in zip([0] + ordinals, ordinals)]
+
+def ranked(findings: Iterable[Finding]) -> List[Finding]:
+    """Highest-risk findings first; equal scores keep report order."""
+    return sorted(findings, key=scoring.finding_score, reverse=True)
+
+def _write(path: str, data: Any) -> int:
+    body = gzip.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"), compresslevel=6, mtime=0)
+    with open(path, "wb") as f:
+        f.write(body)
+    return len(body)
+
+def write_shards(findings: Iterable[Finding], out_dir: str, shard_size: int = SHARD_SIZE) -> Dict[str, Any]:
+    """Write finding shards and search index under ``out_dir``; return the shell's manifest."""
+    if shard_size < 1:
+        raise ValueError(f"shard_size must be positive, got {shard_size}")
+    findings = ranked(findings)
+    os.makedirs(os.path.join(out_dir, "shards"), exist_ok=True)
+    os.makedirs(os.path.join(out_dir, "search"), exist_ok=True)
+
+    written = 0
+    shard_count = -(-len(findings) // shard_size)
+    for index in range(shard_count):
+        rows = [_row_values(f) for f in findings[index * shard_size:(index + 1) * shard_size]]
+        written += _write(os.path.join(out_dir, SHARD_NAME.format(index)), rows)
+
+    # Ordinals are appended in ascending order, so postings need no sort
+    postings: Dict[str, List[int]] = defaultdict(list)
+    severities: Dict[str, List[int]] = {}
+    for ordinal, finding in enumerate(findings):
+        severities.setdefault(finding.severity, []).append(ordinal)
+        for token in finding_tokens(finding):
+            postings[token].append(ordinal)
+    buckets: Dict[str, Dict[str, List[int]]] = {}
+    for token, ordinals in postings.items():
+        buckets.setdefault(token[0], {})[token] = deltas(ordinals)
+    for name, tokens in buckets.items():
+        written += _write(os.path.join(out_dir, "search", f"{name}.json.gz"), tokens)
+    written += _write(os.path.join(out_dir, "search", "severity.json.gz"),
+                      {severity: deltas(ordinals) for severity, ordinals in severities.items()})
+
+    return {
+        "fields": list(FIELDS),
+        "total": len(findings),
+        "shard_size": shard_size,
+        "shards": shard_count,
+        "search_buckets": sorted(buckets),
+        "severity_counts": {severity: len(ordinals) for severity, ordinals in severities.items()},
+        "first_page": [finding_row(f) for f in findings[:FIRST_PAGE]],
+        "bytes": written,
+    }
@@ -0,0 +1,114 @@
+"""Pure-Python SVG renderer for the report charts.
+
+Draws the same severity bar chart and risk radar chart as the matplotlib
+renderer without importing matplotlib or numpy, so HTML reports can be
+produced in milliseconds.
+"""
+import math
+from typing import Sequence
+from xml.sax.saxutils import escape
+
+FONT = 'font-family="DejaVu Sans, Arial, sans-serif"'
+
+def _nice_step(max_value: float, target_ticks: int = 5) -> float:
+    """Pick a 1/2/5 x 10^n tick step that covers max_value in about target_ticks steps."""
+    if max_value <= 0:
+        return 1
+    raw = max_value / target_ticks
+    magnitude = 10 ** math.floor(math.log10(raw))
+    for factor in (1, 2, 5, 10):
+        if raw <= factor * magnitude:
+            return max(1, factor * magnitude)
+    return 10 * magnitude
+
+def _fmt(value: float) -> str:
+    """Format a coordinate compactly."""
+    return f"{value:.1f}".rstrip('0').rstrip('.')
+
+def bar_chart(labels: Sequence[str], values: Sequence[int], colors: Sequence[str],
+              title: str, xlabel: str, ylabel: str, width: int = 720, height: int = 432) -> bytes:
+    """Render a vertical bar chart with value labels above each bar."""
+    left, right, top, bottom = 70, 20, 50, 60
+    plot_w = width - left - right
+    plot_h = height - top - bottom
+
+    step = _nice_step(max(values) if values else 0)
+    y_max = max(step, math.ceil((max(values or [0]) + 0.5) / step) * step)
+
+    def y(value):
+        return top + plot_h - value / y_max * plot_h
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" {FONT} font-size="12">',
+        f'<rect width="{width}" height="{height}" fill="white"/>',
+        f'<text x="{_fmt(left + plot_w / 2)}" y="30" text-anchor="middle" font-size="15">{escape(title)}</text>',
+    ]
+
+    # Y axis ticks
+    tick = 0
+    while tick <= y_max:
+        ty = _fmt(y(tick))
+        parts.append(f'<line x1="{left - 4}" y1="{ty}" x2="{left}" y2="{ty}" stroke="black"/>')
+        parts.append(f'<text x="{left - 8}" y="{ty}" text-anchor="end" dominant-baseline="middle">{tick:g}</text>')
+        tick += step
+
+    # Bars with count labels
+    slot = plot_w / max(1, len(values))
+    bar_w = slot * 0.8
+    for i, (label, value, color) in enumerate(zip(labels, values, colors)):
+        x = left + i * slot + (slot - bar_w) / 2
+        parts.append(f'<rect x="{_fmt(x)}" y="{_fmt(y(value))}" width="{_fmt(bar_w)}" '
+                     f'height="{_fmt(top + plot_h - y(value))}" fill="{color}"/>')
+        parts.append(f'<text x="{_fmt(x + bar_w / 2)}" y="{_fmt(y(value) - 4)}" text-anchor="middle">{int(value)}</text>')
+        parts.append(f'<text x="{_fmt(x + bar_w / 2)}" y="{top + plot_h + 18}" text-anchor="middle">{escape(label)}</text>')
+
+    # Axes and axis labels
+    parts.append(f'<path d="M{left} {top}V{top + plot_h}H{left + plot_w}" fill="none" stroke="black"/>')
+    parts.append(f'<text x="{_fmt(left + plot_w / 2)}" y="{height - 15}" text-anchor="middle">{escape(xlabel)}</text>')
+    parts.append(f'<text x="20" y="{_fmt(top + plot_h / 2)}" text-anchor="middle" '
+                 f'transform="rotate(-90 20 {_fmt(top + plot_h / 2)})">{escape(ylabel)}</text>')
+    parts.append('</svg>')
+    return ''.join(parts).encode('utf-8')
+
+def radar_chart(categories: Sequence[str], scores: Sequence[float], title: str,
+                max_score: float = 10, size: int = 576) -> bytes:
+    """Render a radar chart with a filled score polygon over a circular grid."""
+    cx = cy = size / 2
+    radius = size / 2 - 90
+    count = len(categories)
+
+    def point(index, value, clamp=True):
+        # Start at 3 o'clock and go counter-clockwise, like a matplotlib polar axis
+        angle = 2 * math.pi * index / count
+        r = radius * (min(value, max_score) if clamp else value) / max_score
+        return cx + r * math.cos(angle), cy - r * math.sin(angle)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+        f'viewBox="0 0 {size} {size}" {FONT} font-size="12">',
+        f'<rect width="{size}" height="{size}" fill="white"/>',
+        f'<text x="{_fmt(cx)}" y="30" text-anchor="middle" font-size="15">{escape(title)}</text>',
+    ]
+
+    # Grid rings and spokes
+    for ring in range(2, int(max_score) + 1, 2):
+        r = radius * ring / max_score
+        parts.append(f'<circle cx="{_fmt(cx)}" cy="{_fmt(cy)}" r="{_fmt(r)}" fill="none" stroke="#b0b0b0" stroke-width="0.8"/>')
+        parts.append(f'<text x="{_fmt(cx + 3)}" y="{_fmt(cy - r - 2)}" font-size="10" fill="#555">{ring}</text>')
+    for i, category in enumerate(categories):
+        x, y = point(i, max_score)
+        parts.append(f'<line x1="{_fmt(cx)}" y1="{_fmt(cy)}" x2="{_fmt(x)}" y2="{_fmt(y)}" stroke="#b0b0b0" stroke-width="0.8"/>')
+        lx, ly = point(i, max_score * 1.15, clamp=False)
+        anchor = "middle" if abs(lx - cx) < 1 else ("start" if lx > cx else "end")
+        parts.append(f'<text x="{_fmt(lx)}" y="{_fmt(ly)}" text-anchor="{anchor}" '
+                     f'dominant-baseline="middle">{escape(category)}</text>')
+
+    # Score polygon with point markers
+    points = [point(i, score) for i, score in enumerate(scores)]
+    path = ' '.join(f"{_fmt(x)},{_fmt(y)}" for x, y in points)
+    parts.append(f'<polygon points="{path}" fill="#1f77b4" fill-opacity="0.25" stroke="#1f77b4" stroke-width="2"/>')
+    for x, y in points:
+        parts.append(f'<circle cx="{_fmt(x)}" cy="{_fmt(y)}" r="4" fill="#1f77b4"/>')
+    parts.append('</svg>')
+    return ''.join(parts).encode('utf-8')
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""Concurrent scan orchestrator for the security scanner image.
+
+Runs the scanners concurrently instead of one after another. Each tool
+declares a CPU weight, whether it generates traffic against the target, a
+timeout and the steps it must run after. Tools that talk to the target wait
+for a reachability preflight and are skipped if it fails, instead of each
+burning its timeout against a dead host. The scheduler starts the
+longest-expected tools first within the CPU and network budgets, so the total
+scan time approaches that of the slowest tool. Each tool's output is uploaded
+to S3 as soon as the tool finishes. ``summary.json`` is written and uploaded
+last, with per-tool status, duration and byte counts, so it doubles as the
+scan's completion manifest. With ``--upload-mode bundle``, all reports are
+instead uploaded at the end as one compressed ``reportkit.bundle`` archive,
+then the summary.
+
+Usage:
+    python3 /orchestrator.py https://example.com/
+    python3 /orchestrator.py https://example.com/ --only nmap testssl --max-network 1
+"""
+import os
+import sys
+import json
+import time
+import shlex
+import signal
+import asyncio
+import argparse
+import resource
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+REPORTS_DIR = os.environ.get("REPORTS_DIR", "/reports")
+REPORT_BUCKET = os.environ.get("REPORT_BUCKET", "security-scan-reports-breachx")
+
+@dataclass
+class Tool:
+    name: str                        # also the report folder under /reports
+    label: str
+    command: str                     # formatted with target_url, target_host, reports
+    cwd: str = "/"
+    outputs: List[str] = field(default_factory=list)  # paths relative to /reports
+    cpu: int = 1                     # CPU slots held while running
+    network: bool = True             # sends traffic to the target
+    timeout: int = 1800              # seconds before the process group is killed
+    cpu_seconds: Optional[int] = None  # RLIMIT_CPU for the process
+    nice: int = 0
+    after: List[str] = field(default_factory=list)  # steps that must succeed first
+    expected_duration: int = 60      # seconds, used to start long tools first
+
+@dataclass
+class ToolResult:
+    status: str = "pending"          # pending, running, ok, failed, timeout, skipped
+    exit_code: Optional[int] = None
+    started_at: Optional[str] = None
+    duration_s: float = 0.0
+    bytes: int = 0
+    files: int = 0
+    uploaded: bool = False
+    error: Optional[str] = None
+
+PREFLIGHT = Tool("preflight", "Reachability check",
+                 "curl -ksS -o /dev/null --max-time 20 {target_url}",
+                 timeout=30, expected_duration=1)
+
+TOOLS = [
+    PREFLIGHT,
+    Tool("sqlmap", "SQLMap",
+         "python3 /tools/sqlmap/sqlmap.py -u {target_url} --forms --batch --output-dir={reports}/sqlmap",
+         outputs=["sqlmap"], timeout=2700, expected_duration=900, after=["preflight"]),
+    Tool("testssl", "testssl.sh",
+         "./testssl.sh --quiet --json {reports}/testssl/report.json {target_url}",
+         cwd="/tools/testssl", outputs=["testssl/report.json"], timeout=1200, expected_duration=300, after=["preflight"]),
+    Tool("ssrfmap", "SSRFmap",
+         # The quoted URL must stand alone: inside double quotes its quotes would be written to the file
+         "printf 'URL: %s\\n' {target_url} > /tmp/request.txt && "
+         "python3 ssrfmap.py -r /tmp/request.txt -p url -m readfiles > {reports}/ssrfmap/report.txt",
+         cwd="/tools/ssrfmap", outputs=["ssrfmap/report.txt"], timeout=600, expected_duration=60, after=["preflight"]),
+    Tool("nikto", "Nikto",
+         "perl nikto.pl -h {target_url} -Format json -output {reports}/nikto/report.json",
+         cwd="/tools/nikto/program", outputs=["nikto/report.json"], timeout=2400, expected_duration=600, after=["preflight"]),
+    Tool("jwt", "JWT_Tool",
+         "python3 jwt_tool.py -M at -u {target_url} -o {reports}/jwt/report.txt",
+         cwd="/tools/jwt_tool", outputs=["jwt/report.txt"], timeout=600, expected_duration=60, after=["preflight"]),
+    # Local filesystem scan: no target traffic, but CPU and disk heavy
+    Tool("trivy", "Trivy",
+         "trivy fs --quiet --format json --output {reports}/trivy/report.json /",
+         outputs=["trivy/report.json"], network=False, cpu=2, nice=10, timeout=1800, expected_duration=400),
+    Tool("nmap", "Nmap",
+         "nmap -sV --script vuln {target_host} -oN {reports}/nmap/report.txt",
+         outputs=["nmap/report.txt"], cpu=2, timeout=2700, expected_duration=900, after=["preflight"]),
+    Tool("xss", "XSStrike",
+         "python3 xsstrike.py -u {target_url} --crawl --skip --output {reports}/xss/report.json",
+         cwd="/tools/xsstrike", outputs=["xss/report.json"], timeout=1800, expected_duration=300, after=["preflight"]),
+]
+
+class ResourcePool:
+    """Weighted CPU slots plus a cap on concurrent tools hitting the target."""
+
+    def __init__(self, cpu_slots: int, network_slots: int):
+        self.cpu_free = cpu_slots
+        self.cpu_slots = cpu_slots
+        self.network_free = network_slots
+        self._condition = asyncio.Condition()
+
+    def _fits(self, tool: Tool) -> bool:
+        cpu = min(tool.cpu, self.cpu_slots)
+        return self.cpu_free >= cpu and (not tool.network or self.network_free > 0)
+
+    async def acquire(self, tool: Tool):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._fits(tool))
+            self.cpu_free -= min(tool.cpu, self.cpu_slots)
+            if tool.network:
+                self.network_free -= 1
+
+    async def release(self, tool: Tool):
+        async with self._condition:
+            self.cpu_free += min(tool.cpu, self.cpu_slots)
+            if tool.network:
+                self.network_free += 1
+            self._condition.notify_all()
+
+def _output_size(paths: List[str]) -> Tuple[int, int]:
+    """Total bytes and file count of a tool's outputs."""
+    total, files = 0, 0
+    for path in paths:
+        if os.path.isfile(path):
+            total, files = total + os.path.getsize(path), files + 1
+        elif os.path.isdir(path):
+            for dirpath, _, filenames in os.walk(path):
+                for filename in filenames:
+                    total += os.path.getsize(os.path.join(dirpath, filename))
+                    files += 1
+    return total, files
+
+class Orchestrator:
+    def __init__(self, target_url: str, tools: List[Tool], cpu_slots: int, network_slots: int,
+                 s3_prefix: Optional[str], reports_dir: str = REPORTS_DIR, upload_mode: str = "files"):
+        self.target_url = target_url
+        self.target_host = urlparse(target_url).hostname or target_url
+        self.tools = {tool.name: tool for tool in tools}
+        self.results = {tool.name: ToolResult() for tool in tools}
+        self.pool = ResourcePool(cpu_slots, network_slots)
+        self.s3_prefix = s3_prefix
+        self.upload_mode = upload_mode
+        self.reports_dir = reports_dir
+        self.done = {tool.name: asyncio.Event() for tool in tools}
+        self.uploads: List[asyncio.Task] = []
+
+    def _preexec(self, tool: Tool):
+        def limit():
+            if tool.nice:
+                os.nice(tool.nice)
+            if tool.cpu_seconds:
+                resource.setrlimit(resource.RLIMIT_CPU, (tool.cpu_seconds, tool.cpu_seconds))
+        return limit
+
+    async def run_tool(self, tool: Tool):
+        result = self.results[tool.name]
+        try:
+            for dependency in tool.after:
+                if dependency in self.done:
+                    await self.done[dependency].wait()
+                    if self.results[dependency].status != "ok":
+                        result.status, result.error = "skipped", f"{dependency} did not succeed"
+                        print(f"⏭️ Skipping {tool.label}: {dependency} did not succeed", flush=True)
+                        return
+
+            await self.pool.acquire(tool)
+            try:
+                await self._execute(tool, result)
+            finally:
+                await self.pool.release(tool)
+
+            if self.s3_prefix and self.upload_mode == "files":
+                self.uploads.append(asyncio.create_task(self.upload_tool(tool)))
+        finally:
+            self.done[tool.name].set()
+
+    async def _execute(self, tool: Tool, result: ToolResult):
+        if tool.outputs:
+            os.makedirs(os.path.join(self.reports_dir, tool.name), exist_ok=True)
+        os.makedirs(os.path.join(self.reports_dir, "logs"), exist_ok=True)
+        command = tool.command.format(target_url=shlex.quote(self.target_url),
+                                      target_host=shlex.quote(self.target_host),
+                                      reports=self.reports_dir)
+
+        print(f"🚀 Starting {tool.label} scan...", flush=True)
+        result.status = "running"
+        result.started_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        start = time.monotonic()
+
+        log_path = os.path.join(self.reports_dir, "logs", f"{tool.name}.log")
+        with open(log_path, 'wb') as log:
+            try:
+                proc = await asyncio.create_subprocess_shell(
+                    command, cwd=tool.cwd if os.path.isdir(tool.cwd) else None,
+                    stdout=log, stderr=asyncio.subprocess.STDOUT,
+                    start_new_session=True, preexec_fn=self._preexec(tool),
+                )
+            except OSError as e:
+                result.status, result.error = "failed", str(e)
+                print(f"⚠️ {tool.label} could not start: {e}", flush=True)
+                return
+
+            try:
+                result.exit_code = await asyncio.wait_for(proc.wait(), timeout=tool.timeout)
+                result.status = "ok" if result.exit_code == 0 else "failed"
+            except asyncio.TimeoutError:
+                # Kill the whole process group: most tools spawn children
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                await proc.wait()
+                result.status, result.exit_code = "timeout", proc.returncode
+
+        result.duration_s = round(time.monotonic() - start, 2)
+        result.bytes, result.files = _output_size(
+            [os.path.join(self.reports_dir, output) for output in tool.outputs])
+
+        if result.status == "ok":
+            print(f"✅ {tool.label} completed in {result.duration_s:.0f}s ({result.bytes} bytes)", flush=True)
+        elif result.status == "timeout":
+            print(f"⏱️ {tool.label} timed out after {tool.timeout}s", flush=True)
+        else:
+            print(f"⚠️ {tool.label} failed (exit {result.exit_code}, {result.duration_s:.0f}s)", flush=True)
+
+    async def _aws_cp(self, local_path: str, key: str) -> bool:
+        args = ["aws", "s3", "cp", "--only-show-errors", local_path, f"s3://{REPORT_BUCKET}/{key}"]
+        if os.path.isdir(local_path):
+            args.insert(3, "--recursive")
+        proc = await asyncio.create_subprocess_exec(*args)
+        return await proc.wait() == 0
+
+    async def upload_tool(self, tool: Tool):
+        """Upload a finished tool's outputs and log."""
+        result = self.results[tool.name]
+        paths = list(tool.outputs) + [f"logs/{tool.name}.log"]
+        uploaded = True
+        for relative in paths:
+            local_path = os.path.join(self.reports_dir, relative)
+            if os.path.exists(local_path):
+                uploaded &= await self._aws_cp(local_path, f"{self.s3_prefix}/{relative}")
+        result.uploaded = uploaded
+        print(f"📤 Uploaded {tool.label} reports" if uploaded else f"⚠️ Upload failed for {tool.label}", flush=True)
+
+    async def upload_bundle(self):
+        """Pack /reports into one compressed bundle and upload it in a single PUT."""
+        from reportkit import bundle
+
+        bundle_path = os.path.join("/tmp", bundle.BUNDLE_NAME)
+        # gzip: neither this image nor the Lambda's installs zstandard
+        index = bundle.write_bundle(self.reports_dir, bundle_path, codec="gzip")
+        raw = sum(member["raw_size"] for member in index["members"])
+        print(f"📦 Bundled {len(index['members'])} files: {raw} -> {os.path.getsize(bundle_path)} bytes "
+              f"({index['codec']})", flush=True)
+        if await self._aws_cp(bundle_path, f"{self.s3_prefix}/{bundle.BUNDLE_NAME}"):
+            for result in self.results.values():
+                result.uploaded = True
+            print("📤 Uploaded scan bundle", flush=True)
+        else:
+            print("⚠️ Bundle upload failed", flush=True)
+
+    def summary(self, started: float) -> Dict:
+        return {
+            "target_url": self.target_url,
+            "date": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "total_duration_s": round(time.monotonic() - started, 2),
+            "reports": {
+                name: os.path.join(self.reports_dir, tool.outputs[0])
+                for name, tool in self.tools.items() if tool.outputs
+            },
+            "tools": {name: vars(result) for name, result in self.results.items()},
+        }
+
+    async def run(self) -> Dict:
+        started = time.monotonic()
+        print(f"🔍 Scanning {self.target_url} at {datetime.now().strftime('%c')}", flush=True)
+
+        # Longest expected tools first so the slowest one is never started late
+        ordered = sorted(self.tools.values(), key=lambda t: -t.expected_duration)
+        await asyncio.gather(*(self.run_tool(tool) for tool in ordered))
+        await asyncio.gather(*self.uploads)
+
+        summary = self.summary(started)
+        summary_path = os.path.join(self.reports_dir, "summary.json")
+        with open(summary_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"✅ All scans complete in {summary['total_duration_s']:.0f}s. Reports saved to {self.reports_dir}",
+              flush=True)
+
+        if self.s3_prefix and self.upload_mode == "bundle":
+            await self.upload_bundle()
+
+        # The summary goes last: its arrival marks the scan as complete
+        if self.s3_prefix:
+            await self._aws_cp(summary_path, f"{self.s3_prefix}/summary.json")
+            print("✅ Reports uploaded to S3", flush=True)
+        return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the security scanners concurrently")
+    parser.add_argument("target_url", nargs="?", default=os.environ.get("TARGET_URL"))
+    parser.add_argument("--only", nargs="+", choices=[t.name for t in TOOLS if t is not PREFLIGHT],
+                        help="Run only these tools")
+    parser.add_argument("--cpu-slots", type=int, default=os.cpu_count() or 2, help="CPU budget shared by tools")
+    parser.add_argument("--max-network", type=int, default=4, help="Max tools sending traffic to the target at once")
+    parser.add_argument("--serial", action="store_true", help="Run one tool at a time")
+    parser.add_argument("--no-upload", action="store_true", help="Skip S3 uploads")
+    parser.add_argument("--upload-mode", choices=["files", "bundle"], default=os.environ.get("SCAN_UPLOAD_MODE", "files"),
+                        help="Upload each report as its tool finishes, or one compressed bundle at the end")
+    args = parser.parse_args()
+
+    if not args.target_url:
+        print("❌ No TARGET_URL provided")
+        sys.exit(1)
+
+    tools = [t for t in TOOLS if not args.only or t.name in args.only or t is PREFLIGHT]
+    upload = not args.no_upload and os.environ.get("AWS_ACCESS_KEY_ID") and os.environ.get("AWS_SECRET_ACCESS_KEY")
+    s3_prefix = f"reports/{int(time.time())}" if upload else None
+
+    cpu_slots = 1 if args.serial else args.cpu_slots
+    network_slots = 1 if args.serial else args.max_network
+    if args.serial:
+        # One slot and every tool needing at least one: strictly sequential
+        for tool in tools:
+            tool.cpu = 1
+            tool.network = True
+
+    orchestrator = Orchestrator(args.target_url, tools, cpu_slots, network_slots, s3_prefix,
+                                upload_mode=args.upload_mode)
+    asyncio.run(orchestrator.run())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,489 @@
+"""Resident report worker with an asyncio job API.
+
+``analysis.py`` and ``generator.py`` pay seconds of start-up on every run:
+imports, client construction, template compilation and new HTTPS connections.
+The worker stays resident instead. It keeps the OpenAI client (and its
+connection pool), the compiled analysis graph and the compiled report template
+warm, and accepts jobs over a local HTTP port or a Unix socket:
+
+* ``POST /jobs``: submit ``{"type": "analyze", "scan_dir": ..., "target_url": ...}`` or
+  ``{"type": "render", "report_json": ..., "formats": ["html", "pdf"]}``; ``?wait=1``
+  answers when the job has finished. ``"html_mode": "sharded"`` renders large
+  reports as a shell page plus finding shards. Optional ``user_id``, ``repository_id`` and
+  ``priority`` (see ``reportkit.jobqueue.PRIORITY_CLASSES``) drive scheduling. Analyses
+  whose scan outputs mention a critical finding, and renders of reports with one, are
+  promoted to ``critical``.
+* ``GET /jobs/<id>``: job status and result
+* ``GET /jobs/<id>/events``: job progress as NDJSON, streamed until the job ends
+* ``GET /metrics``: throughput, queue depth, queue wait and run time percentiles
+* ``GET /healthz``
+
+Jobs go through a persistent ``reportkit.jobqueue.JobQueue``. Critical and
+interactive scans overtake nightly ones, users get fair turns, and duplicate
+pending analyses of one target are merged.
+
+Usage:
+    python worker.py --port 8765 --concurrency 2 --preload
+    python worker.py --socket /tmp/breachx-worker.sock
+    curl -s localhost:8765/jobs -d '{"type": "render", "report_json": "security-report.json"}'
+"""
+import os
+import re
+import json
+import time
+import uuid
+import signal
+import asyncio
+import argparse
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import analysis
+import generator
+from reportkit import bundle, ingest, instrumentation, jobqueue, model
+
+tracer = instrumentation.configure(service="report-worker")
+
+JOB_TYPES = ("analyze", "render")
+RENDER_FORMATS = ("html", "pdf", "markdown")
+MAX_BODY_BYTES = 1024 * 1024
+MAX_FINISHED_JOBS = 1000
+# Payload fields used for scheduling rather than passed to the job
+SCHEDULING_FIELDS = ("user_id", "repository_id", "priority")
+# Scanner outputs are searched in their last bytes, where tools summarize
+CRITICAL_SAMPLE_BYTES = 256 * 1024
+CRITICAL_MENTION = re.compile(r"\bcritical\b", re.IGNORECASE)
+
+class Job:
+    """A submitted job and its progress events."""
+
+    def __init__(self, job_type: str, params: Dict[str, Any], job_id: Optional[str] = None):
+        self.id = job_id or uuid.uuid4().hex[:12]
+        self.type = job_type
+        self.params = params
+        self.status = "queued"
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.events: List[Dict[str, Any]] = []
+        self._changed = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def publish(self, event: str, **data: Any):
+        """Record a progress event and wake up streaming clients (event loop thread only)."""
+        self.events.append({"job": self.id, "event": event, "time": round(time.time(), 3), **data})
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_changed(self):
+        await self._changed.wait()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "type": self.type,
+            "status": self.status,
+            "params": self.params,
+            "created": self.created,
+            "queue_wait_s": round((self.started or time.time()) - self.created, 3),
+            "run_s": round(self.finished - self.started, 3) if self.finished and self.started else None,
+            "result": self.result,
+            "error": self.error,
+        }
+
+def has_critical_findings(job_type: str, params: Dict[str, Any]) -> bool:
+    """Whether an analysis' scan outputs mention a critical finding, or a render's report contains one."""
+    try:
+        if job_type == "render":
+            # Reports hold canonical severities, in either the legacy JSON or NDJSON format
+            with open(params["report_json"], errors="replace") as f:
+                return any('"Critical"' in line for line in f)
+        scan_dir = params["scan_dir"]
+        source = (ingest.BundleSource(bundle.BundleReader.from_file(scan_dir)) if os.path.isfile(scan_dir)
+                  else ingest.LocalSource(scan_dir))
+        return any(CRITICAL_MENTION.search(line) for name in source.files() if name != "summary.json"
+                   for line in source.lines(name, CRITICAL_SAMPLE_BYTES))
+    except (OSError, ValueError, RuntimeError):
+        # The job itself reports unreadable inputs
+        return False
+
+def _percentile(values, fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 3)
+
+class ReportWorker:
+    def __init__(self, concurrency: int = 2, api_key: Optional[str] = None,
+                 queue: Optional[jobqueue.JobQueue] = None):
+        self.concurrency = concurrency
+        self.api_key = api_key
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.queue = queue or jobqueue.JobQueue()
+        self._work_available: Optional[asyncio.Event] = None
+        self._accepting = True
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="report-job")
+        self.started = time.time()
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self._finished_at = deque(maxlen=10000)
+        self._run_times: Dict[str, deque] = {job_type: deque(maxlen=1000) for job_type in JOB_TYPES}
+        self._queue_waits = deque(maxlen=1000)
+        # Warm resources, built on first use and shared by all jobs
+        self._warm_lock = threading.Lock()
+        self._analyzer = None
+        self._dag = None
+
+    # Warm resources ---------------------------------------------------------
+
+    def analyzer(self) -> "analysis.ReportGenerator":
+        with self._warm_lock:
+            if self._analyzer is None:
+                self._analyzer = analysis.ReportGenerator(api_key=self.api_key)
+            return self._analyzer
+
+    def dag(self):
+        with self._warm_lock:
+            if self._dag is None:
+                self._dag = analysis.build_security_analysis_dag(api_key=self.api_key)
+            return self._dag
+
+    def warm_up(self, preload_llm: bool = False):
+        """Compile templates and load rendering code before the first job arrives."""
+        generator._html_template()
+        generator._security_report_pdf_class()
+        if preload_llm:
+            self.analyzer()
+            self.dag()
+
+    # Job handlers (run in the thread pool) ---------------------------------
+
+    def _analyze(self, job: Job, emit: Callable[..., None]) -> Dict[str, Any]:
+        params = job.params
+        output = params.get("output", "security-report.json")
+        analyzer = self.analyzer()
+
+        emit("stage", stage="load_scan_results")
+        scan_results = analyzer.load_scan_results(params["scan_dir"])
+
+        emit("stage", stage="generate_report")
+        report = analyzer.generate_report(scan_results, params["target_url"])
+        model.save_report(report, output)
+        result = {"report_json": output, "risk_level": report.risk_level,
+                  "vulnerabilities": len(report.vulnerabilities)}
+
+        if params.get("detailed"):
+            emit("stage", stage="detailed_analysis")
+            final_state = self.dag().invoke({
+                "target_url": params["target_url"],
+                "scan_results": analysis.tool_results(scan_results, analyzer.cve_index),
+                "findings": report.vulnerabilities,
+                "tool_analyses": {},
+            })
+            detailed_output = params.get("detailed_output", "detailed-analysis.json")
+            with open(detailed_output, 'w') as f:
+                json.dump(final_state["detailed_analysis"], f, indent=2)
+            result["detailed_analysis"] = detailed_output
+
+        # Optionally render straight away from the fresh report
+        if params.get("render"):
+            result["reports"] = self._render_formats(output, params, params["render"], emit)
+        return result
+
+    def _render(self, job: Job, emit: Callable[..., None]) -> Dict[str, Any]:
+        params = job.params
+        formats = params.get("formats") or list(RENDER_FORMATS)
+        return {"reports": self._render_formats(params["report_json"], params, formats, emit)}
+
+    def _render_formats(self, report_json: str, params: Dict[str, Any], formats: List[str],
+                        emit: Callable[..., None]) -> Dict[str, str]:
+        report_generator = generator.ReportGenerator(
+            report_json,
+            chart_format=params.get("chart_format", "svg"),
+            chart_renderer=params.get("chart_renderer", "builtin"),
+            output_dir=params.get("output_dir", "generated-reports"),
+        )
+        paths = {}
+        for fmt in formats:
+            emit("stage", stage=f"render.{fmt}")
+            if fmt == "html":
+                paths[fmt] = report_generator.generate_html_report(mode=params.get("html_mode", "single"))
+            elif fmt == "pdf":
+                paths[fmt] = report_generator.generate_pdf_report(backend=params.get("pdf_backend", "fpdf"))
+            else:
+                paths[fmt] = report_generator.generate_markdown_report()
+        return paths
+
+    # Scheduling --------------------------------------------------------------
+
+    def validate(self, payload: Dict[str, Any]) -> Job:
+        job_type = payload.get("type")
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"'type' must be one of {', '.join(JOB_TYPES)}")
+        params = {k: v for k, v in payload.items() if k != "type" and k not in SCHEDULING_FIELDS}
+        required = ("scan_dir", "target_url") if job_type == "analyze" else ("report_json",)
+        missing = [name for name in required if not params.get(name)]
+        if missing:
+            raise ValueError(f"Missing parameters for {job_type} job: {', '.join(missing)}")
+        formats = params.get("formats") or params.get("render") or []
+        unknown = [fmt for fmt in formats if fmt not in RENDER_FORMATS]
+        if unknown:
+            raise ValueError(f"Unknown report formats: {', '.join(unknown)}")
+        if params.get("html_mode", "single") not in generator.HTML_MODES:
+            raise ValueError(f"'html_mode' must be one of {', '.join(generator.HTML_MODES)}")
+        priority = payload.get("priority", "interactive")
+        if priority not in jobqueue.PRIORITY_CLASSES:
+            raise ValueError(f"'priority' must be one of {', '.join(jobqueue.PRIORITY_CLASSES)}")
+        return Job(job_type, params)
+
+    def submit(self, payload: Dict[str, Any]) -> Job:
+        """Queue a job; an identical pending analysis by the same user is reused."""
+        job = self.validate(payload)
+        priority = payload.get("priority", "interactive")
+        if priority != "critical" and has_critical_findings(job.type, job.params):
+            priority = "critical"
+        queued = self.queue.enqueue(
+            job.type, job.params,
+            user_id=str(payload.get("user_id") or "anonymous"),
+            repository_id=str(payload.get("repository_id") or ""),
+            # Only analyses are deduplicated (same user and parameters); renders differ by output options
+            target_url=job.params.get("target_url") if job.type == "analyze" else None,
+            priority_class=priority,
+        )
+        if queued["deduplicated"]:
+            existing = self.jobs.get(queued["id"])
+            if existing is not None:
+                existing.publish("deduplicated")
+                return existing
+        job.id = queued["id"]
+        self.jobs[job.id] = job
+        self._trim_jobs()
+        job.publish("queued", pending=self.queue.pending(), priority=priority)
+        self._work_available.set()
+        return job
+
+    def _trim_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    async def _consume(self):
+        while self._accepting:
+            self._work_available.clear()
+            claimed = self.queue.claim()
+            if claimed is None:
+                # New submissions and finished jobs (freeing a fair-share slot) wake us up
+                try:
+                    await asyncio.wait_for(self._work_available.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            job = self.jobs.get(claimed["id"])
+            if job is None:
+                # Queued before a restart
+                job = Job(claimed["kind"], claimed["payload"], job_id=claimed["id"])
+                job.created = claimed["enqueued_at"]
+                self.jobs[job.id] = job
+            await self._run(job)
+            self._work_available.set()
+
+    async def _run(self, job: Job):
+        job.status = "running"
+        job.started = time.time()
+        self._queue_waits.append(job.started - job.created)
+        self.running += 1
+        job.publish("started")
+
+        def emit(event: str, **data: Any):
+            self.loop.call_soon_threadsafe(lambda: job.publish(event, **data))
+
+        handler = self._analyze if job.type == "analyze" else self._render
+        try:
+            job.result = await self.loop.run_in_executor(self.executor, handler, job, emit)
+            job.status = "succeeded"
+            self.completed += 1
+            self.queue.complete(job.id)
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = "failed"
+            self.failed += 1
+            self.queue.fail(job.id, job.error)
+        finally:
+            job.finished = time.time()
+            self.running -= 1
+            self._finished_at.append(job.finished)
+            self._run_times[job.type].append(job.finished - job.started)
+            # Let progress events queued by the handler thread land first
+            await asyncio.sleep(0)
+            job.publish(job.status, result=job.result, error=job.error)
+
+    def metrics(self) -> Dict[str, Any]:
+        now = time.time()
+        window = [t for t in self._finished_at if now - t <= 60]
+        return {
+            "uptime_s": round(now - self.started, 1),
+            "concurrency": self.concurrency,
+            "queue_depth": self.queue.pending(),
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "throughput_per_min": len(window),
+            "queue_wait_s": {"p50": _percentile(self._queue_waits, 0.5), "p95": _percentile(self._queue_waits, 0.95)},
+            "run_s": {
+                job_type: {"p50": _percentile(times, 0.5), "p95": _percentile(times, 0.95)}
+                for job_type, times in self._run_times.items()
+            },
+            "queue": self.queue.stats(),
+            "warm": {"analyzer": self._analyzer is not None, "dag": self._dag is not None},
+        }
+
+    # HTTP --------------------------------------------------------------------
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: Any):
+        body = json.dumps(payload, default=str).encode('utf-8')
+        reason = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+                  405: "Method Not Allowed", 413: "Payload Too Large"}.get(status, "")
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode('latin-1') + body)
+        await writer.drain()
+
+    async def _stream_events(self, writer: asyncio.StreamWriter, job: Job):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nConnection: close\r\n\r\n")
+        sent = 0
+        while True:
+            while sent < len(job.events):
+                writer.write(json.dumps(job.events[sent], default=str).encode('utf-8') + b"\n")
+                sent += 1
+            await writer.drain()
+            if job.done and sent == len(job.events):
+                return
+            await job.wait_changed()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, target, _ = request_line.decode('latin-1').split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode('latin-1').partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length") or 0)
+            if length > MAX_BODY_BYTES:
+                await self._respond(writer, 413, {"error": "Request body too large"})
+                return
+            body = await reader.readexactly(length) if length else b""
+            await self._route(method, urlsplit(target), body, writer)
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            await self._respond(writer, 400, {"error": str(e)})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, url, body: bytes, writer: asyncio.StreamWriter):
+        parts = [part for part in url.path.split("/") if part]
+        query = parse_qs(url.query)
+
+        if parts == ["healthz"]:
+            await self._respond(writer, 200, {"status": "ok"})
+        elif parts == ["metrics"]:
+            await self._respond(writer, 200, self.metrics())
+        elif parts == ["jobs"] and method == "POST":
+            try:
+                job = self.submit(json.loads(body or b"{}"))
+            except (ValueError, jobqueue.QueueFull) as e:
+                await self._respond(writer, 400, {"error": str(e)})
+                return
+            if query.get("wait", ["0"])[0] in ("1", "true"):
+                while not job.done:
+                    await job.wait_changed()
+                await self._respond(writer, 200, job.to_dict())
+            else:
+                await self._respond(writer, 202, dict(job.to_dict(), events=f"/jobs/{job.id}/events"))
+        elif parts == ["jobs"] and method == "GET":
+            await self._respond(writer, 200, [job.to_dict() for job in reversed(self.jobs.values())])
+        elif len(parts) in (2, 3) and parts[0] == "jobs" and method == "GET":
+            job = self.jobs.get(parts[1])
+            if job is None:
+                await self._respond(writer, 404, {"error": f"Unknown job: {parts[1]}"})
+            elif len(parts) == 3 and parts[2] == "events":
+                await self._stream_events(writer, job)
+            elif len(parts) == 2:
+                await self._respond(writer, 200, job.to_dict())
+            else:
+                await self._respond(writer, 404, {"error": "Not found"})
+        elif parts in (["jobs"], ["healthz"], ["metrics"]):
+            await self._respond(writer, 405, {"error": f"{method} not allowed"})
+        else:
+            await self._respond(writer, 404, {"error": "Not found"})
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, socket_path: Optional[str] = None):
+        self.loop = asyncio.get_running_loop()
+        self._work_available = asyncio.Event()
+        recovered = self.queue.requeue_running()
+        if recovered:
+            print(f"Requeued {recovered} jobs interrupted by the last shutdown")
+        consumers = [asyncio.create_task(self._consume()) for _ in range(self.concurrency)]
+
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            server = await asyncio.start_unix_server(self.handle, path=socket_path)
+            print(f"Report worker listening on unix:{socket_path}")
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+            print(f"Report worker listening on http://{host}:{port}")
+
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            self.loop.add_signal_handler(sig, stop.set)
+        async with server:
+            await stop.wait()
+
+        # Stop taking new jobs and let running ones finish; pending jobs stay in the queue database
+        print("Shutting down: waiting for running jobs...")
+        server.close()
+        self._accepting = False
+        self._work_available.set()
+        await asyncio.gather(*consumers)
+        self.executor.shutdown(wait=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident security report worker")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="HTTP port")
+    parser.add_argument("--socket", help="Listen on a Unix socket instead of TCP")
+    parser.add_argument("--concurrency", type=int, default=2, help="Jobs run in parallel")
+    parser.add_argument("--api-key", help="OpenAI API key")
+    parser.add_argument("--queue-db", default=os.path.join(os.path.expanduser("~"), ".cache", "breachx", "jobs.sqlite3"),
+                        help="SQLite file holding the job queue")
+    parser.add_argument("--max-per-user", type=int, default=2, help="Max jobs running at once for one user")
+    parser.add_argument("--max-per-repo", type=int, default=1, help="Max jobs running at once for one repository")
+    parser.add_argument("--preload", action="store_true",
+                        help="Build the OpenAI client and analysis graph at start-up instead of on first use")
+
+    args = parser.parse_args()
+
+    queue = jobqueue.JobQueue(args.queue_db, max_running_per_user=args.max_per_user,
+                              max_running_per_repo=args.max_per_repo)
+    worker = ReportWorker(concurrency=args.concurrency, api_key=args.api_key, queue=queue)
+    worker.warm_up(preload_llm=args.preload)
+    asyncio.run(worker.serve(args.host, args.port, args.socket))
+
+if __name__ == "__main__":
+    main()